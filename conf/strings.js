@@ -27,6 +27,7 @@ gettext("This week")
 gettext("Timer")
 gettext("Today")
 gettext("Unable to open the form")
+gettext("Unable to prepare the download")
 gettext("Unable to submit the logbook entry")
 gettext("Week %s")
 gettext("What outcome do you seek?")
@@ -17,13 +17,13 @@ def logged_hours(user):
         """
 WITH sq AS (
     SELECT
-        date_trunc('week', rendered_on) AS week,
+        week,
         project.type AS type,
         SUM(hours) AS hours
-    FROM logbook_loggedhours hours
+    FROM logbook_loggedhoursrollup hours
     LEFT JOIN projects_service service ON hours.service_id=service.id
     LEFT JOIN projects_project project ON service.project_id=project.id
-    WHERE rendered_by_id=%s AND rendered_on>=%s
+    WHERE rendered_by_id=%s AND week>=%s
     GROUP BY week, project.type
 )
 SELECT series.week, sq.type, COALESCE(sq.hours, 0)
@@ -52,14 +52,14 @@ ORDER BY series.week
         """
 WITH sq AS (
     SELECT
-        date_trunc('week', rendered_on) AS week,
+        week,
         customer.name AS customer,
         SUM(hours) AS hours
-    FROM logbook_loggedhours hours
+    FROM logbook_loggedhoursrollup hours
     LEFT JOIN projects_service service ON hours.service_id=service.id
     LEFT JOIN projects_project project ON service.project_id=project.id
     LEFT JOIN contacts_organization customer ON project.customer_id=customer.id
-    WHERE rendered_by_id=%s AND rendered_on>=%s
+    WHERE rendered_by_id=%s AND week>=%s
     GROUP BY week, customer.name
 )
 SELECT series.week, COALESCE(sq.customer, ''), COALESCE(sq.hours, 0)
@@ -0,0 +1,75 @@
+"""
+Indexed projection of the audit trail
+
+``audit_logged_actions`` stores row data in hstore columns which cannot be
+searched using a btree index. A trigger on the audit table copies the primary
+key and all foreign keys of each logged action into ``audit_logged_action_keys``
+so that the history of a row or of all rows referencing another row can be
+looked up without scanning the whole audit trail.
+"""
+
+TRIGGER = """\
+CREATE TABLE IF NOT EXISTS audit_logged_action_keys (
+  table_name text NOT NULL,
+  key text NOT NULL,
+  value bigint NOT NULL,
+  event_id bigint NOT NULL,
+  PRIMARY KEY (table_name, key, value, event_id)
+);
+
+CREATE INDEX IF NOT EXISTS audit_logged_action_keys_event_id_idx
+  ON audit_logged_action_keys(event_id);
+
+CREATE OR REPLACE FUNCTION audit_logged_action_keys_trigger()
+RETURNS trigger AS $$
+begin
+  IF TG_OP = 'DELETE' THEN
+    DELETE FROM audit_logged_action_keys WHERE event_id=OLD.event_id;
+  ELSE
+    INSERT INTO audit_logged_action_keys (table_name, key, value, event_id)
+    SELECT DISTINCT NEW.table_name, data.key, data.value::bigint, NEW.event_id
+    FROM (
+      SELECT * FROM each(NEW.row_data)
+      UNION ALL
+      SELECT * FROM each(NEW.changed_fields)
+    ) data
+    WHERE (data.key='id' OR data.key LIKE '%\\_id')
+      AND data.value ~ '^-?[0-9]{1,18}$'
+    ON CONFLICT DO NOTHING;
+  END IF;
+  RETURN NULL;
+end
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS audit_logged_action_keys_trigger ON audit_logged_actions;
+CREATE TRIGGER audit_logged_action_keys_trigger
+  AFTER INSERT OR DELETE ON audit_logged_actions
+  FOR EACH ROW EXECUTE PROCEDURE audit_logged_action_keys_trigger();
+
+INSERT INTO audit_logged_action_keys (table_name, key, value, event_id)
+SELECT DISTINCT a.table_name, data.key, data.value::bigint, a.event_id
+FROM audit_logged_actions a
+CROSS JOIN LATERAL (
+  SELECT * FROM each(a.row_data)
+  UNION ALL
+  SELECT * FROM each(a.changed_fields)
+) data
+WHERE (data.key='id' OR data.key LIKE '%\\_id')
+  AND data.value ~ '^-?[0-9]{1,18}$'
+ON CONFLICT DO NOTHING;
+"""
+
+DROP_TRIGGER = """\
+DROP TRIGGER IF EXISTS audit_logged_action_keys_trigger ON audit_logged_actions;
+DROP FUNCTION IF EXISTS audit_logged_action_keys_trigger();
+DROP TABLE IF EXISTS audit_logged_action_keys;
+"""
+
+KEYS_SQL = """\
+SELECT event_id FROM audit_logged_action_keys
+WHERE table_name=%s AND key=%s AND value=%s
+"""
+
+
+def is_key(attribute):
+    return attribute == "id" or attribute.endswith("_id")
@@ -0,0 +1,14 @@
+from django.db import migrations
+
+from workbench.audit import keys
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("audit", "0004_auto_20201017_1016"),
+    ]
+
+    operations = [
+        migrations.RunSQL(keys.TRIGGER, keys.DROP_TRIGGER),
+    ]
@@ -0,0 +1,24 @@
+import io
+import os
+
+from django.conf import settings
+from django.db import migrations
+
+from workbench.audit import partitions
+
+
+with io.open(os.path.join(settings.BASE_DIR, "stuff", "audit.sql")) as f:
+    AUDIT_SQL = f.read()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("audit", "0005_logged_action_keys"),
+    ]
+
+    operations = [
+        migrations.RunSQL(partitions.PARTITION, partitions.DROP_PARTITION),
+        # Recreate the audit functions which reference the table's row type
+        migrations.RunSQL(AUDIT_SQL, AUDIT_SQL),
+    ]
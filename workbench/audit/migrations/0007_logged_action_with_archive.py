@@ -0,0 +1,51 @@
+# Generated by Django 3.1.5 on 2026-10-18 04:09
+
+import django.contrib.postgres.fields.hstore
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("audit", "0006_partitions"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LoggedActionWithArchive",
+            fields=[
+                ("event_id", models.IntegerField(primary_key=True, serialize=False)),
+                ("table_name", models.TextField()),
+                ("user_name", models.TextField(null=True)),
+                ("created_at", models.DateTimeField()),
+                (
+                    "action",
+                    models.CharField(
+                        choices=[
+                            ("I", "INSERT"),
+                            ("U", "UPDATE"),
+                            ("D", "DELETE"),
+                            ("T", "TRUNCATE"),
+                        ],
+                        max_length=1,
+                    ),
+                ),
+                (
+                    "row_data",
+                    django.contrib.postgres.fields.hstore.HStoreField(null=True),
+                ),
+                (
+                    "changed_fields",
+                    django.contrib.postgres.fields.hstore.HStoreField(null=True),
+                ),
+            ],
+            options={
+                "verbose_name": "logged action",
+                "verbose_name_plural": "logged actions",
+                "db_table": "audit_logged_actions_all",
+                "ordering": ["event_id"],
+                "abstract": False,
+                "managed": False,
+            },
+        ),
+    ]
@@ -3,11 +3,24 @@ import re
 from django.contrib.postgres.fields import HStoreField
 from django.db import models
 from django.db.models import Q
+from django.db.models.expressions import RawSQL
 from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 
+from workbench.audit.keys import KEYS_SQL, is_key
+
 
 class LoggedActionQuerySet(models.QuerySet):
+    def with_archive(self):
+        """
+        Returns live actions and actions of partitions moved to the archive
+
+        Has to be called before applying any filters.
+        """
+        if self.query.has_filters():
+            raise TypeError("with_archive() has to be called before filtering.")
+        return LoggedActionWithArchive.objects.all()
+
     def for_model(self, model):
         return self.filter(table_name=model._meta.db_table)
 
@@ -20,8 +33,23 @@ class LoggedActionQuerySet(models.QuerySet):
             )
         return queryset
 
+    def for_row(self, model, value, *, attribute="id"):
+        """
+        Returns actions of ``model`` rows where ``attribute`` is or was
+        ``value``
+
+        Equivalent to ``for_model(model).with_data(**{attribute: value})`` but
+        uses the indexed ``audit_logged_action_keys`` projection for primary
+        and foreign keys.
+        """
+        if not is_key(attribute):
+            return self.for_model(model).with_data(**{attribute: value})
+        return self.filter(
+            event_id__in=RawSQL(KEYS_SQL, (model._meta.db_table, attribute, int(value)))
+        )
+
 
-class LoggedAction(models.Model):
+class AbstractLoggedAction(models.Model):
     ACTION_TYPES = (
         ("I", "INSERT"),
         ("U", "UPDATE"),
@@ -40,11 +68,8 @@ class LoggedAction(models.Model):
     objects = LoggedActionQuerySet.as_manager()
 
     class Meta:
-        managed = False
-        db_table = "audit_logged_actions"
+        abstract = True
         ordering = ["event_id"]
-        verbose_name = _("logged action")
-        verbose_name_plural = _("logged actions")
 
     def __str__(self):
         return "%s %s by %s at %s" % (
@@ -58,3 +83,23 @@ class LoggedAction(models.Model):
     def user_id(self):
         match = re.search(r"^user-([0-9]+)-", self.user_name)
         return int(match.groups()[0]) if match else None
+
+
+class LoggedAction(AbstractLoggedAction):
+    class Meta(AbstractLoggedAction.Meta):
+        managed = False
+        db_table = "audit_logged_actions"
+        verbose_name = _("logged action")
+        verbose_name_plural = _("logged actions")
+
+
+class LoggedActionWithArchive(AbstractLoggedAction):
+    """
+    Live and archived actions, see ``workbench.audit.partitions``
+    """
+
+    class Meta(AbstractLoggedAction.Meta):
+        managed = False
+        db_table = "audit_logged_actions_all"
+        verbose_name = _("logged action")
+        verbose_name_plural = _("logged actions")
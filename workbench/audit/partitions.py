@@ -0,0 +1,250 @@
+"""
+Yearly partitions of the audit trail
+
+``audit_logged_actions`` is partitioned by the year of ``created_at``. Rows
+outside of all yearly partitions end up in ``audit_logged_actions_default``
+until ``create_partitions()`` adds the partition for their year.
+
+Cold partitions may be moved to ``audit_logged_actions_archive`` using
+``archive()`` without copying any data, or exported to a compressed file and
+dropped using ``export()``. ``LoggedActionQuerySet.with_archive()`` queries
+the live and the archived actions at once.
+"""
+
+import datetime as dt
+import gzip
+import json
+
+from django.db import connections, transaction
+
+from workbench.tools.reporting import query
+
+
+PARTITION = """\
+CREATE OR REPLACE FUNCTION audit_create_partition(year integer)
+RETURNS void AS $$
+DECLARE
+  partition text = 'audit_logged_actions_' || year;
+  date_from date = make_date(year, 1, 1);
+  date_until date = make_date(year + 1, 1, 1);
+begin
+  IF to_regclass(partition) IS NOT NULL THEN
+    RETURN;
+  END IF;
+
+  -- Rows of this year may already exist in the default partition
+  ALTER TABLE audit_logged_actions
+    DETACH PARTITION audit_logged_actions_default;
+  EXECUTE format(
+    'CREATE TABLE %I PARTITION OF audit_logged_actions'
+    ' FOR VALUES FROM (%L) TO (%L)',
+    partition, date_from, date_until
+  );
+  EXECUTE format(
+    'WITH moved AS ('
+    '  DELETE FROM audit_logged_actions_default'
+    '  WHERE created_at>=%L AND created_at<%L RETURNING *'
+    ') INSERT INTO audit_logged_actions SELECT * FROM moved',
+    date_from, date_until
+  );
+  ALTER TABLE audit_logged_actions
+    ATTACH PARTITION audit_logged_actions_default DEFAULT;
+end
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION audit_archive_partition(year integer)
+RETURNS void AS $$
+DECLARE
+  partition text = 'audit_logged_actions_' || year;
+begin
+  EXECUTE format(
+    'ALTER TABLE audit_logged_actions DETACH PARTITION %I', partition
+  );
+  EXECUTE format(
+    'ALTER TABLE audit_logged_actions_archive ATTACH PARTITION %I'
+    ' FOR VALUES FROM (%L) TO (%L)',
+    partition, make_date(year, 1, 1), make_date(year + 1, 1, 1)
+  );
+end
+$$ LANGUAGE plpgsql;
+
+ALTER TABLE audit_logged_actions RENAME TO audit_logged_actions_old;
+DROP TRIGGER IF EXISTS audit_logged_action_keys_trigger
+  ON audit_logged_actions_old;
+ALTER SEQUENCE audit_logged_actions_event_id_seq OWNED BY NONE;
+
+CREATE TABLE audit_logged_actions (
+  event_id bigint NOT NULL
+    DEFAULT nextval('audit_logged_actions_event_id_seq'),
+  table_name text NOT NULL,
+  user_name text,
+  created_at timestamp with time zone NOT NULL,
+  action text NOT NULL CHECK (action IN ('I','D','U', 'T')),
+  row_data hstore,
+  changed_fields hstore,
+  PRIMARY KEY (event_id, created_at)
+) PARTITION BY RANGE (created_at);
+
+ALTER SEQUENCE audit_logged_actions_event_id_seq
+  OWNED BY audit_logged_actions.event_id;
+
+CREATE TABLE audit_logged_actions_default
+  PARTITION OF audit_logged_actions DEFAULT;
+
+SELECT audit_create_partition(year::integer)
+FROM (
+  SELECT DISTINCT extract(year FROM created_at) AS year
+  FROM audit_logged_actions_old
+  UNION
+  SELECT extract(year FROM current_date)
+  UNION
+  SELECT extract(year FROM current_date) + 1
+) years;
+
+INSERT INTO audit_logged_actions SELECT * FROM audit_logged_actions_old;
+DROP TABLE audit_logged_actions_old;
+
+CREATE INDEX logged_actions_relid_idx ON audit_logged_actions(table_name);
+CREATE INDEX logged_actions_action_tstamp_tx_stm_idx
+  ON audit_logged_actions(created_at);
+CREATE INDEX logged_actions_action_idx ON audit_logged_actions(action);
+
+CREATE TRIGGER audit_logged_action_keys_trigger
+  AFTER INSERT OR DELETE ON audit_logged_actions
+  FOR EACH ROW EXECUTE PROCEDURE audit_logged_action_keys_trigger();
+
+CREATE TABLE audit_logged_actions_archive (LIKE audit_logged_actions)
+  PARTITION BY RANGE (created_at);
+
+CREATE VIEW audit_logged_actions_all AS
+SELECT * FROM audit_logged_actions
+UNION ALL
+SELECT * FROM audit_logged_actions_archive;
+"""
+
+DROP_PARTITION = """\
+DROP VIEW audit_logged_actions_all;
+
+ALTER TABLE audit_logged_actions RENAME TO audit_logged_actions_partitioned;
+DROP TRIGGER audit_logged_action_keys_trigger
+  ON audit_logged_actions_partitioned;
+ALTER SEQUENCE audit_logged_actions_event_id_seq OWNED BY NONE;
+ALTER INDEX logged_actions_relid_idx RENAME TO logged_actions_relid_idx_old;
+ALTER INDEX logged_actions_action_tstamp_tx_stm_idx
+  RENAME TO logged_actions_action_tstamp_tx_stm_idx_old;
+ALTER INDEX logged_actions_action_idx RENAME TO logged_actions_action_idx_old;
+
+CREATE TABLE audit_logged_actions (
+  event_id bigint PRIMARY KEY
+    DEFAULT nextval('audit_logged_actions_event_id_seq'),
+  table_name text NOT NULL,
+  user_name text,
+  created_at timestamp with time zone NOT NULL,
+  action text NOT NULL CHECK (action IN ('I','D','U', 'T')),
+  row_data hstore,
+  changed_fields hstore
+);
+ALTER SEQUENCE audit_logged_actions_event_id_seq
+  OWNED BY audit_logged_actions.event_id;
+
+INSERT INTO audit_logged_actions
+SELECT * FROM audit_logged_actions_partitioned
+UNION ALL
+SELECT * FROM audit_logged_actions_archive;
+
+DROP TABLE audit_logged_actions_partitioned;
+DROP TABLE audit_logged_actions_archive;
+
+CREATE INDEX logged_actions_relid_idx ON audit_logged_actions(table_name);
+CREATE INDEX logged_actions_action_tstamp_tx_stm_idx
+  ON audit_logged_actions(created_at);
+CREATE INDEX logged_actions_action_idx ON audit_logged_actions(action);
+
+CREATE TRIGGER audit_logged_action_keys_trigger
+  AFTER INSERT OR DELETE ON audit_logged_actions
+  FOR EACH ROW EXECUTE PROCEDURE audit_logged_action_keys_trigger();
+
+DROP FUNCTION audit_archive_partition(integer);
+DROP FUNCTION audit_create_partition(integer);
+"""
+
+PARTITIONS_SQL = """\
+SELECT parent.relname, child.relname
+FROM pg_inherits
+INNER JOIN pg_class parent ON pg_inherits.inhparent=parent.oid
+INNER JOIN pg_class child ON pg_inherits.inhrelid=child.oid
+WHERE parent.relname IN ('audit_logged_actions', 'audit_logged_actions_archive')
+  AND child.relname ~ '^audit_logged_actions_[0-9]{4}$'
+ORDER BY child.relname
+"""
+
+
+def partitions():
+    """
+    Returns a list of ``(year, is_archived)`` tuples of all yearly partitions
+    """
+    return [
+        (int(partition.rsplit("_", 1)[1]), parent == "audit_logged_actions_archive")
+        for parent, partition in query(PARTITIONS_SQL, [])
+    ]
+
+
+def create_partitions(years=None):
+    """
+    Creates the partitions for ``years``, defaults to this year and the next
+    """
+    if years is None:
+        today = dt.date.today()
+        years = [today.year, today.year + 1]
+    for year in years:
+        query("SELECT audit_create_partition(%s)", [year])
+
+
+def archive(year):
+    """
+    Moves the partition of ``year`` to the archive
+    """
+    query("SELECT audit_archive_partition(%s)", [year])
+
+
+EXPORT_COLUMNS = [
+    "event_id",
+    "table_name",
+    "user_name",
+    "created_at",
+    "action",
+    "row_data",
+    "changed_fields",
+]
+
+
+def _json(value):
+    if isinstance(value, (dt.date, dt.datetime)):
+        return value.isoformat()
+    raise TypeError("Cannot serialize %r" % (value,))
+
+
+def export(year, path):
+    """
+    Writes all actions of ``year`` to a gzipped JSON lines file and drops
+    the partition afterwards
+
+    The partition may either be live or archived already.
+    """
+    partition = "audit_logged_actions_%s" % year
+    with transaction.atomic(), gzip.open(path, "wt", encoding="utf-8") as f:
+        with connections["default"].chunked_cursor() as cursor:
+            cursor.execute(
+                "SELECT %s FROM %s ORDER BY event_id"
+                % (", ".join(EXPORT_COLUMNS), partition)
+            )
+            for row in cursor:
+                f.write(json.dumps(dict(zip(EXPORT_COLUMNS, row)), default=_json))
+                f.write("\n")
+
+        with connections["default"].cursor() as cursor:
+            cursor.execute(
+                "DELETE FROM audit_logged_action_keys"
+                " WHERE event_id IN (SELECT event_id FROM %s)" % partition
+            )
+            cursor.execute("DROP TABLE %s" % partition)
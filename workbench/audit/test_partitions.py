@@ -0,0 +1,74 @@
+import gzip
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from workbench import factories
+from workbench.audit import partitions
+from workbench.audit.models import LoggedAction
+from workbench.contacts.models import Organization
+
+
+class PartitionsTest(TestCase):
+    def test_archive(self):
+        """Cold partitions of the audit log can be archived and exported"""
+        organization = factories.OrganizationFactory.create()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO audit_logged_actions"
+                " (table_name, user_name, created_at, action, row_data)"
+                " VALUES ('contacts_organization', '', '2015-06-01', 'I', %s)",
+                [{"id": str(organization.pk), "name": "Old"}],
+            )
+
+        old = LoggedAction.objects.for_row(Organization, organization.pk).last()
+        self.assertEqual(old.row_data["name"], "Old")
+        self.assertNotIn((2015, False), partitions.partitions())
+        partitions.create_partitions([2015])
+        self.assertIn((2015, False), partitions.partitions())
+
+        out = io.StringIO()
+        call_command("archive_audit_log", "2016", stdout=out)
+        self.assertEqual(out.getvalue(), "Archived 2015\n")
+        self.assertIn((2015, True), partitions.partitions())
+
+        actions = LoggedAction.objects.for_row(Organization, organization.pk)
+        self.assertEqual(len(actions), 1)
+        actions = LoggedAction.objects.with_archive().for_row(
+            Organization, organization.pk
+        )
+        self.assertEqual(len(actions), 2)
+        self.assertEqual(actions[1].pk, old.pk)
+        with self.assertRaises(TypeError):
+            LoggedAction.objects.filter(action="I").with_archive()
+
+        self.client.force_login(organization.primary_contact)
+        response = self.client.get(
+            "/history/contacts_organization/id/{}/".format(organization.pk)
+        )
+        self.assertContains(response, "Initial value of 'Name' was 'Old'.")
+
+        with tempfile.TemporaryDirectory() as directory:
+            call_command("archive_audit_log", "2016", export=directory, stdout=out)
+            with gzip.open(
+                os.path.join(directory, "audit_logged_actions_2015.jsonl.gz"), "rt"
+            ) as f:
+                rows = [json.loads(line) for line in f]
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["event_id"], old.pk)
+        self.assertEqual(rows[0]["row_data"]["name"], "Old")
+        self.assertNotIn(2015, [year for year, _ in partitions.partitions()])
+        self.assertEqual(
+            len(
+                LoggedAction.objects.with_archive().for_row(
+                    Organization, organization.pk
+                )
+            ),
+            1,
+        )
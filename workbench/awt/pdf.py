@@ -12,7 +12,7 @@ from workbench.tools.pdf import PDFDocument, mm
 from workbench.tools.xlsx import WorkbenchXLSXDocument
 
 
-def annual_working_time_pdf(statistics):
+def annual_working_time_pdf(statistics, *, progress=None):
     if len(statistics["statistics"]) == 1:
         response = HttpResponse(
             user_stats_pdf(statistics["statistics"][0]), content_type="application/pdf"
@@ -22,7 +22,9 @@ def annual_working_time_pdf(statistics):
 
     with io.BytesIO() as buf:
         with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as zf:
-            for data in statistics["statistics"]:
+            for index, data in enumerate(statistics["statistics"]):
+                if progress:
+                    progress(index, len(statistics["statistics"]))
                 zf.writestr(
                     "%s-%s.pdf"
                     % (
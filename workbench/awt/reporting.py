@@ -2,22 +2,26 @@ import datetime as dt
 from collections import defaultdict
 from decimal import ROUND_UP, Decimal
 
-from django.db.models import Sum
-from django.db.models.functions import ExtractMonth
 from django.utils.datastructures import OrderedSet
 
 from workbench.accounts.models import User
 from workbench.awt.models import Absence, Employment, Year
 from workbench.awt.utils import days_per_month, monthly_days
-from workbench.logbook.models import LoggedHours
+from workbench.logbook import rollup
 from workbench.tools.formats import Z1, Z2
+from workbench.tools.reporting import query
 
 
 class Months(dict):
-    def __init__(self, *, year, users):
+    def __init__(self, *, year, users, years=None):
         self.year = year
         self.year_by_wtm = {
-            year.working_time_model_id: year for year in Year.objects.filter(year=year)
+            year.working_time_model_id: year
+            for year in (
+                Year.objects.filter(year=year)
+                if years is None
+                else [row for row in years if row.year == year]
+            )
         }
         self.users = users
         self.users_to_wtm = {user.id: user.working_time_model_id for user in users}
@@ -81,8 +85,92 @@ def full_time_equivalents_by_month():
     return months
 
 
+EMPLOYMENT_MONTHS_SQL = """\
+SELECT
+  e.id,
+  month::date,
+  LEAST(e.date_until, (month + interval '1 month')::date - 1)
+    - GREATEST(e.date_from, month::date) + 1
+FROM awt_employment e
+CROSS JOIN LATERAL generate_series(
+  date_trunc('month', GREATEST(e.date_from, %s)),
+  date_trunc('month', LEAST(e.date_until, %s)),
+  '1 month'
+) AS month
+WHERE e.user_id=ANY(%s) AND e.date_from<=%s AND e.date_until>=%s
+ORDER BY e.id, month
+"""
+
+
 def annual_working_time(year, *, users):
-    absences = defaultdict(
+    return annual_working_time_by_year([year], users=users)[year]
+
+
+def annual_working_time_by_year(years, *, users):
+    """
+    Returns the annual working time statistics for all ``years``
+
+    The return value maps each year to the same structure as returned by
+    ``annual_working_time``. Employments, logged hours and absences of all
+    years are fetched at once, and the days of each employment per month are
+    computed by the database.
+    """
+    years = sorted(set(years))
+    if not years:
+        return {}
+    users = list(users)
+    date_range = [dt.date(years[0], 1, 1), dt.date(years[-1], 12, 31)]
+
+    all_years = list(Year.objects.filter(year__in=years))
+    months_by_year = {
+        year: Months(year=year, users=users, years=all_years) for year in years
+    }
+    user_ids = list(
+        {
+            user.id
+            for months in months_by_year.values()
+            for user in months.users_with_wtm
+        }
+    )
+
+    employments = list(
+        Employment.objects.filter(user__in=user_ids).order_by("-date_from")
+    )
+    employment_months = defaultdict(lambda: defaultdict(list))
+    for employment_id, month, days in query(
+        EMPLOYMENT_MONTHS_SQL,
+        [date_range[0], date_range[1], user_ids, date_range[1], date_range[0]],
+    ):
+        employment_months[month.year][employment_id].append((month, days))
+
+    hours = defaultdict(list)
+    for row in (
+        rollup.hours(["rendered_by", "month"], date_range=date_range, users=user_ids)
+        if user_ids
+        else []
+    ):
+        hours[row["month"].year].append(row)
+
+    absences = defaultdict(list)
+    for absence in Absence.objects.filter(
+        user__in=user_ids, starts_on__range=date_range, is_working_time=True
+    ).order_by("starts_on"):
+        absences[absence.starts_on.year].append(absence)
+
+    return {
+        year: _annual_working_time(
+            months_by_year[year],
+            employments=employments,
+            employment_months=employment_months[year],
+            hours=hours[year],
+            absences=absences[year],
+        )
+        for year in years
+    }
+
+
+def _annual_working_time(months, *, employments, employment_months, hours, absences):
+    absences_by_user = defaultdict(
         lambda: {
             "absence_vacation": [],
             "absence_sickness": [],
@@ -90,24 +178,21 @@ def annual_working_time(year, *, users):
             "absence_correction": [],
         }
     )
-    months = Months(year=year, users=users)
+    user_ids = {user.id for user in months.users_with_wtm}
     vacation_days_credit = defaultdict(lambda: Z1)
-    dpm = days_per_month(year)
+    dpm = days_per_month(months.year)
 
-    for employment in Employment.objects.filter(
-        user__in=months.users_with_wtm
-    ).order_by("-date_from"):
+    for employment in employments:
+        if employment.user_id not in user_ids:
+            continue
         percentage_factor = Decimal(employment.percentage) / 100
         available_vacation_days_per_month = (
             Decimal(employment.vacation_weeks) * 5 / 12 * percentage_factor
         )
+
         month_data = months[employment.user_id]
 
-        for month, days in monthly_days(employment.date_from, employment.date_until):
-            if month.year < year:
-                continue
-            elif month.year > year:
-                break
+        for month, days in employment_months[employment.id]:
             partial_month_factor = Decimal(days) / dpm[month.month - 1]
             month_data["target"][month.month - 1] += (
                 month_data["year"].months[month.month - 1]
@@ -123,16 +208,10 @@ def annual_working_time(year, *, users):
             )
             month_data["employments"].add(employment)
 
-    for row in (
-        LoggedHours.objects.order_by()
-        .filter(rendered_by__in=months.users_with_wtm, rendered_on__year=year)
-        .values("rendered_by")
-        .annotate(month=ExtractMonth("rendered_on"))
-        .values("rendered_by", "month")
-        .annotate(Sum("hours"))
-    ):
-        month_data = months[row["rendered_by"]]
-        month_data["hours"][row["month"] - 1] += row["hours__sum"]
+    for row in hours:
+        if row["rendered_by"] in user_ids:
+            month_data = months[row["rendered_by"]]
+            month_data["hours"][row["month"].month - 1] += row["hours"]
 
     remaining = defaultdict(
         lambda: Z1,
@@ -141,13 +220,13 @@ def annual_working_time(year, *, users):
             for user, month_data in months.items()
         },
     )
-    for absence in Absence.objects.filter(
-        user__in=months.users_with_wtm, starts_on__year=year, is_working_time=True
-    ).order_by("starts_on"):
+    for absence in absences:
+        if absence.user_id not in user_ids:
+            continue
         month_data = months[absence.user_id]
         key = "absence_%s" % absence.reason
         month_data[key][absence.starts_on.month - 1] += absence.days
-        absences[absence.user_id][key].append(absence)
+        absences_by_user[absence.user_id][key].append(absence)
 
         if absence.is_vacation:
             if absence.days > remaining[absence.user_id]:
@@ -203,7 +282,7 @@ def annual_working_time(year, *, users):
             {
                 "user": user,
                 "months": month_data,
-                "absences": absences[user.id],
+                "absences": absences_by_user[user.id],
                 "employments": month_data["employments"],
                 "working_time": wt,
                 "absences_time": at,
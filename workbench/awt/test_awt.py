@@ -9,7 +9,11 @@ from django.utils.translation import deactivate_all
 from workbench import factories
 from workbench.accounts.features import FEATURES
 from workbench.awt.models import Absence, Employment
-from workbench.awt.reporting import active_users, annual_working_time
+from workbench.awt.reporting import (
+    active_users,
+    annual_working_time,
+    annual_working_time_by_year,
+)
 from workbench.awt.utils import monthly_days
 from workbench.tools.forms import WarningsForm
 from workbench.tools.testing import check_code, messages
@@ -131,6 +135,14 @@ class AWTTest(TestCase):
         # 306 * 8 - 1000 - 21.25 * 8 - 10 * 8 = 1198
         self.assertAlmostEqual(awt["totals"]["running_sum"], Decimal("-1198"))
 
+        by_year = annual_working_time_by_year([2019, 2017, 2018], users=[user])
+        self.assertEqual(list(by_year), [2017, 2018, 2019])
+        self.assertEqual(by_year[2018]["statistics"][0]["totals"], awt["totals"])
+        self.assertEqual(by_year[2017]["statistics"], [])
+        self.assertEqual(by_year[2019]["months"].users_without_wtm, [user])
+        with self.assertNumQueries(0):
+            self.assertEqual(annual_working_time_by_year([], users=[user]), {})
+
         # Now, test that the PDF does not crash
         self.client.force_login(user)
 
@@ -8,6 +8,7 @@ from django.db.models.functions import Coalesce
 from django.shortcuts import redirect, render
 from django.utils.translation import gettext as _
 
+from workbench import jobs
 from workbench.accounts.features import FEATURES
 from workbench.accounts.models import Team, User
 from workbench.awt.models import Absence, Year
@@ -17,13 +18,7 @@ from workbench.tools.forms import Form
 from workbench.tools.validation import filter_form, monday
 
 
-def annual_working_time_view(request):
-    this_year = dt.date.today().year
-    try:
-        year = int(request.GET.get("year", this_year))
-    except Exception:
-        return redirect(".")
-
+def _users(request, year):
     user = request.GET.get("user")
     users = None
     if user == "active" and request.user.features[FEATURES.CONTROLLING]:
@@ -32,6 +27,17 @@ def annual_working_time_view(request):
         users = User.objects.filter(id=user)
     if not users:
         users = [request.user]
+    return users
+
+
+def annual_working_time_view(request):
+    this_year = dt.date.today().year
+    try:
+        year = int(request.GET.get("year", this_year))
+    except Exception:
+        return redirect(".")
+
+    users = _users(request, year)
     statistics = annual_working_time(year, users=users)
     for user in statistics["months"].users_without_wtm:
         messages.warning(
@@ -68,6 +74,17 @@ def annual_working_time_view(request):
     )
 
 
+def _annual_working_time_parameters(request):
+    year = int(request.GET.get("year", dt.date.today().year))
+    return {"year": year, "users": [user.id for user in _users(request, year)]}
+
+
+@jobs.register("annual_working_time_pdf", prepare=_annual_working_time_parameters)
+def annual_working_time_job(job, *, year, users):
+    statistics = annual_working_time(year, users=User.objects.filter(id__in=users))
+    return annual_working_time_pdf(statistics, progress=job.set_progress)
+
+
 class UserFilterForm(Form):
     team = forms.ModelChoiceField(
         Team.objects.all(), empty_label=_("Everyone"), label="", required=False
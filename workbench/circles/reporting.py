@@ -1,21 +1,18 @@
 from collections import defaultdict
 from decimal import Decimal
 
-from django.db.models import Sum
 from django.utils.translation import gettext as _
 
 from workbench.accounts.models import User
 from workbench.circles.models import Circle, Role
-from workbench.logbook.models import LoggedHours
+from workbench.logbook import rollup
 from workbench.tools.formats import Z1
 
 
 def hours_by_circle(date_range, *, users=None):
-    queryset = LoggedHours.objects.order_by().filter(rendered_on__range=date_range)
-    if users:
-        queryset = queryset.filter(rendered_by__in=users)
-
-    queryset = queryset.values("service__role", "rendered_by").annotate(Sum("hours"))
+    rows = rollup.hours(
+        ["service__role", "rendered_by"], date_range=date_range, users=users
+    )
     seen_users = set()
 
     hours_by_role = defaultdict(lambda: defaultdict(Decimal))
@@ -23,11 +20,11 @@ def hours_by_circle(date_range, *, users=None):
 
     roles_to_circle = {role.id: role.circle_id for role in Role.objects.all()}
 
-    for row in queryset:
-        hours_by_role[row["service__role"]][row["rendered_by"]] = row["hours__sum"]
+    for row in rows:
+        hours_by_role[row["service__role"]][row["rendered_by"]] = row["hours"]
         hours_by_circle[roles_to_circle.get(row["service__role"])][
             row["rendered_by"]
-        ] += row["hours__sum"]
+        ] += row["hours"]
         seen_users.add(row["rendered_by"])
 
     users = list(User.objects.filter(id__in=seen_users))
@@ -69,23 +66,21 @@ def hours_by_circle(date_range, *, users=None):
 
 
 def hours_per_work_category(date_range, *, users=None):
-    queryset = LoggedHours.objects.order_by().filter(rendered_on__range=date_range)
-    if users:
-        queryset = queryset.filter(rendered_by__in=users)
-
-    queryset = queryset.values("service__role__work_category", "rendered_by").annotate(
-        Sum("hours")
+    rows = rollup.hours(
+        ["service__role__work_category", "rendered_by"],
+        date_range=date_range,
+        users=users,
     )
     seen_users = set()
 
     by_user_and_category = defaultdict(lambda: defaultdict(Decimal))
     by_category = defaultdict(Decimal)
 
-    for row in queryset:
+    for row in rows:
         by_user_and_category[row["rendered_by"]][
             row["service__role__work_category"] or None
-        ] = row["hours__sum"]
-        by_category[row["service__role__work_category"] or None] += row["hours__sum"]
+        ] = row["hours"]
+        by_category[row["service__role__work_category"] or None] += row["hours"]
         seen_users.add(row["rendered_by"])
 
     users = [
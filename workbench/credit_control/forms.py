@@ -1,10 +1,10 @@
-import re
-
 from django import forms
 from django.utils.html import format_html, mark_safe
 from django.utils.translation import gettext, gettext_lazy as _
 
-from workbench.credit_control.models import CreditEntry, Ledger
+from workbench.credit_control.matching import CODE, Matcher, suggestions
+from workbench.credit_control.models import IMPORT_BATCH_SIZE, CreditEntry, Ledger
+from workbench.credit_control.parsers import batches
 from workbench.invoices.models import Invoice
 from workbench.tools.formats import currency, local_date_format
 from workbench.tools.forms import Autocomplete, Form, ModelForm, Textarea
@@ -86,8 +86,23 @@ class AccountStatementUploadForm(Form):
     def clean(self):
         data = super().clean()
         if data.get("statement") and data.get("ledger"):
+            # Parse the statement once to validate it; save() parses it again
+            is_empty = True
+            is_known = False
             try:
-                self.statement_list = data["ledger"].parse_fn(data["statement"].read())
+                for batch in batches(
+                    data["ledger"].parse_fn(data["statement"]), IMPORT_BATCH_SIZE
+                ):
+                    is_empty = False
+                    is_known = (
+                        is_known
+                        or CreditEntry.objects.filter(
+                            ledger=data["ledger"],
+                            reference_number__in=[
+                                entry["reference_number"] for entry in batch
+                            ],
+                        ).exists()
+                    )
             except Exception as exc:
                 raise forms.ValidationError(
                     _(
@@ -97,16 +112,7 @@ class AccountStatementUploadForm(Form):
                     % exc
                 )
 
-            reference_numbers = [
-                entry["reference_number"] for entry in self.statement_list
-            ]
-
-            if (
-                reference_numbers
-                and not CreditEntry.objects.filter(
-                    ledger=data["ledger"], reference_number__in=reference_numbers
-                ).exists()
-            ):
+            if not is_empty and not is_known:
                 self.add_warning(
                     _(
                         "The uploaded list only contains new payments."
@@ -119,18 +125,17 @@ class AccountStatementUploadForm(Form):
         return data
 
     def save(self):
-        created_entries = []
+        """
+        Imports the statement and returns a report containing the number of
+        imported, duplicate and skipped rows
+        """
         ledger = self.cleaned_data["ledger"]
-
-        for data in reversed(self.statement_list):  # From past to present
-            reference_number = data.pop("reference_number")
-
-            c, created = ledger.transactions.get_or_create(
-                reference_number=reference_number, defaults=data
-            )
-            if created:
-                created_entries.append(c)
-        return created_entries
+        statement = self.cleaned_data["statement"]
+        statement.seek(0)
+        report = {"imported": 0, "duplicate": 0, "skipped": 0}
+        return ledger.import_entries(
+            ledger.parse_fn(statement, report=report), report=report
+        )
 
 
 class AssignCreditEntriesForm(forms.Form):
@@ -139,10 +144,13 @@ class AssignCreditEntriesForm(forms.Form):
 
         super().__init__(*args, **kwargs)
 
+        matches = Matcher().match(
+            CreditEntry.objects.reverse().filter(invoice__isnull=True, notes="")[:200]
+        )
+        suggested = suggestions(matches)
+
         self.entries = []
-        for entry in CreditEntry.objects.reverse().filter(
-            invoice__isnull=True, notes=""
-        )[:20]:
+        for entry, candidates in matches.items():
             self.fields["entry_{}_invoice".format(entry.pk)] = forms.TypedChoiceField(
                 label=format_html(
                     '<a href="{}" target="_blank"'
@@ -164,10 +172,7 @@ class AssignCreditEntriesForm(forms.Form):
                                     ),
                                     format_html(
                                         "<strong>{}</strong>"
-                                        if re.search(
-                                            r"\b" + invoice.code + r"\b",
-                                            entry.payment_notice,
-                                        )
+                                        if confidence >= CODE
                                         else "{}",
                                         invoice,
                                     ),
@@ -196,20 +201,22 @@ class AssignCreditEntriesForm(forms.Form):
                                     )
                                     if invoice.third_party_costs
                                     else "",
+                                    format_html(
+                                        "<br><small>{}: {}%</small>",
+                                        _("confidence"),
+                                        round(100 * confidence),
+                                    ),
                                     "</span>",
                                 )
                             )
                         ),
                     )
-                    for invoice in Invoice.objects.open()
-                    .filter(total=entry.total)
-                    .select_related(
-                        "contact__organization", "customer", "owned_by", "project"
-                    )[:100]
+                    for invoice, confidence in candidates
                 ],
                 coerce=int,
                 required=False,
                 widget=forms.RadioSelect,
+                initial=suggested[entry][0].id if entry in suggested else None,
             )
 
             self.fields["entry_{}_notes".format(entry.pk)] = forms.CharField(
@@ -0,0 +1,123 @@
+"""
+Matching of credit entries to open invoices
+
+All open invoices are loaded once and indexed by their total and by their
+code. Invoice codes are looked up by splitting payment notices into words
+and hyphenated groups of words; a code is only found if it isn't part of a
+longer word, the same as ``\\b<code>\\b``.
+"""
+
+import re
+from collections import defaultdict
+
+from workbench.invoices.models import Invoice
+
+
+#: Confidence if the total and the invoice code match
+TOTAL_AND_CODE = 1.0
+
+#: Confidence if only the invoice code matches (e.g. partial payments)
+CODE = 0.6
+
+#: Confidence if only the total matches, divided by the number of invoices
+#: with this total
+TOTAL = 0.5
+
+#: Minimum confidence of automatic assignment suggestions
+AUTO_ASSIGN = 0.9
+
+#: Maximum number of candidates per credit entry
+CANDIDATES = 100
+
+_WORDS_RE = re.compile(r"\w+(?:-\w+)*")
+
+
+def _code_candidates(text, *, parts):
+    for match in _WORDS_RE.finditer(text):
+        words = match.group().split("-")
+        for i in range(len(words)):
+            for j in range(i + 1, min(i + parts, len(words)) + 1):
+                yield "-".join(words[i:j])
+
+
+class Matcher:
+    """
+    Index of open invoices
+    """
+
+    def __init__(self, invoices=None):
+        if invoices is None:
+            invoices = Invoice.objects.open().select_related(
+                "contact__organization", "customer", "owned_by", "project"
+            )
+        self.by_total = defaultdict(list)
+        self.by_code = {}
+        for invoice in invoices:
+            self.by_total[invoice.total].append(invoice)
+            self.by_code[invoice.code] = invoice
+        self.parts = max((code.count("-") + 1 for code in self.by_code), default=1)
+
+    def codes(self, payment_notice):
+        """
+        Returns the invoices whose code is mentioned in ``payment_notice``
+        """
+        invoices = {}
+        for code in _code_candidates(payment_notice, parts=self.parts):
+            if code in self.by_code:
+                invoices[code] = self.by_code[code]
+        return list(invoices.values())
+
+    def candidates(self, entry):
+        """
+        Returns a list of ``(invoice, confidence)`` tuples for ``entry``,
+        most likely invoice first
+        """
+        same_total = self.by_total.get(entry.total, [])
+        mentioned = self.codes(entry.payment_notice)
+        mentioned_ids = {invoice.id for invoice in mentioned}
+        same_total_ids = {invoice.id for invoice in same_total}
+        candidates = [
+            (
+                invoice,
+                TOTAL_AND_CODE
+                if invoice.id in mentioned_ids
+                else TOTAL / len(same_total),
+            )
+            for invoice in same_total
+        ] + [
+            (invoice, CODE) for invoice in mentioned if invoice.id not in same_total_ids
+        ]
+        candidates.sort(key=lambda row: -row[1])
+        return candidates[:CANDIDATES]
+
+    def match(self, entries):
+        """
+        Returns a dictionary mapping credit entries to their candidates
+        """
+        return {entry: self.candidates(entry) for entry in entries}
+
+
+def suggestions(matches):
+    """
+    Returns a dictionary mapping credit entries to an ``(invoice, confidence)``
+    tuple for all confident matches
+
+    Every invoice is suggested at most once, for the entry with the highest
+    confidence.
+    """
+    best = sorted(
+        (
+            (confidence, entry, invoice)
+            for entry, candidates in matches.items()
+            for invoice, confidence in candidates[:1]
+            if confidence >= AUTO_ASSIGN
+        ),
+        key=lambda row: -row[0],
+    )
+    suggested = {}
+    seen = set()
+    for confidence, entry, invoice in best:
+        if invoice.id not in seen:
+            seen.add(invoice.id)
+            suggested[entry] = (invoice, confidence)
+    return suggested
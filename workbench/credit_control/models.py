@@ -8,6 +8,10 @@ from workbench.tools.models import Model, MoneyField, SearchQuerySet
 from workbench.tools.urls import model_urls
 
 
+#: Number of credit entries inserted at once when importing statements
+IMPORT_BATCH_SIZE = 1000
+
+
 # @model_urls
 class Ledger(Model):
     PARSER_CHOICES = [
@@ -29,10 +33,42 @@ class Ledger(Model):
     @property
     def parse_fn(self):
         return {
-            "zkb-csv": parsers.parse_zkb_csv,
-            "postfinance-csv": parsers.parse_postfinance_csv,
+            "zkb-csv": parsers.iter_zkb_csv,
+            "postfinance-csv": parsers.iter_postfinance_csv,
         }[self.parser]
 
+    def import_entries(self, entries, *, report):
+        """
+        Creates credit entries for all new ``entries`` in batches
+
+        Entries with known reference numbers are counted as duplicates in
+        ``report``, all others as imported. Statements list the newest entry
+        first; entries are created from past to present across all batches.
+        """
+        entries = list(entries)
+        entries.reverse()
+        for batch in parsers.batches(entries, IMPORT_BATCH_SIZE):
+            unique = {}
+            for entry in batch:
+                unique.setdefault(entry["reference_number"], entry)
+            known = set(
+                CreditEntry.objects.filter(reference_number__in=unique)
+                .order_by()
+                .values_list("reference_number", flat=True)
+            )
+            new = [
+                CreditEntry(ledger=self, **entry)
+                for reference_number, entry in unique.items()
+                if reference_number not in known
+            ]
+            for entry in new:
+                entry._fts = entry._build_fts()
+            CreditEntry.objects.bulk_create(new, ignore_conflicts=True)
+
+            report["imported"] += len(new)
+            report["duplicate"] += len(batch) - len(new)
+        return report
+
 
 class CreditEntryQuerySet(SearchQuerySet):
     def pending(self):
@@ -78,7 +114,10 @@ class CreditEntry(Model):
         return self.reference_number
 
     def save(self, *args, **kwargs):
-        self._fts = " ".join(str(part) for part in [self.invoice or "", self.total])
+        self._fts = self._build_fts()
         super().save(*args, **kwargs)
 
     save.alters_data = True
+
+    def _build_fts(self):
+        return " ".join(str(part) for part in [self.invoice or "", self.total])
@@ -6,19 +6,39 @@ import re
 from decimal import Decimal
 
 from django.utils.dateparse import parse_date
-from django.utils.encoding import force_str
 from django.utils.text import slugify
 
 
-def parse_zkb_csv(data):
-    f = io.StringIO()
-    f.write(force_str(data, encoding="utf-8", errors="ignore"))
-    f.seek(0)
-    dialect = csv.Sniffer().sniff(f.read(4096))
-    f.seek(0)
-    reader = csv.reader(f, dialect)
+def _rows(data, *, encoding):
+    """
+    Yields the rows of the CSV file ``data``, either bytes or a binary file
+    """
+    f = io.BytesIO(data) if isinstance(data, bytes) else data
+    # Only split lines at "\n" so that the reader rejects binary junk
+    text = io.TextIOWrapper(f, encoding=encoding, errors="ignore", newline="\n")
+    try:
+        dialect = csv.Sniffer().sniff(text.read(4096))
+        text.seek(0)
+        yield from csv.reader(text, dialect)
+    finally:
+        # Closing the wrapper would close the file too
+        text.detach()
+
+
+def _skip(report):
+    if report is not None:
+        report["skipped"] += 1
+
+
+def iter_zkb_csv(data, *, report=None):
+    """
+    Yields the credit entries of a ZKB account statement lazily
+
+    ``report["skipped"]`` is incremented for every row which is not a credit
+    entry if a ``report`` is given.
+    """
+    reader = _rows(data, encoding="utf-8")
     next(reader)  # Skip first line
-    entries = []
     while True:
         try:
             row = next(reader)
@@ -31,20 +51,24 @@ def parse_zkb_csv(data):
             amount = row[7] and Decimal(row[7])
             reference = row[4]
         except (AttributeError, IndexError, ValueError):
+            _skip(report)
             continue
         if day and amount:
             details = next(reader)
-            entries.append(
-                {
-                    "reference_number": reference,
-                    "value_date": day,
-                    "total": amount,
-                    "payment_notice": "; ".join(
-                        filter(None, (details[1], details[10], row[4]))
-                    ),
-                }
-            )
-    return entries
+            yield {
+                "reference_number": reference,
+                "value_date": day,
+                "total": amount,
+                "payment_notice": "; ".join(
+                    filter(None, (details[1], details[10], row[4]))
+                ),
+            }
+        else:
+            _skip(report)
+
+
+def parse_zkb_csv(data):
+    return list(iter_zkb_csv(data))
 
 
 def postfinance_preprocess_notice(payment_notice):
@@ -68,32 +92,51 @@ def postfinance_reference_number(payment_notice, day):
     )
 
 
-def parse_postfinance_csv(data):
-    f = io.StringIO()
-    f.write(force_str(data, encoding="latin-1", errors="ignore"))
-    f.seek(0)
-    dialect = csv.Sniffer().sniff(f.read(4096))
-    f.seek(0)
-    reader = csv.reader(f, dialect)
+def iter_postfinance_csv(data, *, report=None):
+    """
+    Yields the credit entries of a PostFinance account statement lazily
+
+    ``report["skipped"]`` is incremented for every row which is not a credit
+    entry if a ``report`` is given.
+    """
+    reader = _rows(data, encoding="latin-1")
     next(reader)  # Skip first line
-    entries = []
     for row in reader:
         if not row:
             continue
         try:
             day = parse_date(row[4])
         except (IndexError, ValueError):
+            _skip(report)
             continue
         if day is None or not row[2]:  # Only credit
+            _skip(report)
             continue
 
         payment_notice = postfinance_preprocess_notice(row[1])
-        entries.append(
-            {
-                "reference_number": postfinance_reference_number(payment_notice, day),
-                "value_date": day,
-                "total": Decimal(row[2]),
-                "payment_notice": payment_notice,
-            }
-        )
-    return entries
+        yield {
+            "reference_number": postfinance_reference_number(payment_notice, day),
+            "value_date": day,
+            "total": Decimal(row[2]),
+            "payment_notice": payment_notice,
+        }
+
+
+def parse_postfinance_csv(data):
+    return list(iter_postfinance_csv(data))
+
+
+def batches(entries, size):
+    """
+    Yields lists of at least ``size`` entries (except for the last list)
+
+    Entries with the same value date always end up in the same list.
+    """
+    batch = []
+    for entry in entries:
+        if len(batch) >= size and entry["value_date"] != batch[-1]["value_date"]:
+            yield batch
+            batch = []
+        batch.append(entry)
+    if batch:
+        yield batch
@@ -2,13 +2,17 @@ import datetime as dt
 import io
 import os
 from decimal import Decimal
+from unittest import mock
 
 from django.conf import settings
 from django.test import TestCase
 
 from workbench import factories
+from workbench.credit_control.matching import Matcher, suggestions
 from workbench.credit_control.models import CreditEntry
 from workbench.credit_control.parsers import (
+    batches,
+    iter_postfinance_csv,
     parse_postfinance_csv,
     postfinance_preprocess_notice,
     postfinance_reference_number,
@@ -60,6 +64,38 @@ class CreditEntriesTest(TestCase):
             ],
         )
 
+    def test_matching(self):
+        """Credit entries are matched by total and by invoice code"""
+        invoices = [
+            factories.InvoiceFactory.create(subtotal=100, liable_to_vat=False)
+            for i in range(2)
+        ]
+        other = factories.InvoiceFactory.create(subtotal=50, liable_to_vat=False)
+        entry_0 = factories.CreditEntryFactory.create(
+            total=100,
+            payment_notice="Invoices {}, {}".format(invoices[0].code, other.code),
+        )
+        entry_1 = factories.CreditEntryFactory.create(
+            total=100, payment_notice="{}/x{}".format(invoices[0].code, other.code)
+        )
+
+        matches = Matcher().match([entry_0, entry_1])
+        self.assertEqual(
+            matches[entry_0],
+            [(invoices[0], 1.0), (other, 0.6), (invoices[1], 0.25)],
+        )
+        self.assertEqual(matches[entry_1], [(invoices[0], 1.0), (invoices[1], 0.25)])
+        self.assertEqual(suggestions(matches), {entry_0: (invoices[0], 1.0)})
+
+        self.client.force_login(factories.UserFactory.create())
+        response = self.client.get("/credit-control/assign/")
+        self.assertContains(response, "confidence: 100%", 2)
+        form = response.context["form"]
+        self.assertEqual(
+            form.fields["entry_{}_invoice".format(entry_0.pk)].initial, invoices[0].pk
+        )
+        self.assertIsNone(form.fields["entry_{}_invoice".format(entry_1.pk)].initial)
+
     def test_account_statement_upload(self):
         """Uploading account statements with and without duplicates"""
         self.client.force_login(factories.UserFactory.create())
@@ -86,12 +122,29 @@ class CreditEntriesTest(TestCase):
 
         # print(response, response.content.decode("utf-8"))
         self.assertRedirects(response, "/credit-control/")
-        self.assertEqual(messages(response), ["Created 2 credit entries."])
+        self.assertEqual(
+            messages(response),
+            [
+                "Created 2 credit entries.",
+                "Ignored 0 known entries and skipped 9 rows.",
+            ],
+        )
+        # From past to present
+        self.assertEqual(
+            list(CreditEntry.objects.order_by("pk").values_list("value_date")),
+            sorted(CreditEntry.objects.values_list("value_date")),
+        )
 
         response = send()
 
         self.assertRedirects(response, "/credit-control/")
-        self.assertEqual(messages(response), ["Created 0 credit entries."])
+        self.assertEqual(
+            messages(response),
+            [
+                "Created 0 credit entries.",
+                "Ignored 2 known entries and skipped 9 rows.",
+            ],
+        )
 
         invoice = factories.InvoiceFactory.create(
             subtotal=Decimal("4000"), _code="00001"
@@ -198,6 +251,43 @@ class CreditEntriesTest(TestCase):
         )
         self.assertIn("2019-0214-0001", entries[2]["payment_notice"])
 
+    def test_import_entries(self):
+        """Statements are streamed and imported in batches"""
+        ledger = factories.LedgerFactory.create()
+        report = {"imported": 0, "duplicate": 0, "skipped": 0}
+        with io.open(
+            os.path.join(
+                settings.BASE_DIR, "workbench", "test", "postfinance-export.csv"
+            ),
+            "rb",
+        ) as f:
+            entries = list(iter_postfinance_csv(f, report=report))
+        self.assertEqual(report["skipped"], 7)
+
+        self.assertEqual([len(batch) for batch in batches(entries * 2, 2)], [2, 2, 2])
+
+        with self.assertNumQueries(2):
+            ledger.import_entries(entries * 2, report=report)
+        self.assertEqual(report, {"imported": 3, "duplicate": 3, "skipped": 7})
+        with self.assertNumQueries(1):
+            ledger.import_entries(entries, report=report)
+        self.assertEqual(report, {"imported": 3, "duplicate": 6, "skipped": 7})
+        self.assertEqual(
+            list(CreditEntry.objects.order_by("pk").values_list("value_date")),
+            sorted(CreditEntry.objects.values_list("value_date")),
+        )
+
+        # Entries are created from past to present across batches too
+        CreditEntry.objects.all().delete()
+        with mock.patch("workbench.credit_control.models.IMPORT_BATCH_SIZE", 1):
+            with self.assertNumQueries(6):
+                ledger.import_entries(entries, report=report)
+        self.assertEqual(report["imported"], 6)
+        self.assertEqual(
+            list(CreditEntry.objects.order_by("pk").values_list("value_date")),
+            sorted(CreditEntry.objects.values_list("value_date")),
+        )
+
     def test_invalid_account_statement(self):
         """Completely invalid account statements do not crash the backend"""
         self.client.force_login(factories.UserFactory.create())
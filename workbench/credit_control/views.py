@@ -12,14 +12,22 @@ class AccountStatementUploadView(generic.CreateView):
         return super().get_context_data(**kwargs)
 
     def form_valid(self, form):
-        entries = form.save()
+        report = form.save()
         messages.success(
             self.request,
             ngettext(
-                "Created %s credit entry.", "Created %s credit entries.", len(entries)
+                "Created %s credit entry.",
+                "Created %s credit entries.",
+                report["imported"],
             )
-            % len(entries),
+            % report["imported"],
         )
+        if report["duplicate"] or report["skipped"]:
+            messages.info(
+                self.request,
+                _("Ignored %(duplicate)s known entries and skipped %(skipped)s rows.")
+                % report,
+            )
         return redirect("credit_control_creditentry_list")
 
 
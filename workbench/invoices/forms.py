@@ -13,6 +13,7 @@ from workbench.contacts.forms import PostalAddressSelectionForm
 from workbench.contacts.models import Organization, Person
 from workbench.invoices.models import Invoice, RecurringInvoice, Service
 from workbench.logbook.models import LoggedCost, LoggedHours
+from workbench.projects.models import Project
 from workbench.services.models import ServiceType
 from workbench.tools.formats import Z2, currency, hours, local_date_format
 from workbench.tools.forms import Autocomplete, Form, ModelForm, Textarea
@@ -51,6 +52,23 @@ class InvoiceSearchForm(Form):
         widget=forms.Select(attrs={"class": "custom-select"}),
         label="",
     )
+    project = forms.ModelChoiceField(
+        queryset=Project.objects.all(),
+        required=False,
+        widget=Autocomplete(model=Project),
+        label="",
+    )
+    month = forms.CharField(
+        required=False,
+        widget=forms.TextInput(
+            attrs={
+                "class": "form-control",
+                "type": "month",
+                "placeholder": _("Month (YYYY-MM)"),
+            }
+        ),
+        label="",
+    )
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -58,6 +76,15 @@ class InvoiceSearchForm(Form):
             collapse_inactive=True, myself=True
         )
 
+    def clean_month(self):
+        month = self.cleaned_data.get("month")
+        if not month:
+            return None
+        try:
+            return dt.datetime.strptime(month, "%Y-%m").date()
+        except ValueError:
+            raise forms.ValidationError(_("Enter a valid month (YYYY-MM)."))
+
     def filter(self, queryset):
         data = self.cleaned_data
         queryset = queryset.search(data.get("q"))
@@ -66,7 +93,13 @@ class InvoiceSearchForm(Form):
         elif data.get("s"):
             queryset = queryset.filter(status=data.get("s"))
         queryset = self.apply_renamed(queryset, "org", "customer")
+        queryset = self.apply_renamed(queryset, "project", "project")
         queryset = self.apply_owned_by(queryset)
+        if data.get("month"):
+            queryset = queryset.filter(
+                invoiced_on__year=data["month"].year,
+                invoiced_on__month=data["month"].month,
+            )
         return queryset.select_related(
             "customer", "contact__organization", "owned_by", "project__owned_by"
         )
@@ -2,8 +2,8 @@ import datetime as dt
 
 from django.conf import settings
 from django.contrib import messages
-from django.db import connections, models
-from django.db.models import F, Q, Sum
+from django.db import connections, models, transaction
+from django.db.models import F, Max, Q
 from django.db.models.expressions import RawSQL
 from django.db.models.functions import Coalesce
 from django.utils import timezone
@@ -18,10 +18,44 @@ from workbench.projects.models import Project
 from workbench.services.models import ServiceBase
 from workbench.tools.formats import Z1, Z2, local_date_format
 from workbench.tools.models import ModelWithTotal, MoneyField, SearchQuerySet
+from workbench.tools.reporting import query
 from workbench.tools.urls import model_urls
 from workbench.tools.validation import in_days, raise_if_errors
 
 
+LOGBOOK_TOTALS_SQL = """\
+SELECT
+  COALESCE(hours.service_id, costs.service_id),
+  hours.hours,
+  costs.cost,
+  costs.third_party_costs
+FROM (
+  SELECT service_id, SUM(hours) AS hours
+  FROM logbook_loggedhours
+  WHERE service_id = ANY(%s) AND archived_at IS NULL
+  GROUP BY service_id
+) hours
+FULL OUTER JOIN (
+  SELECT
+    service_id,
+    SUM(cost) AS cost,
+    SUM(third_party_costs) AS third_party_costs
+  FROM logbook_loggedcost
+  WHERE service_id = ANY(%s) AND archived_at IS NULL
+  GROUP BY service_id
+) costs ON hours.service_id=costs.service_id
+"""
+
+ARCHIVE_LOGBOOK_SQL = """\
+UPDATE %s log
+SET invoice_service_id=i_s.id, archived_at=%%s
+FROM invoices_service i_s
+WHERE i_s.id = ANY(%%s)
+  AND log.service_id=i_s.project_service_id
+  AND log.archived_at IS NULL
+"""
+
+
 class InvoiceQuerySet(SearchQuerySet):
     def open(self):
         return self.filter(status__in=(Invoice.IN_PREPARATION, Invoice.SENT))
@@ -174,15 +208,7 @@ class Invoice(ModelWithTotal):
             super().save(*args, **kwargs)
             self.refresh_from_db()
 
-        self._fts = " ".join(
-            str(part)
-            for part in [
-                self.code,
-                self.customer.name,
-                self.contact.full_name if self.contact else "",
-                self.project.title if self.project else "",
-            ]
-        )
+        self._fts = self._build_fts()
         if (
             self.invoiced_on
             and self.last_reminded_on
@@ -198,6 +224,17 @@ class Invoice(ModelWithTotal):
 
     save.alters_data = True
 
+    def _build_fts(self):
+        return " ".join(
+            str(part)
+            for part in [
+                self.code,
+                self.customer.name,
+                self.contact.full_name if self.contact else "",
+                self.project.title if self.project else "",
+            ]
+        )
+
     def delete(self, *args, **kwargs):
         assert (
             self.status <= self.IN_PREPARATION
@@ -307,7 +344,7 @@ class Invoice(ModelWithTotal):
     def payment_reminders_sent_at(self):
         from workbench.tools.history import changes  # Avoid a circular import
 
-        actions = LoggedAction.objects.for_model(self).with_data(id=self.id)
+        actions = LoggedAction.objects.for_row(self, self.id)
         return [
             day
             for day in [
@@ -352,45 +389,56 @@ class Invoice(ModelWithTotal):
     def create_services_from_logbook(self, project_services):
         assert self.project, "cannot call create_services_from_logbook without project"
 
+        project_services = list(project_services)
+        ids = [ps.id for ps in project_services]
+        totals = {row[0]: row[1:] for row in query(LOGBOOK_TOTALS_SQL, [ids, ids])}
+
+        services = []
+        max_position = None
         for ps in project_services:
-            not_archived_effort = ps.loggedhours.filter(
-                archived_at__isnull=True
-            ).order_by()
-            not_archived_costs = ps.loggedcosts.filter(
-                archived_at__isnull=True
-            ).order_by()
-
-            hours = not_archived_effort.aggregate(Sum("hours"))["hours__sum"] or Z1
-            cost = not_archived_costs.aggregate(Sum("cost"))["cost__sum"] or Z2
-
-            if hours or cost:
-                service = Service(
-                    invoice=self,
-                    project_service=ps,
-                    title=ps.title,
-                    description=ps.description,
-                    position=ps.position,
-                    effort_rate=ps.effort_rate,
-                    effort_type=ps.effort_type,
-                    effort_hours=hours,
-                    cost=cost,
-                    third_party_costs=not_archived_costs.filter(
-                        third_party_costs__isnull=False
-                    ).aggregate(Sum("third_party_costs"))["third_party_costs__sum"],
-                )
-                service.save(skip_related_model=True)
-                not_archived_effort.update(
-                    invoice_service=service, archived_at=timezone.now()
-                )
-                not_archived_costs.update(
-                    invoice_service=service, archived_at=timezone.now()
-                )
+            hours, cost, third_party_costs = totals.get(ps.id, (None, None, None))
+            hours = hours or Z1
+            cost = cost or Z2
+            if not hours and not cost:
+                continue
 
-        (
-            self.service_period_from,
-            self.service_period_until,
-        ) = self.service_period_from_logbook()
-        self.save()
+            service = Service(
+                invoice=self,
+                project_service=ps,
+                title=ps.title,
+                description=ps.description,
+                position=ps.position,
+                effort_rate=ps.effort_rate,
+                effort_type=ps.effort_type,
+                effort_hours=hours,
+                cost=cost,
+                third_party_costs=third_party_costs,
+            )
+            # Same as ServiceBase.save()
+            if not service.position:
+                if max_position is None:
+                    max_position = max(
+                        [Service.objects.aggregate(m=Max("position"))["m"] or 0]
+                        + [other.position for other in services]
+                    )
+                service.position = 10 + max_position
+            if max_position is not None:
+                max_position = max(max_position, service.position)
+            service._calculate_service_totals()
+            services.append(service)
+
+        with transaction.atomic():
+            Service.objects.bulk_create(services)
+            with connections["default"].cursor() as cursor:
+                params = [timezone.now(), [service.id for service in services]]
+                cursor.execute(ARCHIVE_LOGBOOK_SQL % "logbook_loggedhours", params)
+                cursor.execute(ARCHIVE_LOGBOOK_SQL % "logbook_loggedcost", params)
+
+            (
+                self.service_period_from,
+                self.service_period_until,
+            ) = self.service_period_from_logbook()
+            self.save()
 
     def create_services_from_offer(self, project_services):
         assert self.project, "cannot call create_services_from_offer without project"
@@ -519,6 +567,76 @@ class RecurringInvoiceQuerySet(SearchQuerySet):
             .select_related("customer", "contact", "owned_by")
         )
 
+    def create_invoices(self, *, dry_run=False):
+        """
+        Creates the invoices of all due periods of all recurring invoices
+
+        All periods are planned up front; projects and invoices are inserted
+        using ``bulk_create`` inside one transaction. Returns a list of
+        ``(recurring_invoice, invoice)`` tuples. The invoices are not saved
+        and nothing is changed if ``dry_run`` is set.
+        """
+        plan = [(ri, ri.due_periods()) for ri in self]
+        created = [
+            (
+                ri,
+                ri.build_single_invoice(
+                    period_starts_on=period_starts_on, period_ends_on=period_ends_on
+                ),
+            )
+            for ri, periods in plan
+            for period_starts_on, period_ends_on in periods
+        ]
+        for ri, invoice in created:
+            invoice._calculate_total()
+        if dry_run or not created:
+            return created
+
+        invoices = [invoice for ri, invoice in created]
+        projects = [invoice.project for invoice in invoices if invoice.project]
+        with transaction.atomic():
+            # Codes are assigned here instead of in save(); keep others from
+            # inserting projects or invoices in the meantime
+            with connections["default"].cursor() as cursor:
+                cursor.execute(
+                    "LOCK TABLE projects_project, invoices_invoice"
+                    " IN SHARE ROW EXCLUSIVE MODE"
+                )
+
+            [[code]] = query(
+                "SELECT COALESCE(MAX(_code), 0) FROM projects_project"
+                " WHERE EXTRACT(year FROM created_at) = %s",
+                [timezone.now().year],
+            )
+            for code, project in enumerate(projects, code + 1):
+                project._code = code
+                project._fts = project._build_fts()
+            Project.objects.bulk_create(projects)
+
+            [[code]] = query(
+                "SELECT COALESCE(MAX(_code), 0) FROM invoices_invoice"
+                " WHERE project_id IS NULL",
+                [],
+            )
+            for invoice in invoices:
+                if invoice.project:
+                    invoice.project = invoice.project
+                    invoice._code = 1
+                else:
+                    code += 1
+                    invoice._code = code
+                invoice._fts = invoice._build_fts()
+            Invoice.objects.bulk_create(invoices)
+
+            for ri, periods in plan:
+                if periods:
+                    ri.next_period_starts_on = periods[-1][1] + dt.timedelta(days=1)
+            RecurringInvoice.objects.bulk_update(
+                [ri for ri, periods in plan if periods], ["next_period_starts_on"]
+            )
+
+        return created
+
 
 @model_urls
 class RecurringInvoice(ModelWithTotal):
@@ -622,10 +740,14 @@ class RecurringInvoice(ModelWithTotal):
             self.pretty_status,
         )
 
-    def create_single_invoice(self, *, period_starts_on, period_ends_on):
+    def build_single_invoice(self, *, period_starts_on, period_ends_on):
+        """
+        Returns an unsaved invoice for the given period, and an unsaved
+        project too if ``create_project`` is set
+        """
         project = None
         if self.create_project:
-            project = Project.objects.create(
+            project = Project(
                 customer=self.customer,
                 contact=self.contact,
                 title=self.title,
@@ -634,7 +756,7 @@ class RecurringInvoice(ModelWithTotal):
                 type=Project.MAINTENANCE,
             )
 
-        return Invoice.objects.create(
+        return Invoice(
             customer=self.customer,
             contact=self.contact,
             project=project,
@@ -656,8 +778,23 @@ class RecurringInvoice(ModelWithTotal):
             third_party_costs=self.third_party_costs,
         )
 
-    def create_invoices(self):
-        invoices = []
+    def create_single_invoice(self, *, period_starts_on, period_ends_on):
+        invoice = self.build_single_invoice(
+            period_starts_on=period_starts_on, period_ends_on=period_ends_on
+        )
+        if invoice.project:
+            invoice.project.save()
+            # Sets project_id now that the project has a primary key
+            invoice.project = invoice.project
+        invoice.save()
+        return invoice
+
+    def due_periods(self):
+        """
+        Returns a list of ``(period_starts_on, period_ends_on)`` tuples of all
+        periods which should be invoiced now
+        """
+        periods = []
         days = recurring(
             max(filter(None, (self.next_period_starts_on, self.starts_on))),
             self.periodicity,
@@ -666,17 +803,20 @@ class RecurringInvoice(ModelWithTotal):
             filter(None, (in_days(-self.create_invoice_on_day), self.ends_on))
         )
         this_period = next(days)
-        while True:
-            if this_period > generate_until:
-                break
+        while this_period <= generate_until:
             next_period = next(days)
+            periods.append((this_period, next_period - dt.timedelta(days=1)))
+            this_period = next_period
+        return periods
+
+    def create_invoices(self):
+        invoices = []
+        for period_starts_on, period_ends_on in self.due_periods():
             invoices.append(
                 self.create_single_invoice(
-                    period_starts_on=this_period,
-                    period_ends_on=next_period - dt.timedelta(days=1),
+                    period_starts_on=period_starts_on, period_ends_on=period_ends_on
                 )
             )
-            self.next_period_starts_on = next_period
-            this_period = next_period
+            self.next_period_starts_on = period_ends_on + dt.timedelta(days=1)
         self.save()
         return invoices
@@ -1,7 +1,7 @@
 from collections import defaultdict
 
 from django.conf import settings
-from django.core.mail import EmailMultiAlternatives
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.utils.translation import gettext as _
 
 from workbench.invoices.models import RecurringInvoice
@@ -19,12 +19,24 @@ TEMPLATE = """\
 """
 
 
-def create_recurring_invoices_and_notify():
+def create_recurring_invoices_and_notify(*, dry_run=False):
+    """
+    Creates invoices for all due recurring invoices and notifies their owners
+
+    Returns a list of ``(recurring_invoice, invoice)`` tuples. Nothing is
+    created and no mails are sent if ``dry_run`` is set.
+    """
+    created = RecurringInvoice.objects.renewal_candidates().create_invoices(
+        dry_run=dry_run
+    )
+    if dry_run:
+        return created
+
     by_owner = defaultdict(list)
-    for ri in RecurringInvoice.objects.renewal_candidates():
-        for invoice in ri.create_invoices():
-            by_owner[invoice.owned_by].append((ri, invoice))
+    for ri, invoice in created:
+        by_owner[invoice.owned_by].append((ri, invoice))
 
+    mails = []
     for owner, invoices in by_owner.items():
         invoices = "\n".join(
             TEMPLATE.format(
@@ -40,7 +52,13 @@ def create_recurring_invoices_and_notify():
             )
             for (ri, invoice) in invoices
         )
-        mail = EmailMultiAlternatives(
-            _("recurring invoices"), invoices, to=[owner.email], bcc=settings.BCC
+        mails.append(
+            EmailMultiAlternatives(
+                _("recurring invoices"), invoices, to=[owner.email], bcc=settings.BCC
+            )
         )
-        mail.send()
+
+    if mails:
+        # Send all mails using one connection
+        get_connection().send_messages(mails)
+    return created
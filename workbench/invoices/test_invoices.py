@@ -1,9 +1,13 @@
 import datetime as dt
+import os
+import tempfile
 from decimal import Decimal
+from unittest import mock
 
 from django.core.exceptions import ValidationError
+from django.db import connections
 from django.test import TestCase
-from django.test.utils import override_settings
+from django.test.utils import CaptureQueriesContext, override_settings
 from django.utils.translation import deactivate_all
 
 from workbench import factories
@@ -293,6 +297,38 @@ class InvoicesTest(TestCase):
             ["Invoice '{}' has been deleted successfully.".format(invoice)],
         )
 
+    def test_create_services_from_logbook_queries(self):
+        """Invoicing services from the logbook needs a constant number of
+        queries"""
+        counts = []
+        for count in [2, 20]:
+            project = factories.ProjectFactory.create()
+            for i in range(count):
+                service = factories.ServiceFactory.create(project=project)
+                factories.LoggedHoursFactory.create(service=service, hours=1)
+                factories.LoggedCostFactory.create(service=service, cost=10)
+            invoice = factories.InvoiceFactory.create(
+                project=project,
+                customer=project.customer,
+                contact=project.contact,
+                type=Invoice.SERVICES,
+            )
+
+            with CaptureQueriesContext(connections["default"]) as context:
+                invoice.create_services_from_logbook(project.services.all())
+            counts.append(len(context.captured_queries))
+
+            self.assertEqual(invoice.services.count(), count)
+            self.assertEqual(invoice.subtotal, count * 10)
+            self.assertFalse(
+                project.services.filter(loggedhours__archived_at__isnull=True)
+            )
+            self.assertFalse(
+                project.services.filter(loggedcosts__archived_at__isnull=True)
+            )
+
+        self.assertEqual(counts[0], counts[1])
+
     def test_delete_service_invoice_with_logs(self):
         """Deleting service invoices with related logbook entries unarchives
         those entries"""
@@ -537,6 +573,9 @@ class InvoicesTest(TestCase):
         code("owned_by={}".format(user.id))
         code("owned_by=-1")  # mine
         code("owned_by=0")  # only inactive
+        code("project={}".format(factories.ProjectFactory.create().pk))
+        code("month=2020-02")
+        code("month=2020-13", status_code=302)
         code("export=xlsx")
 
     @override_settings(BATCH_MAX_ITEMS=5)
@@ -933,6 +972,57 @@ class InvoicesTest(TestCase):
         response = self.client.get(invoice.urls["pdf"])
         self.assertEqual(response.status_code, 200)
 
+    def test_pdf_cache(self):
+        """Invoice PDFs are cached until the invoice or its services change"""
+        invoice = factories.InvoiceFactory.create(
+            type=Invoice.SERVICES, status=Invoice.SENT, invoiced_on=dt.date.today()
+        )
+        service = invoice.services.create(title="Programming", cost=100)
+        self.client.force_login(invoice.owned_by)
+
+        with tempfile.TemporaryDirectory() as location, override_settings(
+            PDF_CACHE_DIR=location
+        ):
+            response = self.client.get(invoice.urls["pdf"])
+            self.assertEqual(response["content-type"], "application/pdf")
+            self.assertTrue(b"".join(response.streaming_content).startswith(b"%PDF"))
+            etag = response["etag"]
+            self.assertEqual(len(os.listdir(location)), 1)
+
+            with mock.patch("workbench.tools.pdf._render") as render:
+                response = self.client.get(
+                    invoice.urls["pdf"] + "?disposition=attachment"
+                )
+                self.assertEqual(response["etag"], etag)
+                self.assertTrue(response["content-disposition"].startswith("attach"))
+                b"".join(response.streaming_content)
+
+                response = self.client.get(invoice.urls["pdf"], HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+
+                response = self.client.get(
+                    invoice.urls["pdf"],
+                    HTTP_IF_MODIFIED_SINCE=response["last-modified"],
+                )
+                self.assertEqual(response.status_code, 304)
+            self.assertEqual(render.call_count, 0)
+
+            service.description = "Frontend"
+            service.save()
+            response = self.client.get(invoice.urls["pdf"], HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response["etag"], etag)
+            b"".join(response.streaming_content)
+            self.assertEqual(len(os.listdir(location)), 1)
+
+        # Conditional requests also work without the cache
+        response = self.client.get(invoice.urls["pdf"])
+        self.assertEqual(response["etag"], self.client.get(invoice.urls["pdf"])["etag"])
+        response = self.client.get(
+            invoice.urls["pdf"], HTTP_IF_NONE_MATCH=response["etag"]
+        )
+        self.assertEqual(response.status_code, 304)
+
     def test_cancellation_with_payment_notice(self):
         """Canceling invoices requires entering a payment notice"""
         invoice = factories.InvoiceFactory.create(
@@ -1,7 +1,11 @@
 import datetime as dt
+import io
 
 from django.core import mail
+from django.core.management import call_command
+from django.db import connections
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils.translation import deactivate_all
 
 from time_machine import travel
@@ -9,6 +13,7 @@ from time_machine import travel
 from workbench import factories
 from workbench.invoices.models import Invoice, RecurringInvoice
 from workbench.invoices.tasks import create_recurring_invoices_and_notify
+from workbench.projects.models import Project
 from workbench.tools.testing import check_code, messages
 from workbench.tools.validation import in_days
 
@@ -329,3 +334,45 @@ class RecurringTest(TestCase):
         invoices = r.create_invoices()
         self.assertIsNotNone(invoices[0].project)
         self.assertEqual(invoices[0].type, invoices[0].DOWN_PAYMENT)
+
+    def test_catch_up(self):
+        """Catching up creates all invoices and projects at once"""
+        user = factories.UserFactory.create()
+        for create_project in [False, True]:
+            ri = factories.RecurringInvoiceFactory.create(
+                owned_by=user,
+                starts_on=in_days(-400),
+                periodicity="weekly",
+                create_project=create_project,
+            )
+        factories.InvoiceFactory.create()
+        periods = ri.due_periods()
+        self.assertTrue(len(periods) > 50)
+
+        stdout = io.StringIO()
+        call_command("recurring_invoices", "--dry-run", stdout=stdout)
+        self.assertIn(
+            "%s invoices would be created" % (2 * len(periods)), stdout.getvalue()
+        )
+        self.assertEqual(Invoice.objects.count(), 1)
+        self.assertEqual(len(mail.outbox), 0)
+
+        with CaptureQueriesContext(connections["default"]) as context:
+            created = create_recurring_invoices_and_notify()
+        self.assertEqual(len(created), 2 * len(periods))
+        self.assertLess(len(context.captured_queries), 20)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].body.count("==>"), 2 * len(periods))
+
+        self.assertEqual(
+            sorted(invoice.code for invoice in Invoice.objects.filter(project=None)),
+            ["%05d" % code for code in range(1, len(periods) + 2)],
+        )
+        self.assertEqual(
+            len({project.code for project in Project.objects.all()}), len(periods)
+        )
+        self.assertEqual(
+            {ri.next_period_starts_on for ri in RecurringInvoice.objects.all()},
+            {periods[-1][1] + dt.timedelta(days=1)},
+        )
+        self.assertEqual(len(create_recurring_invoices_and_notify()), 0)
@@ -1,15 +1,21 @@
 import datetime as dt
 from collections import defaultdict
 
+from django.conf import settings
 from django.contrib import messages
-from django.shortcuts import redirect, render
+from django.core.exceptions import PermissionDenied
+from django.db.models import Prefetch
+from django.http import HttpRequest, QueryDict
+from django.shortcuts import get_object_or_404, redirect, render
 from django.utils.translation import gettext, ngettext
 from django.views.decorators.http import require_POST
 
-from workbench import generic
+from workbench import generic, jobs
+from workbench.accounts.features import FEATURES
+from workbench.invoices.forms import InvoiceSearchForm
 from workbench.invoices.models import Invoice
 from workbench.logbook.models import LoggedCost, LoggedHours
-from workbench.tools.pdf import pdf_response
+from workbench.tools.pdf import batch_pdf_response, cached_pdf_response, pdf_response
 from workbench.tools.xlsx import WorkbenchXLSXDocument
 
 
@@ -18,17 +24,68 @@ class InvoicePDFView(generic.DetailView):
 
     def get(self, request, *args, **kwargs):
         self.object = self.get_object()
-
-        pdf, response = pdf_response(
-            self.object.code,
+        return cached_pdf_response(
+            self.object,
+            "process_invoice",
             as_attachment=request.GET.get("disposition") == "attachment",
+            request=request,
         )
 
-        pdf.init_letter()
-        pdf.process_invoice(self.object)
-        pdf.generate()
 
-        return response
+def _invoice_pdf_parameters(request):
+    if not request.user.features[FEATURES.CONTROLLING]:
+        raise PermissionDenied
+    return {"invoice": get_object_or_404(Invoice, pk=request.GET.get("invoice")).pk}
+
+
+@jobs.register("invoice_pdf", prepare=_invoice_pdf_parameters)
+def invoice_pdf_job(job, *, invoice):
+    return cached_pdf_response(
+        Invoice.objects.get(pk=invoice), "process_invoice", as_attachment=True
+    )
+
+
+def _invoices_pdf_parameters(request):
+    if not request.user.features[FEATURES.CONTROLLING]:
+        raise PermissionDenied
+    form = InvoiceSearchForm(request.GET, request=request)
+    if not form.is_valid():
+        raise ValueError("Search form was invalid.")
+    if request.GET.get("format", "pdf") not in {"pdf", "zip"}:
+        raise ValueError("Invalid format.")
+    count = form.filter(Invoice.objects.all()).count()
+    if not count:
+        raise ValueError(gettext("No invoices found."))
+    if count > settings.BATCH_MAX_ITEMS:
+        raise ValueError(gettext("%s invoices in selection, that's too many.") % count)
+    return {
+        "query": request.GET.urlencode(),
+        "format": request.GET.get("format", "pdf"),
+    }
+
+
+@jobs.register("invoices_pdf", prepare=_invoices_pdf_parameters)
+def invoices_pdf_job(job, *, query, format):
+    # The search form only needs the query string and the user
+    request = HttpRequest()
+    request.GET = QueryDict(query)
+    request.user = job.created_by
+    form = InvoiceSearchForm(request.GET, request=request)
+    form.full_clean()
+
+    return batch_pdf_response(
+        form.filter(Invoice.objects.all()).prefetch_related(
+            "services",
+            Prefetch(
+                "down_payment_invoices",
+                queryset=Invoice.objects.select_related("owned_by", "project"),
+            ),
+        ),
+        "process_invoice",
+        filename="invoices",
+        merge=format == "pdf",
+        progress=job.set_progress,
+    )
 
 
 class InvoiceXLSXView(generic.DetailView):
@@ -152,8 +209,7 @@ def reminders(request):
     )
 
 
-@require_POST
-def dunning_letter(request, customer_id):
+def _dunning_letter(customer_id):
     invoices = (
         Invoice.objects.overdue()
         .filter(customer=customer_id)
@@ -167,3 +223,19 @@ def dunning_letter(request, customer_id):
     invoices.update(last_reminded_on=dt.date.today())
 
     return response
+
+
+@require_POST
+def dunning_letter(request, customer_id):
+    return _dunning_letter(customer_id)
+
+
+def _dunning_letter_parameters(request):
+    if not request.user.features[FEATURES.BOOKKEEPING]:
+        raise PermissionDenied
+    return {"customer_id": int(request.GET.get("customer", ""))}
+
+
+@jobs.register("dunning_letter", prepare=_dunning_letter_parameters)
+def dunning_letter_job(job, *, customer_id):
+    return _dunning_letter(customer_id)
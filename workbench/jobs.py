@@ -0,0 +1,161 @@
+"""
+Database backed background jobs
+
+Slow exports are not rendered inside the request. Instead, the "prepare"
+endpoint validates the request using the ``prepare`` function of the job
+kind and stores a ``Job`` with the resulting JSON parameters. Workers started
+using ``./manage.py run_jobs`` claim queued jobs using ``SELECT ... FOR
+UPDATE SKIP LOCKED``, so any number of workers may run in parallel without
+an external broker. Workers are woken up using PostgreSQL's ``LISTEN`` and
+``NOTIFY``.
+
+The ``run`` function of the job kind returns a HTTP response; its content is
+stored in the job row and served by the download endpoint once the job is
+done. Clients poll the status endpoint for the progress in the meantime.
+"""
+
+import datetime as dt
+import logging
+import re
+import select
+import traceback
+from types import SimpleNamespace
+
+from django.db import connections, transaction
+from django.utils import timezone
+from django.utils.translation import override
+
+from workbench.accounts.middleware import set_user_name
+from workbench.models import Job
+
+
+logger = logging.getLogger(__name__)
+
+#: All job kinds, by name
+KINDS = {}
+
+CHANNEL = "workbench_jobs"
+
+_FILENAME_RE = re.compile(r'filename="([^"]+)"')
+
+
+def register(name, *, prepare):
+    """
+    Registers the decorated function as job kind ``name``
+
+    ``prepare(request)`` returns a dictionary of JSON serializable parameters
+    and raises ``PermissionDenied`` or ``ValueError`` if the job should not be
+    created. The decorated function receives the job and the parameters as
+    keyword arguments and returns a HTTP response.
+    """
+
+    def decorator(fn):
+        KINDS[name] = SimpleNamespace(name=name, prepare=prepare, run=fn)
+        return fn
+
+    return decorator
+
+
+def enqueue(kind, *, user, parameters):
+    job = Job.objects.create(kind=kind, created_by=user, parameters=parameters)
+    with connections["default"].cursor() as cursor:
+        # Delivered when the transaction commits
+        cursor.execute("NOTIFY %s" % CHANNEL)
+    return job
+
+
+def claim():
+    """
+    Marks the oldest queued job as running and returns it
+    """
+    with transaction.atomic():
+        job = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.QUEUED)
+            .defer("content")
+            .order_by("pk")
+            .first()
+        )
+        if job:
+            job.status = Job.RUNNING
+            job.started_at = timezone.now()
+            job.save(update_fields=["status", "started_at"])
+    return job
+
+
+def execute(job):
+    """
+    Runs ``job`` and stores its result or the error
+    """
+    user = job.created_by
+    set_user_name("user-%d-%s" % (user.id, user.get_short_name()))
+    try:
+        with override(user.language):
+            response = KINDS[job.kind].run(job, **job.parameters)
+        content = (
+            b"".join(response.streaming_content)
+            if response.streaming
+            else response.content
+        )
+    except Exception:
+        logger.exception("Job %s failed", job)
+        job.status = Job.FAILED
+        job.error = traceback.format_exc()
+        job.finished_at = timezone.now()
+        job.save(update_fields=["status", "error", "finished_at"])
+        return
+
+    match = _FILENAME_RE.search(response.get("Content-Disposition", ""))
+    job.status = Job.DONE
+    job.progress = 100
+    job.finished_at = timezone.now()
+    job.filename = match.group(1) if match else job.kind
+    job.content_type = response["Content-Type"]
+    job.content = content
+    job.save(
+        update_fields=[
+            "status",
+            "progress",
+            "finished_at",
+            "filename",
+            "content_type",
+            "content",
+        ]
+    )
+
+
+def work(*, once=False, timeout=60):
+    """
+    Executes jobs until interrupted, or until the queue is empty if ``once``
+    """
+    connection = connections["default"]
+    if not once:
+        with connection.cursor() as cursor:
+            cursor.execute("LISTEN %s" % CHANNEL)
+
+    while True:
+        job = claim()
+        if job:
+            execute(job)
+            continue
+        if once:
+            return
+
+        dbapi = connection.connection
+        select.select([dbapi], [], [], timeout)
+        dbapi.poll()
+        dbapi.notifies.clear()
+
+
+def cleanup(*, days=7):
+    """
+    Removes finished jobs after ``days`` days and fails jobs whose worker
+    has died
+    """
+    Job.objects.filter(
+        status=Job.RUNNING, started_at__lt=timezone.now() - dt.timedelta(days=1)
+    ).update(status=Job.FAILED, error="Timeout", finished_at=timezone.now())
+    Job.objects.filter(
+        status__in=[Job.DONE, Job.FAILED],
+        finished_at__lt=timezone.now() - dt.timedelta(days=days),
+    ).delete()
@@ -19,7 +19,7 @@ from workbench.expenses.models import ExchangeRates
 from workbench.logbook.models import Break, LoggedCost, LoggedHours
 from workbench.offers.models import Offer
 from workbench.projects.models import Campaign, Project, Service
-from workbench.timer.models import Timestamp
+from workbench.timer.models import Timestamp, slices_changed
 from workbench.tools.forms import (
     Autocomplete,
     DateInput,
@@ -755,6 +755,7 @@ class BreakForm(ModelForm):
             Timestamp.objects.filter(user=self.request.user, id=pk).update(
                 logged_break=instance
             )
+            slices_changed([self.request.user.id])
         else:
             timestamp = DetectedTimestampForm(self.request.GET).build_if_valid(
                 user=self.request.user, logged_break=instance
@@ -0,0 +1,77 @@
+# Generated by Django 3.1.5 on 2026-10-18 02:09
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from workbench.logbook import rollup
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0019_auto_20200523_0929"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("logbook", "0020_auto_20200511_1419"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LoggedHoursRollup",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("starts_on", models.DateField(verbose_name="starts on")),
+                ("ends_on", models.DateField(verbose_name="ends on")),
+                ("week", models.DateField(db_index=True, verbose_name="week")),
+                ("month", models.DateField(db_index=True, verbose_name="month")),
+                (
+                    "hours",
+                    models.DecimalField(
+                        decimal_places=1, max_digits=12, verbose_name="hours"
+                    ),
+                ),
+                ("count", models.IntegerField(verbose_name="count")),
+                (
+                    "rendered_by",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="rendered by",
+                    ),
+                ),
+                (
+                    "service",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="projects.service",
+                        verbose_name="service",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "logged hours rollup",
+                "verbose_name_plural": "logged hours rollups",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="loggedhoursrollup",
+            index=models.Index(
+                fields=["starts_on"], name="logbook_log_starts__55de9d_idx"
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="loggedhoursrollup",
+            unique_together={("rendered_by", "service", "starts_on")},
+        ),
+        migrations.RunSQL(rollup.TRIGGER + rollup.REBUILD, rollup.DROP_TRIGGER),
+    ]
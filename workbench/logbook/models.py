@@ -80,6 +80,44 @@ class LoggedHours(Model):
             )
 
 
+class LoggedHoursRollup(models.Model):
+    """
+    Logged hours summed up per user, service and bucket
+
+    Buckets are ISO weeks split at month boundaries, so that weeks as well as
+    months can be summed up exactly. Rows are maintained by a database
+    trigger on ``logbook_loggedhours``, see ``workbench.logbook.rollup``.
+    """
+
+    rendered_by = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name=_("rendered by"),
+    )
+    service = models.ForeignKey(
+        Service,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name=_("service"),
+    )
+    starts_on = models.DateField(_("starts on"))
+    ends_on = models.DateField(_("ends on"))
+    week = models.DateField(_("week"), db_index=True)
+    month = models.DateField(_("month"), db_index=True)
+    hours = models.DecimalField(_("hours"), max_digits=12, decimal_places=1)
+    count = models.IntegerField(_("count"))
+
+    class Meta:
+        indexes = [models.Index(fields=["starts_on"])]
+        unique_together = [("rendered_by", "service", "starts_on")]
+        verbose_name = _("logged hours rollup")
+        verbose_name_plural = _("logged hours rollups")
+
+    def __str__(self):
+        return "%s - %s" % (self.starts_on, self.ends_on)
+
+
 class LoggedCostQuerySet(SearchQuerySet):
     def expenses(self, *, user):
         return self.filter(are_expenses=True, rendered_by=user)
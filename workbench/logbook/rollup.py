@@ -0,0 +1,200 @@
+"""
+Rollup of logged hours per user, service and bucket
+
+Reports summing up logged hours per week, month or arbitrary date range
+should use ``hours()`` instead of aggregating ``LoggedHours`` directly. The
+rollup table is kept current by a database trigger, which also covers
+queryset ``update()`` calls such as reassigning logbook entries or
+substituting users.
+
+Buckets are ISO weeks split at month boundaries. Date ranges are answered
+from the rollup for all buckets completely contained in the range; only the
+partial buckets at both ends of the range are read from the logbook itself.
+"""
+
+import datetime as dt
+from collections import defaultdict
+
+from django.db.models import Q, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+
+from workbench.logbook.models import LoggedHours, LoggedHoursRollup
+from workbench.tools.formats import Z1
+from workbench.tools.validation import monday
+
+
+TRIGGER = """\
+CREATE OR REPLACE FUNCTION logbook_loggedhoursrollup_apply(
+  rendered_by integer, service integer, day date, delta_hours numeric,
+  delta_count integer
+) RETURNS void AS $$
+declare
+  bucket_week date := date_trunc('week', day)::date;
+  bucket_month date := date_trunc('month', day)::date;
+  bucket_starts_on date := greatest(bucket_week, bucket_month);
+begin
+  INSERT INTO logbook_loggedhoursrollup
+    (rendered_by_id, service_id, starts_on, ends_on, week, month, hours, count)
+  VALUES (
+    rendered_by,
+    service,
+    bucket_starts_on,
+    least(bucket_week + 6, (bucket_month + interval '1 month')::date - 1),
+    bucket_week,
+    bucket_month,
+    delta_hours,
+    delta_count
+  )
+  ON CONFLICT (rendered_by_id, service_id, starts_on) DO UPDATE SET
+    hours=logbook_loggedhoursrollup.hours + excluded.hours,
+    count=logbook_loggedhoursrollup.count + excluded.count;
+
+  DELETE FROM logbook_loggedhoursrollup
+  WHERE rendered_by_id=rendered_by AND service_id=service
+    AND starts_on=bucket_starts_on AND count<=0;
+end
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION logbook_loggedhoursrollup_trigger() RETURNS trigger AS $$
+begin
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    PERFORM logbook_loggedhoursrollup_apply(
+      OLD.rendered_by_id, OLD.service_id, OLD.rendered_on, -OLD.hours, -1
+    );
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    PERFORM logbook_loggedhoursrollup_apply(
+      NEW.rendered_by_id, NEW.service_id, NEW.rendered_on, NEW.hours, 1
+    );
+  END IF;
+  RETURN NULL;
+end
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS logbook_loggedhoursrollup_trigger ON logbook_loggedhours;
+CREATE TRIGGER logbook_loggedhoursrollup_trigger AFTER INSERT OR DELETE
+  ON logbook_loggedhours FOR EACH ROW
+  EXECUTE PROCEDURE logbook_loggedhoursrollup_trigger();
+
+DROP TRIGGER IF EXISTS logbook_loggedhoursrollup_update_trigger
+  ON logbook_loggedhours;
+CREATE TRIGGER logbook_loggedhoursrollup_update_trigger AFTER UPDATE
+  ON logbook_loggedhours FOR EACH ROW
+  WHEN (
+    (OLD.rendered_by_id, OLD.service_id, OLD.rendered_on, OLD.hours)
+    IS DISTINCT FROM
+    (NEW.rendered_by_id, NEW.service_id, NEW.rendered_on, NEW.hours)
+  )
+  EXECUTE PROCEDURE logbook_loggedhoursrollup_trigger();
+"""
+
+DROP_TRIGGER = """\
+DROP TRIGGER IF EXISTS logbook_loggedhoursrollup_trigger ON logbook_loggedhours;
+DROP TRIGGER IF EXISTS logbook_loggedhoursrollup_update_trigger
+  ON logbook_loggedhours;
+DROP FUNCTION IF EXISTS logbook_loggedhoursrollup_trigger();
+DROP FUNCTION IF EXISTS logbook_loggedhoursrollup_apply(
+  integer, integer, date, numeric, integer
+);
+"""
+
+REBUILD = """\
+DELETE FROM logbook_loggedhoursrollup;
+INSERT INTO logbook_loggedhoursrollup
+  (rendered_by_id, service_id, starts_on, ends_on, week, month, hours, count)
+SELECT
+  rendered_by_id,
+  service_id,
+  greatest(week, month),
+  least(week + 6, (month + interval '1 month')::date - 1),
+  week,
+  month,
+  SUM(hours),
+  COUNT(*)
+FROM (
+  SELECT
+    rendered_by_id,
+    service_id,
+    date_trunc('week', rendered_on)::date AS week,
+    date_trunc('month', rendered_on)::date AS month,
+    hours
+  FROM logbook_loggedhours
+) lh
+GROUP BY rendered_by_id, service_id, week, month;
+"""
+
+
+def bucket(day):
+    """
+    Returns the first and the last day of the bucket containing ``day``
+    """
+    week = monday(day)
+    month = day.replace(day=1)
+    next_month = (month + dt.timedelta(days=31)).replace(day=1)
+    return (
+        max(week, month),
+        min(week + dt.timedelta(days=6), next_month - dt.timedelta(days=1)),
+    )
+
+
+def _split(date_range):
+    date_from, date_until = date_range
+    starts_on, ends_on = bucket(date_from)
+    full_from = date_from if starts_on == date_from else ends_on + dt.timedelta(1)
+    starts_on, ends_on = bucket(date_until)
+    full_until = date_until if ends_on == date_until else starts_on - dt.timedelta(1)
+
+    if full_from > full_until:
+        return None, [date_range]
+    return (
+        (full_from, full_until),
+        [
+            edge
+            for edge in [
+                (date_from, full_from - dt.timedelta(1)),
+                (full_until + dt.timedelta(1), date_until),
+            ]
+            if edge[0] <= edge[1]
+        ],
+    )
+
+
+def hours(fields, *, date_range=None, users=None):
+    """
+    Returns rows equivalent to
+    ``LoggedHours.objects.values(*fields).annotate(hours=Sum("hours"))``
+
+    ``fields`` may contain anything reachable from both ``LoggedHours`` and
+    ``LoggedHoursRollup`` (e.g. ``"rendered_by"`` or
+    ``"service__project__customer"``) plus ``"week"`` and ``"month"``.
+    """
+    rollup = LoggedHoursRollup.objects.order_by()
+    edges = []
+    if date_range:
+        full_range, edges = _split(date_range)
+        rollup = (
+            rollup.filter(starts_on__range=full_range) if full_range else rollup.none()
+        )
+    if users:
+        rollup = rollup.filter(rendered_by__in=users)
+
+    totals = defaultdict(lambda: Z1)
+    for row in rollup.values(*fields).annotate(Sum("hours")):
+        totals[tuple(row[field] for field in fields)] += row["hours__sum"]
+
+    if edges:
+        logged = LoggedHours.objects.order_by()
+        if "week" in fields:
+            logged = logged.annotate(week=TruncWeek("rendered_on"))
+        if "month" in fields:
+            logged = logged.annotate(month=TruncMonth("rendered_on"))
+        q = Q()
+        for edge in edges:
+            q |= Q(rendered_on__range=edge)
+        logged = logged.filter(q)
+        if users:
+            logged = logged.filter(rendered_by__in=users)
+        for row in logged.values(*fields).annotate(Sum("hours")):
+            totals[tuple(row[field] for field in fields)] += row["hours__sum"]
+
+    return [dict(zip(fields, key), hours=value) for key, value in totals.items()]
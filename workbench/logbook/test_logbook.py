@@ -1,9 +1,11 @@
 import datetime as dt
+import io
 
 from django.test import TestCase
 from django.test.utils import override_settings
 from django.utils import timezone
 
+from openpyxl import load_workbook
 from time_machine import travel
 
 from workbench import factories
@@ -451,6 +453,31 @@ class LogbookTest(TestCase):
         code("not_archived=1")
         code("export=xlsx")
 
+    def test_logged_hours_xlsx(self):
+        """The XLSX export of logged hours contains pivot tables"""
+        service = factories.ServiceFactory.create(effort_rate=100)
+        user = factories.UserFactory.create()
+        for day, hours in [(dt.date(2020, 1, 10), 2), (dt.date(2020, 2, 10), 3)]:
+            factories.LoggedHoursFactory.create(
+                service=service, rendered_by=user, rendered_on=day, hours=hours
+            )
+        self.client.force_login(user)
+
+        response = self.client.get("/logbook/hours/?export=xlsx")
+        self.assertTrue(response.streaming)
+        workbook = load_workbook(io.BytesIO(b"".join(response.streaming_content)))
+        sheets = [
+            list(sheet.iter_rows(values_only=True)) for sheet in workbook.worksheets
+        ]
+        self.assertEqual(len(sheets[0]), 3)
+        self.assertEqual(sheets[1][1][3:], (5, None, 5))
+        self.assertEqual(sheets[1][2][3:], (5, 500, 5))
+        self.assertEqual(
+            sheets[2][0][-2:], (dt.datetime(2020, 1, 1), dt.datetime(2020, 2, 1))
+        )
+        self.assertEqual(sheets[2][2][3:], (5, 500, 2, 3))
+        self.assertEqual(sheets[3][1], ("Total", 5, 2, 3))
+
     def test_logged_cost_list(self):
         """Filter form smoke test"""
         cost = factories.LoggedCostFactory.create()
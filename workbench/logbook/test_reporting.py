@@ -1,9 +1,12 @@
 import datetime as dt
 from decimal import Decimal
 
+from django.db.models import Sum
 from django.test import TestCase
 
 from workbench import factories
+from workbench.logbook import rollup
+from workbench.logbook.models import LoggedHours, LoggedHoursRollup
 from workbench.logbook.reporting import classify_logging_delay, logbook_stats
 from workbench.tools.formats import Z1
 
@@ -45,3 +48,62 @@ class ReportingTest(TestCase):
         self.assertEqual(classify_logging_delay(Decimal(4))[1], "light")
         self.assertEqual(classify_logging_delay(Decimal(10))[1], "caveat")
         self.assertEqual(classify_logging_delay(Decimal(40))[1], "danger")
+
+    def test_rollup(self):
+        """The logged hours rollup is maintained by the database"""
+        service = factories.ServiceFactory.create()
+        user = factories.UserFactory.create()
+
+        days = [dt.date(2020, 1, 31) + dt.timedelta(days=i) for i in range(-10, 30)]
+        for day in days:
+            factories.LoggedHoursFactory.create(
+                service=service, rendered_by=user, rendered_on=day, hours=2
+            )
+
+        self.assertEqual(
+            rollup.bucket(dt.date(2020, 1, 31)),
+            (dt.date(2020, 1, 27), dt.date(2020, 1, 31)),
+        )
+        self.assertEqual(
+            rollup.bucket(dt.date(2020, 2, 1)),
+            (dt.date(2020, 2, 1), dt.date(2020, 2, 2)),
+        )
+        self.assertEqual(sum(row.hours for row in LoggedHoursRollup.objects.all()), 80)
+
+        def totals(date_range, fields=("rendered_by",)):
+            return {
+                tuple(row[field] for field in fields): row["hours"]
+                for row in rollup.hours(fields, date_range=date_range)
+            }
+
+        for date_range in [
+            (dt.date(2020, 1, 29), dt.date(2020, 1, 29)),
+            (dt.date(2020, 1, 29), dt.date(2020, 2, 1)),
+            (dt.date(2020, 1, 1), dt.date(2020, 1, 31)),
+            (dt.date(2020, 1, 25), dt.date(2020, 2, 25)),
+        ]:
+            with self.subTest(date_range=date_range):
+                self.assertEqual(
+                    totals(date_range)[(user.id,)],
+                    LoggedHours.objects.filter(rendered_on__range=date_range).aggregate(
+                        Sum("hours")
+                    )["hours__sum"],
+                )
+
+        self.assertEqual(
+            totals((dt.date(2020, 1, 27), dt.date(2020, 2, 2)), ["month"]),
+            {(dt.date(2020, 1, 1),): 10, (dt.date(2020, 2, 1),): 4},
+        )
+
+        other = factories.ServiceFactory.create(project=service.project)
+        service.loggedhours.filter(rendered_on__month=2).update(service=other)
+        LoggedHours.objects.filter(rendered_on=days[0]).update(hours=5)
+        LoggedHours.objects.filter(rendered_on=days[1]).delete()
+
+        self.assertEqual(
+            totals(None, ["service"]), {(service.id,): 23, (other.id,): 58}
+        )
+        self.assertEqual(
+            LoggedHoursRollup.objects.filter(service=service).count(),
+            len({rollup.bucket(day) for day in days[2:11]}),
+        )
@@ -1,8 +1,15 @@
+from django.core.exceptions import PermissionDenied
+from django.http import HttpRequest, QueryDict
 from django.shortcuts import redirect, render
 from django.utils.translation import gettext as _
 
+from workbench import jobs
+from workbench.accounts.features import FEATURES
+from workbench.logbook.forms import LoggedHoursSearchForm
+from workbench.logbook.models import LoggedHours
 from workbench.projects.forms import ProjectAutocompleteForm
 from workbench.templatetags.workbench import h
+from workbench.tools.xlsx import WorkbenchXLSXDocument
 
 
 def create(request, *, viewname):
@@ -32,3 +39,25 @@ def create(request, *, viewname):
             ],
         },
     )
+
+
+def _logged_hours_xlsx_parameters(request):
+    if not request.user.features[FEATURES.CONTROLLING]:
+        raise PermissionDenied
+    if not LoggedHoursSearchForm(request.GET, request=request).is_valid():
+        raise ValueError("Search form was invalid.")
+    return {"query": request.GET.urlencode()}
+
+
+@jobs.register("logged_hours_xlsx", prepare=_logged_hours_xlsx_parameters)
+def logged_hours_xlsx_job(job, *, query):
+    # The search form only needs the query string and the user
+    request = HttpRequest()
+    request.GET = QueryDict(query)
+    request.user = job.created_by
+    form = LoggedHoursSearchForm(request.GET, request=request)
+    form.full_clean()
+
+    xlsx = WorkbenchXLSXDocument()
+    xlsx.logged_hours(form.filter(LoggedHours.objects.all()))
+    return xlsx.to_response("hours.xlsx")
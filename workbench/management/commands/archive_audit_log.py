@@ -0,0 +1,36 @@
+import os
+
+from django.core.management import BaseCommand, CommandError
+
+from workbench.audit import partitions
+
+
+class Command(BaseCommand):
+    help = "Move partitions of the audit log before the given year to the archive"
+
+    def add_arguments(self, parser):
+        parser.add_argument("before", type=int, help="e.g. 2020")
+        parser.add_argument(
+            "--export",
+            metavar="DIRECTORY",
+            help="Export partitions to gzipped JSON lines files and drop them"
+            " instead of moving them to the archive",
+        )
+
+    def handle(self, **options):
+        if options["export"] and not os.path.isdir(options["export"]):
+            raise CommandError("%s is not a directory" % options["export"])
+
+        partitions.create_partitions()
+        for year, is_archived in partitions.partitions():
+            if year >= options["before"]:
+                continue
+            if options["export"]:
+                path = os.path.join(
+                    options["export"], "audit_logged_actions_%s.jsonl.gz" % year
+                )
+                partitions.export(year, path)
+                self.stdout.write("Exported %s to %s" % (year, path))
+            elif not is_archived:
+                partitions.archive(year)
+                self.stdout.write("Archived %s" % year)
@@ -0,0 +1,69 @@
+import json
+import sys
+
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import setup_databases, teardown_databases
+
+from workbench.accounts.middleware import set_user_name
+from workbench.tools import benchmark
+
+
+class Command(BaseCommand):
+    help = "Benchmark reporting functions using synthetic data in a test database"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10)
+        parser.add_argument("--projects", type=int, default=50)
+        parser.add_argument("--years", type=int, default=2)
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--only", action="append", help="Only run the given benchmark(s)"
+        )
+        parser.add_argument(
+            "--keepdb", action="store_true", help="Keep the test database"
+        )
+        parser.add_argument("--output", help="Write results to this file")
+
+    def handle(self, **options):
+        old_config = setup_databases(
+            verbosity=0, interactive=False, keepdb=options["keepdb"]
+        )
+        try:
+            with transaction.atomic():
+                set_user_name("Benchmark")
+                data = benchmark.generate(
+                    users=options["users"],
+                    projects=options["projects"],
+                    years=options["years"],
+                    seed=options["seed"],
+                )
+                unknown = set(options["only"] or ()) - set(benchmark.benchmarks(data))
+                if unknown:
+                    raise CommandError(
+                        "Unknown benchmark(s): %s" % ", ".join(sorted(unknown))
+                    )
+                results = benchmark.run(
+                    data, repeat=options["repeat"], names=options["only"]
+                )
+                transaction.set_rollback(True)
+        finally:
+            teardown_databases(old_config, verbosity=0, keepdb=options["keepdb"])
+
+        report = json.dumps(
+            {
+                "parameters": {
+                    key: options[key]
+                    for key in ["users", "projects", "years", "repeat", "seed"]
+                },
+                "data": data.counts,
+                "results": results,
+            },
+            indent=2,
+        )
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(report)
+        else:
+            sys.stdout.write(report + "\n")
@@ -0,0 +1,40 @@
+from importlib import import_module
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import BaseCommand
+
+from workbench.reporting import caching
+from workbench.reporting.models import TableVersion
+
+
+class Command(BaseCommand):
+    help = "Show statistics of the reporting cache"
+
+    def handle(self, **options):
+        # Import all views so that all cached functions are registered
+        import_module(settings.ROOT_URLCONF)
+
+        cache = caches["reporting"]
+        self.stdout.write(
+            "Backend: %s.%s"
+            % (cache.__class__.__module__, cache.__class__.__qualname__)
+        )
+        entries = caching.entries(cache)
+        self.stdout.write("Entries: %s" % ("unknown" if entries is None else entries))
+
+        self.stdout.write("\nFunctions:")
+        for row in caching.statistics():
+            self.stdout.write(
+                "%s: %s hits, %s misses, hit ratio %s"
+                % (
+                    row["name"],
+                    row["hits"],
+                    row["misses"],
+                    "-" if row["ratio"] is None else "{:.0%}".format(row["ratio"]),
+                )
+            )
+
+        self.stdout.write("\nTable versions:")
+        for version in TableVersion.objects.all():
+            self.stdout.write("%s: %s" % (version.table_name, version.version))
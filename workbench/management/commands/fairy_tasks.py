@@ -1,10 +1,13 @@
 from django.core.management import BaseCommand
 from django.utils.translation import activate
 
+from workbench import jobs
 from workbench.accounts.middleware import set_user_name
+from workbench.audit.partitions import create_partitions
 from workbench.invoices.tasks import create_recurring_invoices_and_notify
 from workbench.reporting.accounting import send_accounting_files
 from workbench.reporting.tasks import create_accruals_for_last_month
+from workbench.tools.pdf import prune_cache
 
 
 class Command(BaseCommand):
@@ -13,6 +16,9 @@ class Command(BaseCommand):
     def handle(self, **options):
         activate("de")
         set_user_name("Fairy tasks")
+        create_partitions()
+        jobs.cleanup()
+        prune_cache()
         create_accruals_for_last_month()
         create_recurring_invoices_and_notify()
         send_accounting_files()
@@ -0,0 +1,37 @@
+from django.core.management import BaseCommand
+from django.utils.translation import activate
+
+from workbench.accounts.middleware import set_user_name
+from workbench.invoices.tasks import create_recurring_invoices_and_notify
+from workbench.tools.formats import currency, local_date_format
+
+
+class Command(BaseCommand):
+    help = "Create invoices for all due recurring invoices and notify their owners"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report the invoices which would be created",
+        )
+
+    def handle(self, **options):
+        activate("de")
+        set_user_name("Recurring invoices")
+        created = create_recurring_invoices_and_notify(dry_run=options["dry_run"])
+        for ri, invoice in created:
+            self.stdout.write(
+                "%s: %s - %s, %s%s"
+                % (
+                    ri,
+                    local_date_format(invoice.service_period_from),
+                    local_date_format(invoice.service_period_until),
+                    currency(invoice.total),
+                    ", %s" % invoice.code if invoice.pk else "",
+                )
+            )
+        self.stdout.write(
+            "%s invoices %s"
+            % (len(created), "would be created" if options["dry_run"] else "created")
+        )
@@ -0,0 +1,23 @@
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management import BaseCommand
+
+from workbench import jobs
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit as soon as the queue is empty",
+        )
+
+    def handle(self, **options):
+        # Import all views so that all job kinds are registered
+        import_module(settings.ROOT_URLCONF)
+
+        jobs.work(once=options["once"])
@@ -1,8 +1,12 @@
 import re
+import time
 
+from django.db import connections
 from django.shortcuts import render
 from django.urls import reverse
 
+from workbench.tools import profiling
+
 
 FALLBACKS = None
 
@@ -56,3 +60,20 @@ def history_fallback(get_response):
         return response
 
     return middleware
+
+
+def query_profiler(get_response):
+    def middleware(request):
+        profile = profiling.Profile()
+        start = time.perf_counter()
+        with connections["default"].execute_wrapper(profile):
+            response = get_response(request)
+        profiling.record(
+            request.resolver_match.view_name if request.resolver_match else "-",
+            request.path_info,
+            profile,
+            time.perf_counter() - start,
+        )
+        return response
+
+    return middleware
@@ -0,0 +1,91 @@
+# Generated by Django 3.1.5 on 2026-10-18 02:40
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+from workbench.tools import search
+
+
+INDEX = [
+    ("contacts_organization", ["name"], "is_archived"),
+    ("contacts_person", ["given_name", "family_name"], "is_archived"),
+    ("deals_deal", ["title"], None),
+    ("invoices_invoice", ["title"], None),
+    ("invoices_recurringinvoice", ["title"], None),
+    ("offers_offer", ["title"], None),
+    ("projects_campaign", ["title"], None),
+    ("projects_project", ["title"], None),
+]
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("contacts", "0013_organization_is_archived"),
+        ("deals", "0004_deal_related_offers"),
+        ("invoices", "0022_recurringinvoice_create_project"),
+        ("offers", "0010_offer__fts"),
+        ("projects", "0020_projectsummary"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.CreateModel(
+            name="SearchEntry",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("table_name", models.TextField(verbose_name="table name")),
+                ("row_pk", models.IntegerField(verbose_name="row primary key")),
+                ("title", models.TextField(verbose_name="title")),
+                (
+                    "is_archived",
+                    models.BooleanField(default=False, verbose_name="is archived"),
+                ),
+                (
+                    "fts_document",
+                    django.contrib.postgres.search.SearchVectorField(
+                        null=True, verbose_name="full text search document"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "search entry",
+                "verbose_name_plural": "search entries",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="searchentry",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["fts_document"], name="workbench_search_fts_index"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="searchentry",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["title"],
+                name="workbench_search_title_index",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="searchentry",
+            unique_together={("table_name", "row_pk")},
+        ),
+    ] + [
+        migrations.RunSQL(
+            search.index(table, fields, archived=archived), search.drop_index(table)
+        )
+        for table, fields, archived in INDEX
+    ]
@@ -0,0 +1,113 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models
+from django.db.models import Q
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from workbench.accounts.models import User
+
+
+class SearchEntry(models.Model):
+    """
+    Search index entry, maintained by database triggers
+
+    See ``workbench.tools.search.index``.
+    """
+
+    table_name = models.TextField(_("table name"))
+    row_pk = models.IntegerField(_("row primary key"))
+    title = models.TextField(_("title"))
+    is_archived = models.BooleanField(_("is archived"), default=False)
+    fts_document = SearchVectorField(_("full text search document"), null=True)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["fts_document"], name="workbench_search_fts_index"),
+            GinIndex(
+                fields=["title"],
+                name="workbench_search_title_index",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ]
+        unique_together = [("table_name", "row_pk")]
+        verbose_name = _("search entry")
+        verbose_name_plural = _("search entries")
+
+    def __str__(self):
+        return "%s %s" % (self.table_name, self.row_pk)
+
+
+class Job(models.Model):
+    """
+    Background job, executed by ``./manage.py run_jobs``
+
+    See ``workbench.jobs``.
+    """
+
+    QUEUED = 10
+    RUNNING = 20
+    DONE = 30
+    FAILED = 40
+
+    STATUS_CHOICES = (
+        (QUEUED, _("Queued")),
+        (RUNNING, _("Running")),
+        (DONE, _("Done")),
+        (FAILED, _("Failed")),
+    )
+
+    created_at = models.DateTimeField(_("created at"), default=timezone.now)
+    created_by = models.ForeignKey(
+        User, on_delete=models.CASCADE, verbose_name=_("created by"), related_name="+"
+    )
+    kind = models.CharField(_("kind"), max_length=100)
+    parameters = models.JSONField(_("parameters"), default=dict)
+    status = models.PositiveIntegerField(
+        _("status"), choices=STATUS_CHOICES, default=QUEUED
+    )
+    progress = models.PositiveIntegerField(_("progress"), default=0)
+    started_at = models.DateTimeField(_("started at"), blank=True, null=True)
+    finished_at = models.DateTimeField(_("finished at"), blank=True, null=True)
+    error = models.TextField(_("error"), blank=True)
+    filename = models.CharField(_("filename"), max_length=200, blank=True)
+    content_type = models.CharField(_("content type"), max_length=200, blank=True)
+    content = models.BinaryField(_("content"), null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["id"],
+                condition=Q(status=10),
+                name="workbench_job_queued_index",
+            )
+        ]
+        ordering = ["-pk"]
+        verbose_name = _("job")
+        verbose_name_plural = _("jobs")
+
+    def __str__(self):
+        return "%s %s" % (self.kind, self.pk)
+
+    def set_progress(self, done, total):
+        """
+        Stores the progress in percent, visible immediately to other
+        connections unless called inside a transaction
+        """
+        self.progress = min(100, int(100 * done / total)) if total else 100
+        Job.objects.filter(pk=self.pk).update(progress=self.progress)
+
+    def as_dict(self):
+        return {
+            "id": self.pk,
+            "kind": self.kind,
+            "status": self.get_status_display(),
+            "is_done": self.status == self.DONE,
+            "is_failed": self.status == self.FAILED,
+            "progress": self.progress,
+            "url": reverse("job_status", args=(self.pk,)),
+            "download_url": reverse("job_download", args=(self.pk,))
+            if self.status == self.DONE
+            else None,
+        }
@@ -1,13 +1,15 @@
 from django.contrib import messages
+from django.core.exceptions import PermissionDenied
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils.translation import gettext as _
 
-from workbench import generic
+from workbench import generic, jobs
+from workbench.accounts.features import FEATURES
 from workbench.offers.forms import OfferCopyForm, OfferDeleteForm
 from workbench.offers.models import Offer
 from workbench.projects.models import Project
-from workbench.tools.pdf import pdf_response
+from workbench.tools.pdf import batch_pdf_response, cached_pdf_response, pdf_response
 
 
 class OfferPDFView(generic.DetailView):
@@ -15,18 +17,13 @@ class OfferPDFView(generic.DetailView):
 
     def get(self, request, *args, **kwargs):
         self.object = self.get_object()
-
-        pdf, response = pdf_response(
-            self.object.code,
+        return cached_pdf_response(
+            self.object,
+            "process_offer",
             as_attachment=request.GET.get("disposition") == "attachment",
+            request=request,
         )
 
-        pdf.init_letter()
-        pdf.process_offer(self.object)
-        pdf.generate()
-
-        return response
-
 
 class ProjectOfferPDFView(generic.DetailView):
     model = Project
@@ -48,6 +45,39 @@ class ProjectOfferPDFView(generic.DetailView):
         return response
 
 
+def _project_offers_pdf_parameters(request):
+    if not request.user.features[FEATURES.CONTROLLING]:
+        raise PermissionDenied
+    if request.GET.get("format", "pdf") not in {"pdf", "zip"}:
+        raise ValueError("Invalid format.")
+    project = get_object_or_404(Project, pk=request.GET.get("project"))
+    if not project.offers.exists():
+        raise ValueError("No offers in project.")
+    return {"project": project.pk, "format": request.GET.get("format", "pdf")}
+
+
+@jobs.register("project_offers_pdf", prepare=_project_offers_pdf_parameters)
+def project_offers_pdf_job(job, *, project, format):
+    project = Project.objects.get(pk=project)
+    offers = list(
+        project.offers.order_by("_code")
+        .select_related("owned_by", "project")
+        .prefetch_related("services")
+    )
+    if format == "zip":
+        return batch_pdf_response(
+            offers,
+            "process_offer",
+            filename=project.code,
+            merge=False,
+            progress=job.set_progress,
+        )
+
+    pdf, response = pdf_response(project.code, as_attachment=True)
+    pdf.offers_pdf(project=project, offers=offers)
+    return response
+
+
 class OfferDeleteView(generic.DeleteView):
     delete_form_class = OfferDeleteForm
 
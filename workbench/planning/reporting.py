@@ -1,4 +1,5 @@
 import datetime as dt
+from bisect import bisect_left, bisect_right
 from collections import defaultdict
 from itertools import islice
 
@@ -10,33 +11,48 @@ from workbench.awt.models import Absence
 from workbench.invoices.utils import recurring
 from workbench.logbook.models import LoggedHours
 from workbench.planning.models import PlannedWork, PlanningRequest
+from workbench.reporting.caching import cached
 from workbench.tools.formats import Z1, Z2, local_date_format
 from workbench.tools.reporting import query
 from workbench.tools.validation import monday
 
 
-def _period(weeks, min, max):
-    try:
-        start = weeks.index(min)
-    except ValueError:
-        start = 0
+#: Tables read by the planning reports
+TABLES = [
+    "accounts_team_members",
+    "accounts_user",
+    "awt_absence",
+    "awt_employment",
+    "logbook_loggedhours",
+    "offers_offer",
+    "planning_plannedwork",
+    "planning_planningrequest",
+    "planning_planningrequest_receivers",
+    "projects_project",
+    "projects_service",
+]
 
-    try:
-        end = weeks.index(max)
-    except ValueError:
-        end = len(weeks) - 1
 
-    return [start, end]
+def _period(week_index, min, max):
+    return [week_index.get(min, 0), week_index.get(max, len(week_index) - 1)]
 
 
 class Planning:
+    """
+    Planned work, planning requests and absences of the given weeks
+
+    Hours are accumulated in lists indexed by the position of the week in
+    ``weeks``; weeks outside the range are skipped right away.
+    """
+
     def __init__(self, *, weeks, users=None):
         self.weeks = weeks
         self.users = users
+        self._week_index = {week: idx for idx, week in enumerate(weeks)}
 
-        self._by_week = defaultdict(lambda: Z1)
-        self._requested_by_week = defaultdict(lambda: Z1)
-        self._by_project_and_week = defaultdict(lambda: defaultdict(lambda: Z1))
+        self._by_week = self._zeros()
+        self._requested_by_week = self._zeros()
+        self._by_project_and_week = defaultdict(self._zeros)
         self._projects_offers = defaultdict(lambda: defaultdict(list))
         self._project_ids = set()
         self._user_ids = {user.id for user in users} if users else set()
@@ -46,14 +62,24 @@ class Planning:
 
         self._absences = defaultdict(lambda: [0] * len(weeks))
 
+    def _zeros(self):
+        return [Z1] * len(self.weeks)
+
+    def _indices(self, weeks):
+        return [self._week_index[week] for week in weeks if week in self._week_index]
+
     def add_planned_work(self, queryset):
         for pw in queryset.filter(weeks__overlap=self.weeks).select_related(
             "user", "project__owned_by", "offer__project", "offer__owned_by", "request"
         ):
             per_week = (pw.planned_hours / len(pw.weeks)).quantize(Z2)
-            for week in pw.weeks:
-                self._by_week[week] += per_week
-                self._by_project_and_week[pw.project][week] += per_week
+            indices = self._indices(pw.weeks)
+            by_project = self._by_project_and_week[pw.project]
+            hours_per_week = self._zeros()
+            for idx in indices:
+                self._by_week[idx] += per_week
+                by_project[idx] += per_week
+                hours_per_week[idx] = per_week
 
             date_from = min(pw.weeks)
             date_until = max(pw.weeks) + dt.timedelta(days=6)
@@ -79,9 +105,7 @@ class Planning:
                         if pw.request
                         else False,
                     },
-                    "hours_per_week": [
-                        per_week if week in pw.weeks else Z1 for week in self.weeks
-                    ],
+                    "hours_per_week": hours_per_week,
                     "per_week": per_week,
                 }
             )
@@ -99,8 +123,8 @@ class Planning:
             .prefetch_related("receivers")
         ).distinct():
             per_week = (pr.missing_hours / len(pr.weeks)).quantize(Z2)
-            for week in pr.weeks:
-                self._requested_by_week[week] += per_week
+            for idx in self._indices(pr.weeks):
+                self._requested_by_week[idx] += per_week
 
             date_from = min(pr.weeks)
             date_until = max(pr.weeks) + dt.timedelta(days=6)
@@ -124,7 +148,9 @@ class Planning:
                             local_date_format(date_from, fmt="d.m."),
                             local_date_format(date_until, fmt="d.m."),
                         ),
-                        "period": _period(self.weeks, min(pr.weeks), max(pr.weeks)),
+                        "period": _period(
+                            self._week_index, min(pr.weeks), max(pr.weeks)
+                        ),
                         "is_provisional": pr.is_provisional,
                     },
                     "per_week": per_week,
@@ -153,15 +179,17 @@ class Planning:
             date_from = monday(absence.starts_on)
             date_until = monday(absence.ends_on or absence.starts_on)
             hours = absence.days * absence.user.planning_hours_per_day
-            weeks = [
-                (idx, week)
-                for idx, week in enumerate(self.weeks)
-                if date_from <= week <= date_until
-            ]
+            indices = range(
+                bisect_left(self.weeks, date_from), bisect_right(self.weeks, date_until)
+            )
+            if not indices:
+                continue
 
-            for idx, week in weeks:
-                self._absences[absence.user][idx] += hours / len(weeks)
-                self._by_week[week] += hours / len(weeks)
+            per_week = hours / len(indices)
+            absences = self._absences[absence.user]
+            for idx in indices:
+                absences[idx] += per_week
+                self._by_week[idx] += per_week
 
     def _sort_work_list(self, work_list):
         for_requests = {}
@@ -277,15 +305,13 @@ class Planning:
                 "planned_hours": hours,
                 "worked_hours": self._worked_hours_by_project[project.id],
             },
-            "by_week": [
-                self._by_project_and_week[project][week] for week in self.weeks
-            ],
+            "by_week": self._by_project_and_week[project],
             "offers": offers,
         }
 
     def capacity(self):
-        by_user = defaultdict(dict)
-        total = defaultdict(int)
+        by_user = defaultdict(lambda: [0] * len(self.weeks))
+        total = [0] * len(self.weeks)
 
         user_ids = (
             [user.id for user in self.users] if self.users else list(self._user_ids)
@@ -306,19 +332,21 @@ where percentage is not NULL -- NULL produced by outer join
             """,
             [min(self.weeks), max(self.weeks), user_ids],
         ):
-            by_user[user][week.date()] = capacity
-            total[week.date()] += capacity
+            idx = self._week_index.get(week.date())
+            if idx is not None:
+                by_user[user][idx] = capacity
+                total[idx] += capacity
 
         users = self.users or list(User.objects.filter(id__in=by_user))
         return {
-            "total": [total.get(week, 0) for week in self.weeks],
+            "total": total,
             "by_user": [
                 {
                     "user": {
                         "name": user.get_full_name(),
                         "url": user.urls["planning"],
                     },
-                    "capacity": [by_user[user.id].get(week, 0) for week in self.weeks],
+                    "capacity": by_user[user.id],
                 }
                 for user in sorted(users)
             ],
@@ -356,8 +384,8 @@ where percentage is not NULL -- NULL produced by outer join
                     -row["project"]["planned_hours"],
                 ),
             ),
-            "by_week": [self._by_week[week] for week in self.weeks],
-            "requested_by_week": [self._requested_by_week[week] for week in self.weeks],
+            "by_week": self._by_week,
+            "requested_by_week": self._requested_by_week,
             "absences": [
                 (str(user), lst) for user, lst in sorted(self._absences.items())
             ],
@@ -365,6 +393,7 @@ where percentage is not NULL -- NULL produced by outer join
         }
 
 
+@cached(*TABLES)
 def user_planning(user):
     weeks = list(islice(recurring(monday() - dt.timedelta(days=14), "weekly"), 80))
     planning = Planning(weeks=weeks, users=[user])
@@ -375,6 +404,7 @@ def user_planning(user):
     return planning.report()
 
 
+@cached(*TABLES)
 def team_planning(team):
     weeks = list(islice(recurring(monday() - dt.timedelta(days=14), "weekly"), 80))
     planning = Planning(weeks=weeks, users=list(team.members.active()))
@@ -389,6 +419,7 @@ def team_planning(team):
     return planning.report()
 
 
+@cached(*TABLES)
 def project_planning(project):
     with connections["default"].cursor() as cursor:
         cursor.execute(
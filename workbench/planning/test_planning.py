@@ -338,6 +338,30 @@ class PlanningTest(TestCase):
         report = reporting.project_planning(pw.project)
         self.assertIsNone(report["this_week_index"])
 
+    def test_hours_by_week(self):
+        """Hours are only distributed over weeks which are part of the report"""
+        weeks = [monday() + dt.timedelta(days=7 * i) for i in range(-3, 0)]
+        pw = factories.PlannedWorkFactory.create(weeks=weeks, planned_hours=30)
+        factories.AbsenceFactory.create(
+            user=pw.user,
+            starts_on=weeks[1],
+            ends_on=weeks[2] + dt.timedelta(days=7),
+            days=3,
+        )
+
+        report = reporting.user_planning(pw.user)
+        self.assertEqual(
+            report["by_week"][:4],
+            [Decimal("16"), Decimal("16"), Decimal("6"), Decimal("0")],
+        )
+        self.assertEqual(report["absences"][0][1][:4], [6, 6, 6, 0])
+        self.assertEqual(
+            report["projects_offers"][0]["offers"][0]["work_list"][0]["hours_per_week"][
+                :3
+            ],
+            [Decimal("10.00"), Decimal("10.00"), Decimal("0.0")],
+        )
+
     def test_planning_request_notification(self):
         """Receivers of a planning request are notified"""
         pr = factories.PlanningRequestFactory.create()
@@ -11,6 +11,7 @@ from workbench.circles.models import Role
 from workbench.contacts.models import Organization, Person
 from workbench.projects.models import Campaign, Project, Service
 from workbench.services.models import ServiceType
+from workbench.timer.models import slices_changed
 from workbench.tools.forms import Autocomplete, Form, ModelForm, Textarea, add_prefix
 from workbench.tools.validation import in_days, is_title_specific
 
@@ -454,6 +455,12 @@ class ReassignLogbookForm(Form):
 
     def save(self):
         service = self.cleaned_data["service"]
+        # Bulk updates do not send signals
+        slices_changed(
+            self.from_service.loggedhours.order_by().values_list(
+                "rendered_by", flat=True
+            )
+        )
         self.from_service.loggedhours.update(service=service)
         self.from_service.loggedcosts.update(service=service)
 
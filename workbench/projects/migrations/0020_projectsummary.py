@@ -0,0 +1,45 @@
+# Generated by Django 3.1.5 on 2026-10-18 02:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from workbench.projects import summary
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("logbook", "0021_loggedhoursrollup"),
+        ("offers", "0010_offer__fts"),
+        ("projects", "0019_auto_20200523_0929"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProjectSummary",
+            fields=[
+                (
+                    "project",
+                    models.OneToOneField(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        primary_key=True,
+                        related_name="+",
+                        serialize=False,
+                        to="projects.project",
+                        verbose_name="project",
+                    ),
+                ),
+                (
+                    "version",
+                    models.PositiveIntegerField(default=0, verbose_name="version"),
+                ),
+                ("data", models.JSONField(blank=True, null=True, verbose_name="data")),
+            ],
+            options={
+                "verbose_name": "project summary",
+                "verbose_name_plural": "project summaries",
+            },
+        ),
+        migrations.RunSQL(summary.TRIGGER, summary.DROP_TRIGGER),
+    ]
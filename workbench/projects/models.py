@@ -5,7 +5,7 @@ from functools import total_ordering
 
 from django.contrib import messages
 from django.db import models
-from django.db.models import F, Prefetch, Q, Sum
+from django.db.models import F, Prefetch, Q
 from django.db.models.expressions import RawSQL
 from django.utils import timezone
 from django.utils.functional import cached_property
@@ -263,7 +263,16 @@ class Project(Model):
             super().save(*args, **kwargs)
             self.refresh_from_db()
 
-        self._fts = " ".join(
+        self._fts = self._build_fts()
+        if new:
+            super().save()
+        else:
+            super().save(*args, **kwargs)
+
+    save.alters_data = True
+
+    def _build_fts(self):
+        return " ".join(
             str(part)
             for part in [
                 self.code,
@@ -271,12 +280,6 @@ class Project(Model):
                 self.contact.full_name if self.contact else "",
             ]
         )
-        if new:
-            super().save()
-        else:
-            super().save(*args, **kwargs)
-
-    save.alters_data = True
 
     def clean_fields(self, exclude=None):
         super().clean_fields(exclude=exclude)
@@ -312,7 +315,7 @@ class Project(Model):
     def grouped_services(self):
         # Avoid circular imports
         from workbench.deals.models import Deal
-        from workbench.logbook.models import LoggedCost, LoggedHours
+        from workbench.projects.summary import summary
 
         # Logged vs. service hours
         service_hours = defaultdict(lambda: Z1)
@@ -337,44 +340,20 @@ class Project(Model):
         logged_hours_per_service_and_user = defaultdict(dict)
         logged_hours_per_user = defaultdict(lambda: Z1)
         logged_hours_per_effort_rate = defaultdict(lambda: Z1)
-
-        for row in (
-            LoggedHours.objects.order_by()
-            .filter(service__project=self)
-            .values("service", "rendered_by")
-            .annotate(Sum("hours"))
-        ):
-            logged_hours_per_user[row["rendered_by"]] += row["hours__sum"]
-            logged_hours_per_service_and_user[row["service"]][row["rendered_by"]] = row[
-                "hours__sum"
-            ]
-
-        logged_cost_per_service = {
-            row["service"]: row["cost__sum"]
-            for row in LoggedCost.objects.order_by()
-            .filter(service__project=self)
-            .values("service")
-            .annotate(Sum("cost"))
-        }
-
-        not_archived_logged_hours_per_service = {
-            row["service"]: row["hours__sum"]
-            for row in LoggedHours.objects.order_by()
-            .filter(
-                service__project=self,
-                archived_at__isnull=True,
-                service__effort_rate__isnull=False,
-            )
-            .values("service")
-            .annotate(Sum("hours"))
-        }
-        not_archived_logged_cost_per_service = {
-            row["service"]: row["cost__sum"]
-            for row in LoggedCost.objects.order_by()
-            .filter(service__project=self, archived_at__isnull=True)
-            .values("service")
-            .annotate(Sum("cost"))
-        }
+        logged_cost_per_service = {}
+        not_archived_logged_hours_per_service = defaultdict(lambda: Z1)
+        not_archived_logged_cost_per_service = {}
+
+        totals = summary(self)
+        for service, user, hours, not_archived_hours in totals["hours"]:
+            logged_hours_per_user[user] += hours
+            logged_hours_per_service_and_user[service][user] = hours
+            if not_archived_hours:
+                not_archived_logged_hours_per_service[service] += not_archived_hours
+        for service, cost, not_archived_cost in totals["cost"]:
+            logged_cost_per_service[service] = cost
+            if not_archived_cost is not None:
+                not_archived_logged_cost_per_service[service] = not_archived_cost
 
         users = {
             user.id: user
@@ -393,8 +372,10 @@ class Project(Model):
                     reverse=True,
                 ),
                 "logged_cost": logged_cost_per_service.get(service.id, Z2),
-                "not_archived_logged_hours": not_archived_logged_hours_per_service.get(
-                    service.id, Z1
+                "not_archived_logged_hours": (
+                    not_archived_logged_hours_per_service[service.id]
+                    if service.effort_rate is not None
+                    else Z1
                 ),
                 "not_archived_logged_cost": not_archived_logged_cost_per_service.get(
                     service.id, Z1
@@ -484,27 +465,28 @@ class Project(Model):
     @cached_property
     def not_archived_total(self):
         # Avoid circular imports
-        from workbench.logbook.models import LoggedCost, LoggedHours
+        from workbench.projects.summary import summary
 
+        effort_rates = dict(self.services.values_list("id", "effort_rate"))
+        totals = summary(self)
         total = Z2
         hours_rate_undefined = Z1
 
-        for row in (
-            LoggedHours.objects.order_by()
-            .filter(service__project=self, archived_at__isnull=True)
-            .values("service__effort_rate")
-            .annotate(Sum("hours"))
-        ):
-            if row["service__effort_rate"] is None:
-                hours_rate_undefined += row["hours__sum"]
+        for service, user, hours, not_archived_hours in totals["hours"]:
+            if not not_archived_hours:
+                continue
+            elif effort_rates[service] is None:
+                hours_rate_undefined += not_archived_hours
             else:
-                total += row["hours__sum"] * row["service__effort_rate"]
+                total += not_archived_hours * effort_rates[service]
 
-        total += (
-            LoggedCost.objects.order_by()
-            .filter(service__project=self, archived_at__isnull=True)
-            .aggregate(Sum("cost"))["cost__sum"]
-            or Z2
+        total += sum(
+            (
+                not_archived_cost
+                for service, cost, not_archived_cost in totals["cost"]
+                if not_archived_cost
+            ),
+            Z2,
         )
         return {"total": total, "hours_rate_undefined": hours_rate_undefined}
 
@@ -631,3 +613,27 @@ class Service(ServiceBase):
     @property
     def is_declined(self):
         return self.offer.is_declined if self.offer else False
+
+
+class ProjectSummary(models.Model):
+    """
+    Precomputed logbook totals of a project, see ``workbench.projects.summary``
+    """
+
+    project = models.OneToOneField(
+        Project,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        primary_key=True,
+        related_name="+",
+        verbose_name=_("project"),
+    )
+    version = models.PositiveIntegerField(_("version"), default=0)
+    data = models.JSONField(_("data"), blank=True, null=True)
+
+    class Meta:
+        verbose_name = _("project summary")
+        verbose_name_plural = _("project summaries")
+
+    def __str__(self):
+        return str(self.project_id)
@@ -4,6 +4,7 @@ from django.db.models import Sum
 
 from workbench.accounts.models import User
 from workbench.contacts.models import Organization
+from workbench.logbook import rollup
 from workbench.logbook.models import LoggedHours
 from workbench.projects.models import Project, Service
 from workbench.tools.formats import Z1
@@ -61,15 +62,13 @@ def hours_per_customer(date_range, *, users=None):
     seen_organizations = set()
     seen_users = set()
 
-    queryset = LoggedHours.objects.order_by().filter(rendered_on__range=date_range)
-    if users:
-        queryset = queryset.filter(rendered_by__in=users)
-
-    for row in queryset.values("rendered_by", "service__project__customer").annotate(
-        Sum("hours")
+    for row in rollup.hours(
+        ["rendered_by", "service__project__customer"],
+        date_range=date_range,
+        users=users,
     ):
-        hours[row["service__project__customer"]][row["rendered_by"]] = row["hours__sum"]
-        user_hours[row["rendered_by"]] += row["hours__sum"]
+        hours[row["service__project__customer"]][row["rendered_by"]] = row["hours"]
+        user_hours[row["rendered_by"]] += row["hours"]
         seen_organizations.add(row["service__project__customer"])
         seen_users.add(row["rendered_by"])
 
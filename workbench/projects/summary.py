@@ -0,0 +1,204 @@
+"""
+Persistent per-project summary of logbook totals
+
+``Project.grouped_services`` and ``Project.not_archived_total`` read the
+logged hours per service and user and the logged costs per service from
+here instead of aggregating the logbook on every request.
+
+Database triggers on logged hours, logged costs, services and offers bump
+the ``version`` of the affected project's summary and clear its data. A
+summary is only stored if its version did not change while computing it,
+so concurrent changes to the logbook never leave stale totals behind.
+"""
+
+import logging
+from collections import Counter
+from decimal import Decimal
+
+from django.db.models import Q, Sum
+
+from workbench.logbook.models import LoggedCost, LoggedHours
+from workbench.projects.models import ProjectSummary
+
+
+logger = logging.getLogger(__name__)
+
+#: Hits and misses of the current process
+stats = Counter()
+
+
+TRIGGER = """\
+CREATE OR REPLACE FUNCTION projects_projectsummary_invalidate(project integer)
+RETURNS void AS $$
+begin
+  IF project IS NOT NULL THEN
+    INSERT INTO projects_projectsummary (project_id, version, data)
+    VALUES (project, 1, NULL)
+    ON CONFLICT (project_id) DO UPDATE SET
+      version=projects_projectsummary.version + 1,
+      data=NULL;
+  END IF;
+end
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION projects_projectsummary_project_trigger()
+RETURNS trigger AS $$
+begin
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    PERFORM projects_projectsummary_invalidate(OLD.project_id);
+  END IF;
+  IF TG_OP = 'INSERT'
+      OR (TG_OP = 'UPDATE' AND NEW.project_id <> OLD.project_id) THEN
+    PERFORM projects_projectsummary_invalidate(NEW.project_id);
+  END IF;
+  RETURN NULL;
+end
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION projects_projectsummary_logbook_trigger()
+RETURNS trigger AS $$
+begin
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    PERFORM projects_projectsummary_invalidate(
+      (SELECT project_id FROM projects_service WHERE id=OLD.service_id)
+    );
+  END IF;
+  IF TG_OP = 'INSERT'
+      OR (TG_OP = 'UPDATE' AND NEW.service_id <> OLD.service_id) THEN
+    PERFORM projects_projectsummary_invalidate(
+      (SELECT project_id FROM projects_service WHERE id=NEW.service_id)
+    );
+  END IF;
+  RETURN NULL;
+end
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION projects_projectsummary_delete_trigger()
+RETURNS trigger AS $$
+begin
+  DELETE FROM projects_projectsummary WHERE project_id=OLD.id;
+  RETURN NULL;
+end
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS projects_projectsummary_trigger ON projects_service;
+CREATE TRIGGER projects_projectsummary_trigger
+  AFTER INSERT OR UPDATE OR DELETE ON projects_service
+  FOR EACH ROW EXECUTE PROCEDURE projects_projectsummary_project_trigger();
+
+DROP TRIGGER IF EXISTS projects_projectsummary_trigger ON offers_offer;
+CREATE TRIGGER projects_projectsummary_trigger
+  AFTER INSERT OR UPDATE OR DELETE ON offers_offer
+  FOR EACH ROW EXECUTE PROCEDURE projects_projectsummary_project_trigger();
+
+DROP TRIGGER IF EXISTS projects_projectsummary_trigger ON logbook_loggedhours;
+CREATE TRIGGER projects_projectsummary_trigger
+  AFTER INSERT OR UPDATE OR DELETE ON logbook_loggedhours
+  FOR EACH ROW EXECUTE PROCEDURE projects_projectsummary_logbook_trigger();
+
+DROP TRIGGER IF EXISTS projects_projectsummary_trigger ON logbook_loggedcost;
+CREATE TRIGGER projects_projectsummary_trigger
+  AFTER INSERT OR UPDATE OR DELETE ON logbook_loggedcost
+  FOR EACH ROW EXECUTE PROCEDURE projects_projectsummary_logbook_trigger();
+
+DROP TRIGGER IF EXISTS projects_projectsummary_trigger ON projects_project;
+CREATE TRIGGER projects_projectsummary_trigger
+  AFTER DELETE ON projects_project
+  FOR EACH ROW EXECUTE PROCEDURE projects_projectsummary_delete_trigger();
+"""
+
+DROP_TRIGGER = """\
+DROP TRIGGER IF EXISTS projects_projectsummary_trigger ON projects_service;
+DROP TRIGGER IF EXISTS projects_projectsummary_trigger ON offers_offer;
+DROP TRIGGER IF EXISTS projects_projectsummary_trigger ON logbook_loggedhours;
+DROP TRIGGER IF EXISTS projects_projectsummary_trigger ON logbook_loggedcost;
+DROP TRIGGER IF EXISTS projects_projectsummary_trigger ON projects_project;
+DROP FUNCTION IF EXISTS projects_projectsummary_delete_trigger();
+DROP FUNCTION IF EXISTS projects_projectsummary_logbook_trigger();
+DROP FUNCTION IF EXISTS projects_projectsummary_project_trigger();
+DROP FUNCTION IF EXISTS projects_projectsummary_invalidate(integer);
+"""
+
+
+def _str(value):
+    return None if value is None else str(value)
+
+
+def _decimal(value):
+    return None if value is None else Decimal(value)
+
+
+def _compute(project):
+    not_archived = Q(archived_at__isnull=True)
+    return {
+        "hours": [
+            [
+                row["service"],
+                row["rendered_by"],
+                str(row["logged"]),
+                _str(row["not_archived"]),
+            ]
+            for row in LoggedHours.objects.order_by()
+            .filter(service__project=project)
+            .values("service", "rendered_by")
+            .annotate(
+                logged=Sum("hours"), not_archived=Sum("hours", filter=not_archived)
+            )
+        ],
+        "cost": [
+            [row["service"], str(row["logged"]), _str(row["not_archived"])]
+            for row in LoggedCost.objects.order_by()
+            .filter(service__project=project)
+            .values("service")
+            .annotate(logged=Sum("cost"), not_archived=Sum("cost", filter=not_archived))
+        ],
+    }
+
+
+def summary(project):
+    """
+    Returns the logbook totals of ``project``
+
+    The return value is a dictionary with the following keys:
+
+    - ``hours``: A list of ``(service_id, user_id, hours, not_archived)``
+      tuples.
+    - ``cost``: A list of ``(service_id, cost, not_archived)`` tuples.
+
+    Not archived totals are ``None`` if everything has been archived already.
+    """
+    row = (
+        ProjectSummary.objects.filter(project=project)
+        .values_list("version", "data")
+        .first()
+    )
+    if row and row[1] is not None:
+        stats["hits"] += 1
+        data = row[1]
+    else:
+        stats["misses"] += 1
+        data = _compute(project)
+        if row:
+            ProjectSummary.objects.filter(project=project, version=row[0]).update(
+                data=data
+            )
+        else:
+            ProjectSummary.objects.bulk_create(
+                [ProjectSummary(project=project, data=data)], ignore_conflicts=True
+            )
+    logger.debug(
+        "Project summary of %s: %s hits, %s misses",
+        project.pk,
+        stats["hits"],
+        stats["misses"],
+    )
+
+    return {
+        "hours": [
+            (service, user, Decimal(hours), _decimal(na))
+            for service, user, hours, na in data["hours"]
+        ],
+        "cost": [
+            (service, Decimal(cost), _decimal(na)) for service, cost, na in data["cost"]
+        ],
+    }
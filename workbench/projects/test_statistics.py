@@ -2,10 +2,13 @@ import datetime as dt
 from decimal import Decimal
 
 from django.test import TestCase
+from django.utils import timezone
 
 from workbench import factories
 from workbench.invoices.models import Invoice
-from workbench.projects.models import Project
+from workbench.logbook.models import LoggedHours
+from workbench.projects import summary
+from workbench.projects.models import Project, ProjectSummary
 from workbench.projects.reporting import hours_per_customer, overdrawn_projects
 from workbench.reporting import green_hours, project_budget_statistics
 from workbench.reporting.models import Accruals
@@ -170,6 +173,23 @@ class StatisticsTest(TestCase):
         self.assertEqual(stats["overall"]["delta_positive"], Decimal("1800.00"))
         self.assertEqual(stats["overall"]["delta_negative"], Decimal("0.00"))
 
+        self.assertEqual(
+            list(
+                project_budget_statistics.iter_project_budget_statistics(
+                    Project.objects.all()
+                )
+            ),
+            stats["statistics"],
+        )
+        self.assertEqual(
+            list(
+                project_budget_statistics.iter_project_budget_statistics(
+                    Project.objects.none()
+                )
+            ),
+            [],
+        )
+
     def create_projects(self):
         p_internal = factories.ProjectFactory.create(type=Project.INTERNAL)
         p_maintenance = factories.ProjectFactory.create(type=Project.MAINTENANCE)
@@ -267,3 +287,43 @@ class StatisticsTest(TestCase):
         self.client.force_login(hours.rendered_by)
         response = self.client.get(hours.service.project.urls["statistics"])
         self.assertEqual(response.status_code, 200)
+
+    def test_summary(self):
+        """Project summaries are cached and invalidated by the database"""
+        service = factories.ServiceFactory.create(effort_rate=100)
+        project = service.project
+        factories.LoggedHoursFactory.create(service=service, hours=2)
+
+        hits, misses = summary.stats["hits"], summary.stats["misses"]
+
+        def grouped_services(*, hits, misses):
+            gs = Project.objects.get(pk=project.pk).grouped_services
+            self.assertEqual(summary.stats["hits"], hits)
+            self.assertEqual(summary.stats["misses"], misses)
+            return gs
+
+        self.assertEqual(
+            grouped_services(hits=hits, misses=misses + 1)["logged_hours"], 2
+        )
+        self.assertEqual(
+            grouped_services(hits=hits + 1, misses=misses + 1)["logged_hours"], 2
+        )
+
+        factories.LoggedHoursFactory.create(service=service, hours=3)
+        gs = grouped_services(hits=hits + 1, misses=misses + 2)
+        self.assertEqual(gs["logged_hours"], 5)
+
+        service.loggedhours.update(archived_at=timezone.now())
+        self.assertEqual(
+            Project.objects.get(pk=project.pk).not_archived_total,
+            {"total": Z2, "hours_rate_undefined": Z1},
+        )
+
+        other = factories.ServiceFactory.create(project=project)
+        service.loggedhours.update(service=other)
+        gs = grouped_services(hits=hits + 1, misses=misses + 4)
+        self.assertEqual(gs["total_logged_hours_rate_undefined"], 5)
+
+        LoggedHours.objects.all().delete()
+        project.delete()
+        self.assertEqual(ProjectSummary.objects.count(), 0)
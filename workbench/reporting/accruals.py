@@ -0,0 +1,194 @@
+"""
+Accruals for many cutoff dates at once
+
+``accruals()`` computes the sum of negative project deltas (logbook minus
+invoiced) for any number of cutoff dates in one pass over the logbook and
+the invoices: Movements are bucketed into the cutoff intervals and summed up
+cumulatively per project using a window function.
+
+Database triggers on the logbook, invoices, services and projects mark all
+stored ``Accruals`` whose cutoff date is on or after the day of a change as
+stale, so that ``AccrualsQuerySet.for_cutoff_dates`` only has to recompute
+those.
+"""
+
+from django.db import connections
+from django.utils import timezone
+
+from workbench.invoices.models import Invoice
+from workbench.tools.formats import Z2
+
+
+TRIGGER = """\
+CREATE OR REPLACE FUNCTION reporting_accruals_invalidate(day date)
+RETURNS void AS $$
+begin
+  IF day IS NOT NULL THEN
+    UPDATE reporting_accruals SET is_stale=TRUE
+    WHERE cutoff_date>=day AND NOT is_stale;
+  END IF;
+end
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION reporting_accruals_logbook_trigger()
+RETURNS trigger AS $$
+begin
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    PERFORM reporting_accruals_invalidate(OLD.rendered_on);
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    PERFORM reporting_accruals_invalidate(NEW.rendered_on);
+  END IF;
+  RETURN NULL;
+end
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION reporting_accruals_invoice_trigger()
+RETURNS trigger AS $$
+begin
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    PERFORM reporting_accruals_invalidate(OLD.invoiced_on);
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    PERFORM reporting_accruals_invalidate(NEW.invoiced_on);
+  END IF;
+  RETURN NULL;
+end
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION reporting_accruals_service_trigger()
+RETURNS trigger AS $$
+begin
+  PERFORM reporting_accruals_invalidate(least(
+    (SELECT MIN(rendered_on) FROM logbook_loggedhours WHERE service_id=NEW.id),
+    (SELECT MIN(rendered_on) FROM logbook_loggedcost WHERE service_id=NEW.id)
+  ));
+  RETURN NULL;
+end
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION reporting_accruals_project_trigger()
+RETURNS trigger AS $$
+begin
+  PERFORM reporting_accruals_invalidate(least(
+    OLD.closed_on, NEW.closed_on, OLD.created_at::date, NEW.created_at::date
+  ));
+  RETURN NULL;
+end
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS reporting_accruals_trigger ON logbook_loggedhours;
+CREATE TRIGGER reporting_accruals_trigger
+  AFTER INSERT OR DELETE OR UPDATE OF service_id, rendered_on, hours
+  ON logbook_loggedhours
+  FOR EACH ROW EXECUTE PROCEDURE reporting_accruals_logbook_trigger();
+
+DROP TRIGGER IF EXISTS reporting_accruals_trigger ON logbook_loggedcost;
+CREATE TRIGGER reporting_accruals_trigger
+  AFTER INSERT OR DELETE OR UPDATE OF service_id, rendered_on, cost
+  ON logbook_loggedcost
+  FOR EACH ROW EXECUTE PROCEDURE reporting_accruals_logbook_trigger();
+
+DROP TRIGGER IF EXISTS reporting_accruals_trigger ON invoices_invoice;
+CREATE TRIGGER reporting_accruals_trigger
+  AFTER INSERT OR DELETE
+    OR UPDATE OF project_id, invoiced_on, status, total_excl_tax
+  ON invoices_invoice
+  FOR EACH ROW EXECUTE PROCEDURE reporting_accruals_invoice_trigger();
+
+DROP TRIGGER IF EXISTS reporting_accruals_trigger ON projects_service;
+CREATE TRIGGER reporting_accruals_trigger
+  AFTER UPDATE OF project_id, effort_rate ON projects_service
+  FOR EACH ROW EXECUTE PROCEDURE reporting_accruals_service_trigger();
+
+DROP TRIGGER IF EXISTS reporting_accruals_trigger ON projects_project;
+CREATE TRIGGER reporting_accruals_trigger
+  AFTER UPDATE OF closed_on, created_at ON projects_project
+  FOR EACH ROW EXECUTE PROCEDURE reporting_accruals_project_trigger();
+"""
+
+DROP_TRIGGER = """\
+DROP TRIGGER IF EXISTS reporting_accruals_trigger ON logbook_loggedhours;
+DROP TRIGGER IF EXISTS reporting_accruals_trigger ON logbook_loggedcost;
+DROP TRIGGER IF EXISTS reporting_accruals_trigger ON invoices_invoice;
+DROP TRIGGER IF EXISTS reporting_accruals_trigger ON projects_service;
+DROP TRIGGER IF EXISTS reporting_accruals_trigger ON projects_project;
+DROP FUNCTION IF EXISTS reporting_accruals_project_trigger();
+DROP FUNCTION IF EXISTS reporting_accruals_service_trigger();
+DROP FUNCTION IF EXISTS reporting_accruals_invoice_trigger();
+DROP FUNCTION IF EXISTS reporting_accruals_logbook_trigger();
+DROP FUNCTION IF EXISTS reporting_accruals_invalidate(date);
+"""
+
+SQL = """\
+WITH
+cutoffs AS (
+  SELECT cutoff_date, LAG(cutoff_date) OVER (ORDER BY cutoff_date) AS previous
+  FROM unnest(%s::date[]) AS cutoff_date
+),
+movements AS (
+  SELECT ps.project_id, lh.rendered_on AS day, lh.hours * ps.effort_rate AS amount
+  FROM logbook_loggedhours lh
+  INNER JOIN projects_service ps ON lh.service_id=ps.id
+
+  UNION ALL
+
+  SELECT ps.project_id, lc.rendered_on, lc.cost
+  FROM logbook_loggedcost lc
+  INNER JOIN projects_service ps ON lc.service_id=ps.id
+
+  UNION ALL
+
+  SELECT project_id, invoiced_on, -total_excl_tax
+  FROM invoices_invoice
+  WHERE project_id IS NOT NULL AND status=ANY(%s)
+),
+increments AS (
+  SELECT m.project_id, c.cutoff_date, SUM(m.amount) AS amount
+  FROM movements m
+  INNER JOIN cutoffs c
+    ON m.day<=c.cutoff_date AND (c.previous IS NULL OR m.day>c.previous)
+  GROUP BY m.project_id, c.cutoff_date
+),
+deltas AS (
+  SELECT
+    p.project_id,
+    c.cutoff_date,
+    SUM(COALESCE(i.amount, 0)) OVER (
+      PARTITION BY p.project_id ORDER BY c.cutoff_date
+    ) AS delta
+  FROM (SELECT DISTINCT project_id FROM increments) p
+  CROSS JOIN cutoffs c
+  LEFT JOIN increments i
+    ON i.project_id=p.project_id AND i.cutoff_date=c.cutoff_date
+)
+SELECT c.cutoff_date, SUM(d.delta) FILTER (WHERE d.delta<0)
+FROM cutoffs c
+LEFT JOIN (deltas d INNER JOIN projects_project p ON d.project_id=p.id)
+  ON d.cutoff_date=c.cutoff_date
+  AND (p.closed_on IS NULL OR p.closed_on>c.cutoff_date)
+  AND p.created_at<(c.cutoff_date + 1)::timestamp AT TIME ZONE %s
+GROUP BY c.cutoff_date
+"""
+
+
+def accruals(cutoff_dates):
+    """
+    Returns a dictionary mapping each cutoff date to its accruals
+
+    The result for a single cutoff date equals the ``delta_negative`` total
+    of ``project_budget_statistics`` for all projects open on that day.
+    """
+    cutoff_dates = sorted(set(cutoff_dates))
+    if not cutoff_dates:
+        return {}
+    with connections["default"].cursor() as cursor:
+        cursor.execute(
+            SQL,
+            [
+                cutoff_dates,
+                list(Invoice.INVOICED_STATUSES),
+                timezone.get_current_timezone_name(),
+            ],
+        )
+        return {day: value or Z2 for day, value in cursor}
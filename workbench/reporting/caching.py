@@ -0,0 +1,404 @@
+"""
+Caching of expensive reporting functions
+
+Functions decorated with ``cached()`` store their return value in the
+``reporting`` cache. The cache key is derived from the function arguments,
+today's date, the active language and the current version of all database
+tables the function reads from. Database triggers bump the version of a
+table when a transaction writing to it commits, so cached values never
+outlive the data they have been computed from. Until then, the writing
+transaction sees a version private to itself. The versions are only locked
+during the commit, always in the same order, so concurrent writers neither
+queue behind each other nor deadlock. Entries additionally expire after
+``TIMEOUT`` seconds and the least recently used entries are evicted once the
+cache is full.
+
+The cache backend is configured in ``settings.CACHES["reporting"]``. Apart
+from Django's ``LocMemCache`` this module offers a ``FileBasedCache`` with
+LRU eviction and a ``RedisCache`` for Redis compatible servers.
+"""
+
+import datetime as dt
+import hashlib
+import logging
+import os
+import pickle
+from contextlib import suppress
+from functools import wraps
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.filebased import FileBasedCache as _FileBasedCache
+from django.core.exceptions import EmptyResultSet
+from django.db import models
+from django.utils.functional import cached_property
+from django.utils.module_loading import import_string
+from django.utils.translation import get_language
+
+from workbench.tools.reporting import query
+
+
+logger = logging.getLogger(__name__)
+
+#: All cached functions, by name
+REGISTRY = {}
+
+_MISSING = object()
+
+
+TRIGGER = """\
+CREATE SEQUENCE IF NOT EXISTS reporting_tableversion_seq;
+
+CREATE OR REPLACE FUNCTION reporting_tableversion_record()
+RETURNS trigger AS $$
+DECLARE
+  pending text = coalesce(current_setting('reporting.tableversion', true), '');
+begin
+  IF TG_OP = 'TRUNCATE' THEN
+    -- No deferred row level trigger fires for TRUNCATE
+    UPDATE reporting_tableversion
+    SET version=nextval('reporting_tableversion_seq')
+    WHERE table_name=TG_TABLE_NAME;
+  END IF;
+
+  -- Remember the table and a new version private to this transaction
+  PERFORM set_config(
+    'reporting.tableversion',
+    regexp_replace(pending, '(^|;)' || TG_TABLE_NAME || '=[0-9]+;', '\\1')
+      || TG_TABLE_NAME || '=' || nextval('reporting_tableversion_seq') || ';',
+    true
+  );
+  RETURN NULL;
+end
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION reporting_tableversion_bump()
+RETURNS trigger AS $$
+DECLARE
+  pending text = coalesce(current_setting('reporting.tableversion', true), '');
+  tables text[];
+begin
+  IF pending = '' THEN
+    RETURN NULL;
+  END IF;
+  PERFORM set_config('reporting.tableversion', '', true);
+
+  SELECT array_agg(split_part(item, '=', 1)) INTO tables
+  FROM unnest(string_to_array(pending, ';')) item
+  WHERE item <> '';
+
+  -- Lock the rows in a consistent order to avoid deadlocks
+  PERFORM 1 FROM reporting_tableversion
+  WHERE table_name=ANY(tables)
+  ORDER BY table_name
+  FOR UPDATE;
+  UPDATE reporting_tableversion
+  SET version=nextval('reporting_tableversion_seq')
+  WHERE table_name=ANY(tables);
+  RETURN NULL;
+end
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION reporting_tableversion_track(target_table regclass)
+RETURNS void AS $$
+begin
+  INSERT INTO reporting_tableversion (table_name, version)
+  VALUES (target_table::text, nextval('reporting_tableversion_seq'))
+  ON CONFLICT (table_name) DO NOTHING;
+
+  EXECUTE 'DROP TRIGGER IF EXISTS reporting_tableversion_trigger ON '
+    || target_table;
+  EXECUTE 'DROP TRIGGER IF EXISTS reporting_tableversion_commit_trigger ON '
+    || target_table;
+  EXECUTE 'CREATE TRIGGER reporting_tableversion_trigger'
+    || ' AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON ' || target_table
+    || ' FOR EACH STATEMENT EXECUTE PROCEDURE reporting_tableversion_record()';
+  EXECUTE 'CREATE CONSTRAINT TRIGGER reporting_tableversion_commit_trigger'
+    || ' AFTER INSERT OR UPDATE OR DELETE ON ' || target_table
+    || ' DEFERRABLE INITIALLY DEFERRED'
+    || ' FOR EACH ROW EXECUTE PROCEDURE reporting_tableversion_bump()';
+end
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION reporting_tableversion_untrack(target_table regclass)
+RETURNS void AS $$
+begin
+  EXECUTE 'DROP TRIGGER IF EXISTS reporting_tableversion_trigger ON '
+    || target_table;
+  EXECUTE 'DROP TRIGGER IF EXISTS reporting_tableversion_commit_trigger ON '
+    || target_table;
+  DELETE FROM reporting_tableversion WHERE table_name=target_table::text;
+end
+$$ LANGUAGE plpgsql;
+"""
+
+DROP_TRIGGER = """\
+DROP FUNCTION IF EXISTS reporting_tableversion_untrack(regclass);
+DROP FUNCTION IF EXISTS reporting_tableversion_track(regclass);
+DROP FUNCTION IF EXISTS reporting_tableversion_bump();
+DROP FUNCTION IF EXISTS reporting_tableversion_record();
+DROP SEQUENCE IF EXISTS reporting_tableversion_seq;
+"""
+
+
+def track(tables):
+    """
+    Returns the SQL to bump the version of ``tables`` on writes
+    """
+    return "".join(
+        "SELECT reporting_tableversion_track('%s');\n" % table for table in tables
+    )
+
+
+def untrack(tables):
+    return "".join(
+        "SELECT reporting_tableversion_untrack('%s');\n" % table for table in tables
+    )
+
+
+def table_versions(tables):
+    """
+    Returns the versions of ``tables``
+
+    Tables written to by the current transaction get a version private to
+    the transaction until it is committed.
+    """
+    rows = query(
+        "SELECT table_name, version,"
+        " current_setting('reporting.tableversion', true)"
+        " FROM reporting_tableversion WHERE table_name=ANY(%s)",
+        [list(tables)],
+    )
+    pending = dict(
+        item.split("=") for item in ((rows and rows[0][2]) or "").split(";") if item
+    )
+    return {
+        table: "pending-%s" % pending[table] if table in pending else version
+        for table, version, _pending in rows
+    }
+
+
+def _key_part(value):
+    if isinstance(value, models.Model):
+        return (value._meta.label_lower, value.pk)
+    if isinstance(value, models.QuerySet):
+        try:
+            return (value.model._meta.label_lower, str(value.query))
+        except EmptyResultSet:
+            return (value.model._meta.label_lower, None)
+    if isinstance(value, (list, tuple)):
+        return tuple(_key_part(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(repr(_key_part(item)) for item in value))
+    if isinstance(value, dict):
+        return tuple(
+            sorted((repr(key), _key_part(item)) for key, item in value.items())
+        )
+    return value
+
+
+def _count(name, event):
+    cache = caches["reporting"]
+    key = "stats:%s:%s" % (name, event)
+    cache.add(key, 0, None)
+    with suppress(ValueError):
+        cache.incr(key)
+
+
+def cached(*tables, timeout=DEFAULT_TIMEOUT):
+    """
+    Caches the return value of the decorated function
+
+    ``tables`` have to list all database tables the function reads from;
+    they also have to be tracked by a ``track()`` call in a migration.
+    Return values have to be picklable.
+    """
+
+    def decorator(fn):
+        name = "%s.%s" % (fn.__module__, fn.__qualname__)
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            versions = table_versions(tables)
+            if len(versions) != len(tables):
+                logger.warning(
+                    "Not caching %s, untracked tables: %s",
+                    name,
+                    ", ".join(sorted(set(tables) - set(versions))),
+                )
+                return fn(*args, **kwargs)
+
+            key = "%s:%s" % (
+                name,
+                hashlib.md5(
+                    repr(
+                        (
+                            _key_part(args),
+                            _key_part(kwargs),
+                            sorted(versions.items()),
+                            dt.date.today(),
+                            get_language(),
+                        )
+                    ).encode("utf-8")
+                ).hexdigest(),
+            )
+            cache = caches["reporting"]
+            value = cache.get(key, _MISSING)
+            if value is _MISSING:
+                _count(name, "misses")
+                value = fn(*args, **kwargs)
+                cache.set(key, value, timeout)
+            else:
+                _count(name, "hits")
+            return value
+
+        wrapper.uncached = fn
+        wrapper.tables = tables
+        REGISTRY[name] = wrapper
+        return wrapper
+
+    return decorator
+
+
+def entries(cache):
+    """
+    Returns the number of entries in ``cache`` or ``None`` if unknown
+    """
+    if hasattr(cache, "entries"):
+        return cache.entries()
+    if hasattr(cache, "_cache"):  # LocMemCache
+        return len(cache._cache)
+    return None
+
+
+def statistics():
+    """
+    Returns hits and misses of all cached functions
+    """
+    cache = caches["reporting"]
+    rows = []
+    for name, fn in sorted(REGISTRY.items()):
+        hits = cache.get("stats:%s:hits" % name) or 0
+        misses = cache.get("stats:%s:misses" % name) or 0
+        rows.append(
+            {
+                "name": name,
+                "tables": fn.tables,
+                "hits": hits,
+                "misses": misses,
+                "ratio": hits / (hits + misses) if hits + misses else None,
+            }
+        )
+    return rows
+
+
+class FileBasedCache(_FileBasedCache):
+    """
+    File based cache evicting the least recently used entries when culling
+
+    Django's ``FileBasedCache`` removes random entries instead.
+    """
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        if value is _MISSING:
+            return default
+        with suppress(OSError):
+            os.utime(self._key_to_file(key, version))
+        return value
+
+    def _cull(self):
+        filelist = self._list_cache_files()
+        num_entries = len(filelist)
+        if num_entries < self._max_entries:
+            return
+        if self._cull_frequency == 0:
+            return self.clear()
+
+        def last_used(fname):
+            try:
+                return os.path.getmtime(fname)
+            except OSError:
+                return 0
+
+        for fname in sorted(filelist, key=last_used)[
+            : int(num_entries / self._cull_frequency)
+        ]:
+            self._delete(fname)
+
+    def entries(self):
+        return len(self._list_cache_files())
+
+
+class RedisCache(BaseCache):
+    """
+    Cache backend for Redis compatible servers
+
+    ``LOCATION`` is passed to the ``from_url`` class method of the client
+    class, which is ``redis.Redis`` by default and may be replaced using the
+    ``CLIENT_CLASS`` option. Least recently used entries are evicted by the
+    server itself, e.g. when configured with ``maxmemory-policy allkeys-lru``.
+    """
+
+    def __init__(self, server, params):
+        super().__init__(params)
+        self._server = server
+        self._client_class = params.get("OPTIONS", {}).get(
+            "CLIENT_CLASS", "redis.Redis"
+        )
+
+    @cached_property
+    def _client(self):
+        return import_string(self._client_class).from_url(self._server)
+
+    def _timeout(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        return None if timeout is None else max(int(timeout), 0)
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self._timeout(timeout)
+        if timeout == 0:
+            return False
+        return bool(
+            self._client.set(
+                self._key(key, version), pickle.dumps(value), ex=timeout, nx=True
+            )
+        )
+
+    def get(self, key, default=None, version=None):
+        value = self._client.get(self._key(key, version))
+        return default if value is None else pickle.loads(value)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self._timeout(timeout)
+        if timeout == 0:
+            self.delete(key, version=version)
+        else:
+            self._client.set(self._key(key, version), pickle.dumps(value), ex=timeout)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self._timeout(timeout)
+        key = self._key(key, version)
+        if timeout is None:
+            return bool(self._client.persist(key))
+        return bool(self._client.expire(key, timeout))
+
+    def delete(self, key, version=None):
+        return bool(self._client.delete(self._key(key, version)))
+
+    def _keys(self):
+        return self._client.scan_iter(match="%s*" % self.key_prefix)
+
+    def clear(self):
+        keys = list(self._keys())
+        if keys:
+            self._client.delete(*keys)
+
+    def entries(self):
+        return sum(1 for key in self._keys())
@@ -1,12 +1,12 @@
 from collections import defaultdict
 
 from django.db import connections
-from django.db.models import Sum
 
 from workbench.accounts.models import User
-from workbench.logbook.models import LoggedHours
+from workbench.logbook import rollup
 from workbench.offers.models import Offer
 from workbench.projects.models import Project
+from workbench.reporting.caching import cached
 from workbench.tools.formats import Z0, Z1
 
 
@@ -23,7 +23,7 @@ service AS (
   GROUP BY ps.project_id
 ),
 logged AS (
-  SELECT project_id, SUM(hours) AS hours FROM logbook_loggedhours lh
+  SELECT project_id, SUM(hours) AS hours FROM logbook_loggedhoursrollup lh
   LEFT JOIN projects_service ps ON lh.service_id=ps.id
   GROUP BY project_id
 )
@@ -40,15 +40,10 @@ WHERE service.hours / logged.hours < 1;
     project_ids = set()
     user_ids = set()
 
-    for row in (
-        LoggedHours.objects.filter(rendered_on__range=date_range)
-        .order_by()
-        .values("service__project", "rendered_by")
-        .annotate(Sum("hours"))
-    ):
+    for row in rollup.hours(["service__project", "rendered_by"], date_range=date_range):
         project_ids.add(row["service__project"])
         user_ids.add(row["rendered_by"])
-        within[row["service__project"]][row["rendered_by"]] = row["hours__sum"]
+        within[row["service__project"]][row["rendered_by"]] = row["hours"]
 
     green = defaultdict(lambda: Z1)
     red = defaultdict(lambda: Z1)
@@ -94,6 +89,9 @@ WHERE service.hours / logged.hours < 1;
     return sorted((user, rec) for user, rec in ret.items() if rec["total"])
 
 
+@cached(
+    "logbook_loggedhoursrollup", "offers_offer", "projects_project", "projects_service"
+)
 def green_hours_by_month():
     with connections["default"].cursor() as cursor:
         cursor.execute(
@@ -109,7 +107,7 @@ service AS (
   GROUP BY ps.project_id
 ),
 logged AS (
-  SELECT project_id, SUM(hours) AS hours FROM logbook_loggedhours lh
+  SELECT project_id, SUM(hours) AS hours FROM logbook_loggedhoursrollup lh
   LEFT JOIN projects_service ps ON lh.service_id=ps.id
   GROUP BY project_id
 )
@@ -123,10 +121,9 @@ WHERE service.hours / logged.hours < 1;
 DROP TABLE IF EXISTS total_hours;
 CREATE TEMPORARY TABLE total_hours AS
 SELECT
-  date_trunc('month', rendered_on) AS month,
+  month,
   SUM(hours) AS total_hours
-FROM logbook_loggedhours lh
-LEFT JOIN projects_service ps ON lh.service_id=ps.id
+FROM logbook_loggedhoursrollup lh
 GROUP BY month;
 
 DROP TABLE IF EXISTS green_hours;
@@ -137,9 +134,9 @@ SELECT
 FROM (
   SELECT
     ps.project_id,
-    date_trunc('month', rendered_on) AS month,
+    month,
     hours * COALESCE(ghf.factor, 1) AS hours
-  FROM logbook_loggedhours lh
+  FROM logbook_loggedhoursrollup lh
   LEFT JOIN projects_service ps ON lh.service_id=ps.id
   LEFT JOIN projects_project p ON ps.project_id=p.id
   LEFT OUTER JOIN green_hours_factor ghf ON ghf.project_id=p.id
@@ -151,9 +148,9 @@ GROUP BY month;
 DROP TABLE IF EXISTS maintenance_hours;
 CREATE TEMPORARY TABLE maintenance_hours AS
 SELECT
-  date_trunc('month', rendered_on) AS month,
+  month,
   SUM(hours) AS maintenance_hours
-FROM logbook_loggedhours lh
+FROM logbook_loggedhoursrollup lh
 LEFT JOIN projects_service ps ON lh.service_id=ps.id
 LEFT JOIN projects_project p ON ps.project_id=p.id
 WHERE
@@ -163,9 +160,9 @@ GROUP BY month;
 DROP TABLE IF EXISTS internal_hours;
 CREATE TEMPORARY TABLE internal_hours AS
 SELECT
-  date_trunc('month', rendered_on) AS month,
+  month,
   SUM(hours) AS internal_hours
-FROM logbook_loggedhours lh
+FROM logbook_loggedhoursrollup lh
 LEFT JOIN projects_service ps ON lh.service_id=ps.id
 LEFT JOIN projects_project p ON ps.project_id=p.id
 WHERE
@@ -188,7 +185,7 @@ ORDER BY th.month
 
         return [
             {
-                "month": row[0].date(),
+                "month": row[0],
                 "green": row[1],
                 "maintenance": row[2],
                 "internal": row[3],
@@ -10,6 +10,7 @@ from workbench.invoices.models import Invoice
 from workbench.logbook.models import LoggedCost, LoggedHours
 from workbench.offers.models import Offer
 from workbench.projects.models import Project, Service
+from workbench.reporting.caching import cached
 from workbench.reporting.models import Accruals
 from workbench.tools.formats import Z1, Z2
 
@@ -84,6 +85,16 @@ def accruals_by_month(date_range):
     }
 
 
+@cached(
+    "awt_employment",
+    "invoices_invoice",
+    "logbook_loggedcost",
+    "logbook_loggedhours",
+    "offers_offer",
+    "projects_project",
+    "projects_service",
+    "reporting_accruals",
+)
 def gross_margin_by_month(date_range):
     gross = gross_profit_by_month(date_range)
     third = third_party_costs_by_month(date_range)
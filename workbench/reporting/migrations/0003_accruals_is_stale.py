@@ -0,0 +1,28 @@
+# Generated by Django 3.1.5 on 2026-10-18 02:22
+
+from django.db import migrations, models
+
+from workbench.reporting import accruals
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("invoices", "0022_recurringinvoice_create_project"),
+        ("projects", "0020_projectsummary"),
+        ("reporting", "0002_costcenter"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="accruals",
+            name="is_stale",
+            field=models.BooleanField(
+                default=False, editable=False, verbose_name="is stale"
+            ),
+        ),
+        migrations.RunSQL(
+            "UPDATE reporting_accruals SET is_stale=TRUE", migrations.RunSQL.noop
+        ),
+        migrations.RunSQL(accruals.TRIGGER, accruals.DROP_TRIGGER),
+    ]
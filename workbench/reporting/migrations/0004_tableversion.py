@@ -0,0 +1,61 @@
+# Generated by Django 3.1.5 on 2026-10-18 02:27
+
+from django.db import migrations, models
+
+from workbench.reporting import caching
+
+
+TABLES = [
+    "accounts_team_members",
+    "accounts_user",
+    "awt_absence",
+    "awt_employment",
+    "contacts_person",
+    "invoices_invoice",
+    "logbook_loggedcost",
+    "logbook_loggedhours",
+    "logbook_loggedhoursrollup",
+    "offers_offer",
+    "planning_plannedwork",
+    "planning_planningrequest",
+    "planning_planningrequest_receivers",
+    "projects_project",
+    "projects_service",
+    "reporting_accruals",
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0012_user_planning_hours_per_day"),
+        ("awt", "0012_auto_20201012_1433"),
+        ("contacts", "0013_organization_is_archived"),
+        ("planning", "0004_planningrequest_is_provisional"),
+        ("reporting", "0003_accruals_is_stale"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TableVersion",
+            fields=[
+                (
+                    "table_name",
+                    models.CharField(
+                        max_length=100,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="table name",
+                    ),
+                ),
+                ("version", models.BigIntegerField(verbose_name="version")),
+            ],
+            options={
+                "verbose_name": "table version",
+                "verbose_name_plural": "table versions",
+                "ordering": ["table_name"],
+            },
+        ),
+        migrations.RunSQL(caching.TRIGGER, caching.DROP_TRIGGER),
+        migrations.RunSQL(caching.track(TABLES), caching.untrack(TABLES)),
+    ]
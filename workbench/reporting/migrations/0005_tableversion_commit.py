@@ -0,0 +1,35 @@
+from django.db import migrations
+
+from workbench.reporting import caching
+
+
+TABLES = [
+    "accounts_team_members",
+    "accounts_user",
+    "awt_absence",
+    "awt_employment",
+    "contacts_person",
+    "invoices_invoice",
+    "logbook_loggedcost",
+    "logbook_loggedhours",
+    "logbook_loggedhoursrollup",
+    "offers_offer",
+    "planning_plannedwork",
+    "planning_planningrequest",
+    "planning_planningrequest_receivers",
+    "projects_project",
+    "projects_service",
+    "reporting_accruals",
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reporting", "0004_tableversion"),
+    ]
+
+    operations = [
+        migrations.RunSQL(caching.TRIGGER, migrations.RunSQL.noop),
+        migrations.RunSQL(caching.track(TABLES), migrations.RunSQL.noop),
+    ]
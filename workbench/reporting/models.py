@@ -1,7 +1,8 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils.translation import gettext_lazy as _
 
 from workbench.projects.models import Project
+from workbench.reporting.accruals import accruals as accruals_by_cutoff_date
 from workbench.reporting.project_budget_statistics import project_budget_statistics
 from workbench.tools.formats import local_date_format
 from workbench.tools.models import MoneyField
@@ -16,14 +17,37 @@ class AccrualsQuerySet(models.QuerySet):
     def for_cutoff_date(self, cutoff_date):
         instance, created = self.update_or_create(
             cutoff_date=cutoff_date,
-            defaults={"accruals": self.accruals(cutoff_date)},
+            defaults={"accruals": self.accruals(cutoff_date), "is_stale": False},
         )
         return instance
 
+    def for_cutoff_dates(self, cutoff_dates):
+        """
+        Computes accruals for all cutoff dates which are missing or stale
+        """
+        with transaction.atomic():
+            # Lock existing rows so that concurrent changes only mark them
+            # stale again after the recomputed values have been committed.
+            current = {
+                cutoff_date
+                for cutoff_date, is_stale in self.select_for_update()
+                .filter(cutoff_date__in=cutoff_dates)
+                .values_list("cutoff_date", "is_stale")
+                if not is_stale
+            }
+            computed = accruals_by_cutoff_date(set(cutoff_dates) - current)
+            for cutoff_date, value in computed.items():
+                self.update_or_create(
+                    cutoff_date=cutoff_date,
+                    defaults={"accruals": value, "is_stale": False},
+                )
+            return computed
+
 
 class Accruals(models.Model):
     cutoff_date = models.DateField(_("cutoff date"), unique=True)
     accruals = MoneyField(_("accruals"))
+    is_stale = models.BooleanField(_("is stale"), default=False, editable=False)
 
     objects = AccrualsQuerySet.as_manager()
 
@@ -47,3 +71,20 @@ class CostCenter(models.Model):
 
     def __str__(self):
         return self.title
+
+
+class TableVersion(models.Model):
+    """
+    Version counters of database tables, see ``workbench.reporting.caching``
+    """
+
+    table_name = models.CharField(_("table name"), max_length=100, primary_key=True)
+    version = models.BigIntegerField(_("version"))
+
+    class Meta:
+        ordering = ["table_name"]
+        verbose_name = _("table version")
+        verbose_name_plural = _("table versions")
+
+    def __str__(self):
+        return self.table_name
@@ -1,105 +1,153 @@
 import datetime as dt
-from collections import defaultdict
 
-from django.db.models import Sum
-from django.utils import timezone
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
 
 from workbench.invoices.models import Invoice
-from workbench.logbook.models import LoggedCost, LoggedHours
 from workbench.offers.models import Offer
 from workbench.tools.formats import Z1, Z2
 
 
-def project_budget_statistics(projects, *, cutoff_date=None):
-    cutoff_date = cutoff_date or dt.date.today()
-    cutoff_dttm = timezone.make_aware(dt.datetime.combine(cutoff_date, dt.time.max))
-
-    costs = (
-        LoggedCost.objects.filter(
-            service__project__in=projects, rendered_on__lte=cutoff_dttm
-        )
-        .order_by()
-        .values("service__project")
+SQL = """\
+WITH
+projects AS ({projects}),
+hours AS (
+  SELECT
+    ps.project_id,
+    SUM(lh.hours) AS hours,
+    SUM(lh.hours * ps.effort_rate) AS effort_cost,
+    SUM(lh.hours) FILTER (WHERE ps.effort_rate IS NULL) AS hours_rate_undefined,
+    SUM(lh.hours) FILTER (WHERE lh.archived_at IS NULL) AS not_archived
+  FROM logbook_loggedhours lh
+  LEFT JOIN projects_service ps ON lh.service_id=ps.id
+  WHERE ps.project_id IN (SELECT id FROM projects) AND lh.rendered_on<=%s
+  GROUP BY ps.project_id
+),
+costs AS (
+  SELECT
+    ps.project_id,
+    SUM(lc.cost) AS cost,
+    SUM(lc.third_party_costs) FILTER (
+      WHERE lc.invoice_service_id IS NULL
+    ) AS third_party_costs
+  FROM logbook_loggedcost lc
+  LEFT JOIN projects_service ps ON lc.service_id=ps.id
+  WHERE ps.project_id IN (SELECT id FROM projects) AND lc.rendered_on<=%s
+  GROUP BY ps.project_id
+),
+offered AS (
+  SELECT project_id, SUM(total_excl_tax) AS offered
+  FROM offers_offer
+  WHERE project_id IN (SELECT id FROM projects) AND status=%s
+  GROUP BY project_id
+),
+invoiced AS (
+  SELECT project_id, SUM(total_excl_tax) AS invoiced
+  FROM invoices_invoice
+  WHERE project_id IN (SELECT id FROM projects)
+    AND status=ANY(%s) AND invoiced_on<=%s
+  GROUP BY project_id
+)
+SELECT
+  projects.id,
+  hours.hours,
+  hours.effort_cost,
+  hours.hours_rate_undefined,
+  hours.not_archived,
+  costs.cost,
+  costs.third_party_costs,
+  offered.offered,
+  invoiced.invoiced
+FROM projects
+LEFT JOIN hours ON projects.id=hours.project_id
+LEFT JOIN costs ON projects.id=costs.project_id
+LEFT JOIN offered ON projects.id=offered.project_id
+LEFT JOIN invoiced ON projects.id=invoiced.project_id
+ORDER BY projects.id
+"""
+
+
+def _query(projects, cutoff_date):
+    try:
+        sql, params = projects.order_by().values("id").query.sql_with_params()
+    except EmptyResultSet:
+        return None, None
+    return (
+        SQL.format(projects=sql),
+        [
+            *params,
+            cutoff_date,
+            cutoff_date,
+            Offer.ACCEPTED,
+            list(Invoice.INVOICED_STATUSES),
+            cutoff_date,
+        ],
     )
 
-    cost_per_project = {
-        row["service__project"]: row["cost__sum"] for row in costs.annotate(Sum("cost"))
-    }
-    third_party_costs_per_project = {
-        row["service__project"]: row["third_party_costs__sum"]
-        for row in costs.filter(
-            third_party_costs__isnull=False, invoice_service__isnull=True
-        ).annotate(Sum("third_party_costs"))
-    }
 
-    hours = (
-        LoggedHours.objects.filter(
-            service__project__in=projects, rendered_on__lte=cutoff_dttm
-        )
-        .order_by()
-        .values("service__project", "service__effort_rate")
-        .annotate(Sum("hours"))
+def _statistics(project, row):
+    (
+        _id,
+        hours,
+        effort_cost,
+        effort_hours_with_rate_undefined,
+        not_archived,
+        cost,
+        third_party_costs,
+        offered,
+        invoiced,
+    ) = (
+        row or [None] * 9
     )
-    effort_cost_per_project = defaultdict(lambda: Z2)
-    effort_hours_with_rate_undefined_per_project = defaultdict(lambda: Z1)
-    hours_per_project = defaultdict(lambda: Z1)
-
-    for row in hours:
-        if row["service__effort_rate"] is None:
-            effort_hours_with_rate_undefined_per_project[
-                row["service__project"]
-            ] += row["hours__sum"]
-        else:
-            effort_cost_per_project[row["service__project"]] += (
-                row["service__effort_rate"] * row["hours__sum"]
-            )
-        hours_per_project[row["service__project"]] += row["hours__sum"]
-
-    not_archived_hours = {
-        row["service__project"]: row["hours__sum"]
-        for row in hours.filter(archived_at__isnull=True)
-        .values("service__project")
-        .annotate(Sum("hours"))
-    }
 
-    offered_per_project = {
-        row["project"]: row["total_excl_tax__sum"]
-        for row in Offer.objects.accepted()
-        .filter(project__in=projects)
-        .order_by()
-        .values("project")
-        .annotate(Sum("total_excl_tax"))
-    }
-    invoiced_per_project = {
-        row["project"]: row["total_excl_tax__sum"]
-        for row in Invoice.objects.invoiced()
-        .filter(project__in=projects, invoiced_on__lte=cutoff_date)
-        .order_by()
-        .values("project")
-        .annotate(Sum("total_excl_tax"))
+    cost = cost or Z2
+    effort_cost = effort_cost or Z2
+    invoiced = invoiced or Z2
+    return {
+        "project": project,
+        "logbook": cost + effort_cost,
+        "cost": cost,
+        "effort_cost": effort_cost,
+        "effort_hours_with_rate_undefined": effort_hours_with_rate_undefined or Z1,
+        "third_party_costs": third_party_costs or Z2,
+        "offered": offered or Z2,
+        "invoiced": invoiced,
+        "hours": hours or Z1,
+        "not_archived": not_archived or Z1,
+        "delta": cost + effort_cost - invoiced,
     }
 
-    statistics = [
-        {
-            "project": project,
-            "logbook": cost_per_project.get(project.id, Z2)
-            + effort_cost_per_project[project.id],
-            "cost": cost_per_project.get(project.id, Z2),
-            "effort_cost": effort_cost_per_project[project.id],
-            "effort_hours_with_rate_undefined": effort_hours_with_rate_undefined_per_project[  # noqa
-                project.id
-            ],
-            "third_party_costs": third_party_costs_per_project.get(project.id, Z2),
-            "offered": offered_per_project.get(project.id, Z2),
-            "invoiced": invoiced_per_project.get(project.id, Z2),
-            "hours": hours_per_project[project.id],
-            "not_archived": not_archived_hours.get(project.id, Z1),
-            "delta": cost_per_project.get(project.id, Z2)
-            + effort_cost_per_project[project.id]
-            - invoiced_per_project.get(project.id, Z2),
-        }
-        for project in projects
-    ]
+
+def iter_project_budget_statistics(projects, *, cutoff_date=None):
+    """
+    Yields the budget statistics of all projects ordered by their ID
+
+    Neither the statistics nor the projects are loaded into memory all at
+    once; both are streamed from the database using server-side cursors.
+    """
+    sql, params = _query(projects, cutoff_date or dt.date.today())
+    if sql is None:
+        return
+
+    with connections["default"].chunked_cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = iter(cursor)
+        row = next(rows, None)
+        for project in projects.order_by("id").iterator():
+            while row and row[0] < project.id:
+                row = next(rows, None)
+            yield _statistics(project, row if row and row[0] == project.id else None)
+
+
+def project_budget_statistics(projects, *, cutoff_date=None):
+    sql, params = _query(projects, cutoff_date or dt.date.today())
+    rows = {}
+    if sql is not None:
+        with connections["default"].cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = {row[0]: row for row in cursor}
+
+    statistics = [_statistics(project, rows.get(project.id)) for project in projects]
     overall = {
         key: sum(s[key] for s in statistics)
         for key in [
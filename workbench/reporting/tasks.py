@@ -8,7 +8,9 @@ def create_accruals_for_last_month():
     today = dt.date.today()
     start = today.replace(year=today.year - 2, day=1)
 
+    cutoff_dates = []
     for day in recurring(start, "monthly"):
         if day > today:
             break
-        Accruals.objects.for_cutoff_date(day - dt.timedelta(days=1))
+        cutoff_dates.append(day - dt.timedelta(days=1))
+    Accruals.objects.for_cutoff_dates(cutoff_dates)
@@ -0,0 +1,183 @@
+import io
+import tempfile
+import time
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connections
+from django.test import TestCase, override_settings
+
+from time_machine import travel
+
+from workbench import factories
+from workbench.logbook.models import LoggedHours
+from workbench.reporting import caching
+from workbench.reporting.models import TableVersion
+
+
+calls = []
+
+
+@caching.cached("logbook_loggedhours")
+def logged_hours(user, *, extra=None):
+    calls.append(user)
+    return sum(hours.hours for hours in LoggedHours.objects.filter(rendered_by=user))
+
+
+@caching.cached("logbook_loggedhours", "does_not_exist")
+def untracked():
+    calls.append(None)
+
+
+LOCMEM = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "reporting": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "test",
+    },
+    "timer": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+}
+
+
+class CachingTest(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    @override_settings(CACHES=LOCMEM)
+    def test_cached(self):
+        """Cached values are invalidated when source tables are written to"""
+        hours = factories.LoggedHoursFactory.create(hours=2)
+        user = hours.rendered_by
+
+        self.assertEqual(logged_hours(user), 2)
+        self.assertEqual(logged_hours(user), 2)
+        self.assertEqual(logged_hours(user, extra=[1]), 2)
+        self.assertEqual(len(calls), 2)
+
+        factories.LoggedHoursFactory.create(rendered_by=user, hours=3)
+        self.assertEqual(logged_hours(user), 5)
+        self.assertEqual(len(calls), 3)
+
+        LoggedHours.objects.update(hours=1)
+        self.assertEqual(logged_hours(user), 2)
+        self.assertEqual(logged_hours(user), 2)
+        self.assertEqual(len(calls), 4)
+
+        with travel("2100-01-01 12:00"):
+            logged_hours(user)
+        self.assertEqual(len(calls), 5)
+
+        self.assertEqual(logged_hours.uncached(user), 2)
+
+        stats = {row["name"]: row for row in caching.statistics()}
+        row = stats["workbench.reporting.test_caching.logged_hours"]
+        self.assertEqual((row["hits"], row["misses"]), (2, 5))
+
+        with self.assertLogs("workbench.reporting.caching", "WARNING"):
+            untracked()
+            untracked()
+        self.assertEqual(calls[-2:], [None, None])
+
+        out = io.StringIO()
+        call_command("cache_stats", stdout=out)
+        self.assertIn("LocMemCache", out.getvalue())
+        self.assertIn(
+            "workbench.reporting.test_caching.logged_hours: 2 hits, 5 misses",
+            out.getvalue(),
+        )
+        self.assertIn("logbook_loggedhours: ", out.getvalue())
+
+    def test_table_versions(self):
+        """Writing transactions see private versions until they commit"""
+        committed = caching.table_versions(["logbook_loggedhours"])
+        self.assertEqual(
+            committed,
+            {
+                "logbook_loggedhours": TableVersion.objects.get(
+                    table_name="logbook_loggedhours"
+                ).version
+            },
+        )
+
+        factories.LoggedHoursFactory.create()
+        pending = caching.table_versions(["logbook_loggedhours", "accounts_user"])
+        self.assertTrue(pending["logbook_loggedhours"].startswith("pending-"))
+        self.assertTrue(pending["accounts_user"].startswith("pending-"))
+        factories.LoggedHoursFactory.create()
+        self.assertNotEqual(
+            caching.table_versions(["logbook_loggedhours"]),
+            {"logbook_loggedhours": pending["logbook_loggedhours"]},
+        )
+
+        with connections["default"].cursor() as cursor:
+            # Fires the deferred triggers the same way COMMIT does
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+            cursor.execute("SET CONSTRAINTS ALL DEFERRED")
+        versions = caching.table_versions(["logbook_loggedhours"])
+        self.assertGreater(
+            versions["logbook_loggedhours"], committed["logbook_loggedhours"]
+        )
+
+    def test_file_based_cache(self):
+        """The file based cache evicts least recently used entries"""
+        with tempfile.TemporaryDirectory() as location, override_settings(
+            CACHES={
+                "default": LOCMEM["default"],
+                "timer": LOCMEM["timer"],
+                "reporting": {
+                    "BACKEND": "workbench.reporting.caching.FileBasedCache",
+                    "LOCATION": location,
+                    "OPTIONS": {"MAX_ENTRIES": 3, "CULL_FREQUENCY": 3},
+                },
+            }
+        ):
+            cache = caches["reporting"]
+            for key in "abc":
+                cache.set(key, key)
+                time.sleep(0.01)
+            self.assertEqual(cache.get("a"), "a")
+            time.sleep(0.01)
+            cache.set("d", "d")
+
+            self.assertEqual(caching.entries(cache), 3)
+            self.assertEqual([cache.get(key) for key in "abcd"], ["a", None, "c", "d"])
+
+    @override_settings(
+        CACHES={
+            "default": LOCMEM["default"],
+            "timer": LOCMEM["timer"],
+            "reporting": {
+                "BACKEND": "workbench.reporting.caching.RedisCache",
+                "LOCATION": "redis://test/0",
+                "KEY_PREFIX": "test",
+                "TIMEOUT": 60,
+                "OPTIONS": {"CLIENT_CLASS": "workbench.tools.testing.LocalRedis"},
+            },
+        }
+    )
+    def test_redis_cache(self):
+        """The Redis cache backend"""
+        user = factories.UserFactory.create()
+        cache = caches["reporting"]
+        cache.clear()
+
+        self.assertEqual(logged_hours(user), 0)
+        self.assertEqual(logged_hours(user), 0)
+        self.assertEqual(len(calls), 1)
+
+        self.assertTrue(cache.add("a", {"a": 1}))
+        self.assertFalse(cache.add("a", 2))
+        self.assertFalse(cache.add("b", 2, 0))
+        self.assertEqual(cache.get("a"), {"a": 1})
+        self.assertEqual(cache.get("b", "default"), "default")
+        self.assertEqual(caching.entries(cache), 4)
+
+        cache.set("a", 3, 0)
+        self.assertIsNone(cache.get("a"))
+        cache.set("a", 3, None)
+        self.assertTrue(cache.touch("a", 10))
+        self.assertTrue(cache.delete("a"))
+        self.assertFalse(cache.touch("a", None))
+
+        cache.clear()
+        self.assertEqual(caching.entries(cache), 0)
@@ -2,15 +2,20 @@ import datetime as dt
 from decimal import Decimal
 
 from django.core import mail
-from django.test import RequestFactory, TestCase
+from django.db import connections
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
 
 from time_machine import travel
 
 from workbench import factories
+from workbench.logbook.models import LoggedHours
+from workbench.projects.models import Project
 from workbench.reporting.accounting import send_accounting_files
 from workbench.reporting.labor_costs import labor_costs_by_cost_center
 from workbench.reporting.models import Accruals
 from workbench.reporting.views import DateRangeAndTeamFilterForm
+from workbench.tools import profiling
 
 
 class ReportingTest(TestCase):
@@ -33,6 +38,70 @@ class ReportingTest(TestCase):
         self.assertEqual(obj.accruals, Decimal("0.00"))
         self.assertEqual(str(obj), obj.cutoff_date.strftime("%d.%m.%Y"))
 
+    def test_accruals_for_cutoff_dates(self):
+        """Accruals for many cutoff dates match the single date calculation"""
+        service = factories.ServiceFactory.create(effort_rate=100)
+        closed = factories.ServiceFactory.create(effort_rate=120)
+        factories.Project.objects.update(
+            created_at=timezone.make_aware(dt.datetime(2019, 12, 1))
+        )
+        factories.Project.objects.filter(id=closed.project_id).update(
+            closed_on=dt.date(2020, 2, 15)
+        )
+
+        for day in [dt.date(2020, 1, 10), dt.date(2020, 2, 20), dt.date(2020, 3, 5)]:
+            factories.LoggedHoursFactory.create(
+                service=service, rendered_on=day, hours=2
+            )
+            factories.LoggedHoursFactory.create(service=closed, rendered_on=day)
+            factories.LoggedCostFactory.create(service=service, rendered_on=day)
+        for project, invoiced_on, subtotal in [
+            (service.project, dt.date(2020, 2, 29), 1000),
+            (closed.project, dt.date(2020, 1, 20), 500),
+        ]:
+            factories.InvoiceFactory.create(
+                customer=project.customer,
+                contact=project.contact,
+                project=project,
+                invoiced_on=invoiced_on,
+                due_on=invoiced_on + dt.timedelta(days=30),
+                subtotal=subtotal,
+                status=factories.Invoice.SENT,
+            )
+
+        cutoff_dates = [
+            dt.date(2019, 12, 31),
+            dt.date(2020, 1, 31),
+            dt.date(2020, 2, 29),
+            dt.date(2020, 3, 31),
+        ]
+        computed = Accruals.objects.for_cutoff_dates(cutoff_dates)
+        self.assertEqual(
+            computed, {day: Accruals.objects.accruals(day) for day in cutoff_dates}
+        )
+        self.assertEqual(
+            [computed[day] for day in cutoff_dates],
+            [Decimal("0"), Decimal("-380"), Decimal("-580"), Decimal("-370")],
+        )
+
+        self.assertEqual(Accruals.objects.for_cutoff_dates(cutoff_dates), {})
+
+        LoggedHours.objects.filter(rendered_on=dt.date(2020, 2, 20)).update(
+            rendered_on=dt.date(2020, 3, 1)
+        )
+        self.assertEqual(
+            sorted(
+                Accruals.objects.filter(is_stale=True).values_list(
+                    "cutoff_date", flat=True
+                )
+            ),
+            cutoff_dates[2:],
+        )
+        computed = Accruals.objects.for_cutoff_dates(cutoff_dates)
+        self.assertEqual(
+            computed, {day: Accruals.objects.accruals(day) for day in cutoff_dates[2:]}
+        )
+
     def test_labor_costs(self):
         """The labor costs report does a few things"""
         user1 = factories.EmploymentFactory.create().user
@@ -99,3 +168,54 @@ class ReportingTest(TestCase):
         form = DateRangeAndTeamFilterForm({"team": -user2.id}, request=req)
         self.assertTrue(form.is_valid())
         self.assertEqual(set(form.users()), {user2})
+
+    def test_profiling(self):
+        """Queries are profiled per view and repeated statements are reported"""
+        profiling.reset()
+        self.client.force_login(factories.UserFactory.create())
+        factories.ProjectFactory.create_batch(profiling.REPEATED)
+
+        with override_settings(SLOW_REQUEST_SECONDS=0), self.assertLogs(
+            "workbench.tools.profiling", "WARNING"
+        ) as cm:
+            self.client.get("/projects/?q=test")
+        self.assertIn("Slow request /projects/", cm.output[0])
+
+        row = {row["view"]: row for row in profiling.statistics()}[
+            "projects_project_list"
+        ]
+        self.assertEqual(row["requests"], 1)
+        self.assertGreater(row["queries"], 0)
+        self.assertEqual(row["slow"], 1)
+        self.assertEqual(profiling.slow_requests()[0]["path"], "/projects/")
+
+        response = self.client.get("/report/profiling/")
+        self.assertRedirects(response, "/")
+
+        self.client.force_login(factories.UserFactory.create(is_admin=True))
+        response = self.client.get("/report/profiling/")
+        self.assertContains(response, "projects_project_list")
+
+        self.client.post("/report/profiling/")
+        self.assertEqual(
+            [row["view"] for row in profiling.statistics()], ["report_profiling"]
+        )
+
+    def test_profiling_shape(self):
+        """Statements differing only in their literals have the same shape"""
+        self.assertEqual(
+            profiling.shape("SELECT * FROM t WHERE id IN (1, 2,  3) AND x='a''b'"),
+            profiling.shape("SELECT * FROM t\nWHERE id IN (%s) AND x=%s"),
+        )
+        self.assertNotEqual(
+            profiling.shape('SELECT "t"."a" FROM t'),
+            profiling.shape('SELECT "t"."b" FROM t'),
+        )
+
+        projects = factories.ProjectFactory.create_batch(profiling.REPEATED)
+        profile = profiling.Profile()
+        with connections["default"].execute_wrapper(profile):
+            for project in Project.objects.filter(id__in=[p.id for p in projects]):
+                project.owned_by
+        self.assertEqual(profile.queries, profiling.REPEATED + 1)
+        self.assertEqual(len(profile.repeated()), 1)
@@ -21,6 +21,7 @@ from workbench.reporting.views import (
     logging,
     open_items_list,
     overdrawn_projects_view,
+    profiling_view,
     project_budget_statistics_view,
     work_anniversaries_view,
 )
@@ -123,4 +124,5 @@ urlpatterns = [
         work_anniversaries_view,
         name="report_work_anniversaries",
     ),
+    re_path(r"^profiling/$", profiling_view, name="report_profiling"),
 ]
@@ -2,7 +2,10 @@ import datetime as dt
 from itertools import groupby
 
 from django import forms
+from django.conf import settings
+from django.contrib import messages
 from django.db.models import Q
+from django.http import HttpResponseRedirect
 from django.shortcuts import render
 from django.utils.html import format_html, format_html_join
 from django.utils.text import capfirst
@@ -23,6 +26,7 @@ from workbench.reporting import (
     project_budget_statistics,
 )
 from workbench.reporting.utils import date_ranges
+from workbench.tools import profiling
 from workbench.tools.formats import Z0, Z2, local_date_format
 from workbench.tools.forms import DateInput, Form
 from workbench.tools.validation import filter_form, in_days, monday
@@ -423,3 +427,23 @@ def work_anniversaries_view(request):
         "reporting/work_anniversaries.html",
         {"work_anniversaries": work_anniversaries()},
     )
+
+
+def profiling_view(request):
+    if not request.user.is_staff:
+        messages.warning(request, _("Only staff members may view this page."))
+        return HttpResponseRedirect("/")
+
+    if request.method == "POST":
+        profiling.reset()
+        return HttpResponseRedirect(request.path)
+
+    return render(
+        request,
+        "reporting/profiling.html",
+        {
+            "views": profiling.statistics()[:50],
+            "slow_requests": profiling.slow_requests(),
+            "slow_request_seconds": settings.SLOW_REQUEST_SECONDS,
+        },
+    )
@@ -77,10 +77,7 @@ class ServiceBase(Model):
         if not self.position:
             max_pos = self.__class__._default_manager.aggregate(m=Max("position"))["m"]
             self.position = 10 + (max_pos or 0)
-        self.service_hours = self.effort_hours or Z1
-        self.service_cost = self.cost or Z2
-        if all((self.effort_hours, self.effort_rate)):
-            self.service_cost += self.effort_hours * self.effort_rate
+        self._calculate_service_totals()
 
         super().save(*args, **kwargs)
 
@@ -98,6 +95,12 @@ class ServiceBase(Model):
 
     save.alters_data = True
 
+    def _calculate_service_totals(self):
+        self.service_hours = self.effort_hours or Z1
+        self.service_cost = self.cost or Z2
+        if all((self.effort_hours, self.effort_rate)):
+            self.service_cost += self.effort_hours * self.effort_rate
+
     def delete(self, *args, **kwargs):
         super().delete(*args, **kwargs)
         if self._orig_related_id:
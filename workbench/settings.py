@@ -88,6 +88,7 @@ MIDDLEWARE = [
         "django.contrib.auth.middleware.AuthenticationMiddleware",
         "django.contrib.messages.middleware.MessageMiddleware",
         "django.middleware.clickjacking.XFrameOptionsMiddleware",
+        "workbench.middleware.query_profiler",
         "workbench.accounts.middleware.user_middleware",
         "workbench.middleware.history_fallback",
     ]
@@ -412,6 +413,35 @@ if env("SQL", default=False):  # pragma: no cover
         "propagate": False,
     }
 
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    # See workbench.reporting.caching
+    "reporting": {
+        "BACKEND": env(
+            "REPORTING_CACHE_BACKEND",
+            default="django.core.cache.backends.locmem.LocMemCache",
+        ),
+        "LOCATION": env("REPORTING_CACHE_LOCATION", default="reporting"),
+        "TIMEOUT": env("REPORTING_CACHE_TIMEOUT", default=3600),
+        "KEY_PREFIX": NAMESPACE,
+        "OPTIONS": {"MAX_ENTRIES": env("REPORTING_CACHE_MAX_ENTRIES", default=500)},
+    },
+    # See workbench.timer.models.TimestampQuerySet.cached_slices; has to be
+    # shared between all processes
+    "timer": {
+        "BACKEND": env(
+            "TIMER_CACHE_BACKEND",
+            default="workbench.reporting.caching.FileBasedCache",
+        ),
+        "LOCATION": env(
+            "TIMER_CACHE_LOCATION", default=os.path.join(BASE_DIR, "tmp", "timer")
+        ),
+        "TIMEOUT": 3600,
+        "KEY_PREFIX": NAMESPACE,
+        "OPTIONS": {"MAX_ENTRIES": 2000},
+    },
+}
+
 FEATURES = WORKBENCH.FEATURES
 TEST_RUNNER = "django_slowtests.testrunner.DiscoverSlowestTestsRunner"
 TESTS_REPORT_TMP_FILES_PREFIX = "tmp/slowtests_"
@@ -419,7 +449,19 @@ NUM_SLOW_TESTS = 20
 
 BATCH_MAX_ITEMS = 250
 
+# See workbench.tools.pdf.cached_pdf_response
+PDF_CACHE_DIR = env("PDF_CACHE_DIR", default=os.path.join(BASE_DIR, "tmp", "pdf"))
+
+# See workbench.tools.pdf.batch_pdf_response
+PDF_PROCESSES = env("PDF_PROCESSES", default=4)
+
+# See workbench.tools.profiling
+SLOW_REQUEST_SECONDS = env("SLOW_REQUEST_SECONDS", default=2)
+
 if TESTING:  # pragma: no cover
     PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
     DATABASES["default"]["TEST"] = {"SERIALIZE": False}
     FEATURES = defaultdict(lambda: True)
+    CACHES["reporting"] = {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+    CACHES["timer"] = {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+    PDF_CACHE_DIR = ""
@@ -66,6 +66,50 @@ $(function () {
     }
   })
 
+  $(document.body).on("click", "[data-history-older]", function (event) {
+    event.preventDefault()
+    const button = this
+    button.classList.add("disabled")
+    $.get(button.href, function (data) {
+      $(button).replaceWith(data)
+    })
+  })
+
+  $(document.body).on("click", "[data-job]", function (event) {
+    event.preventDefault()
+    const link = this,
+      label = link.innerHTML,
+      token = document.cookie.match(/csrftoken=([^;]+)/)
+    if (link.classList.contains("disabled")) return
+    link.classList.add("disabled")
+
+    const poll = function (job) {
+      if (job.is_done || job.is_failed) {
+        link.classList.remove("disabled")
+        link.innerHTML = label
+        if (job.is_done) {
+          window.location.href = job.download_url
+        } else {
+          alert(gettext("Unable to prepare the download"))
+        }
+      } else {
+        link.innerHTML = `${label} (${job.progress}%)`
+        setTimeout(() => $.get(job.url, poll), 1000)
+      }
+    }
+
+    $.ajax({
+      url: link.dataset.job,
+      method: "POST",
+      headers: { "X-CSRFToken": token ? token[1] : "" },
+      success: poll,
+      error: function () {
+        link.classList.remove("disabled")
+        alert(gettext("Unable to prepare the download"))
+      },
+    })
+  })
+
   $(document.body).on("submit", ".modal-dialog form", function (_event) {
     if (this.method.toLowerCase() == "post") {
       const action = this.action,
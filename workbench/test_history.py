@@ -1,8 +1,10 @@
 import datetime as dt
 from types import SimpleNamespace
+from unittest import mock
 
+from django.db import connection
 from django.test import TestCase
-from django.test.utils import override_settings
+from django.test.utils import CaptureQueriesContext, override_settings
 
 from workbench import factories
 from workbench.accounts.features import FEATURES
@@ -67,6 +69,87 @@ class HistoryTest(TestCase):
         # print(response, response.content.decode("utf-8"))
         self.assertContains(response, "INSERT contacts_postaladdress {}".format(pa.pk))
 
+    def test_for_row(self):
+        """The indexed key projection matches the hstore lookups"""
+        organization = factories.OrganizationFactory.create()
+        person = factories.PersonFactory.create(organization=organization)
+        person.organization = factories.OrganizationFactory.create()
+        person.save()
+        person.notes = "Test"
+        person.save()
+
+        for model, attribute, value in [
+            (person, "id", person.pk),
+            (person, "organization_id", organization.pk),
+            (person, "organization_id", person.organization_id),
+            (person, "notes", "Test"),
+            (organization, "id", organization.pk),
+        ]:
+            with self.subTest(attribute=attribute, value=value):
+                self.assertEqual(
+                    list(
+                        LoggedAction.objects.for_row(
+                            model, str(value), attribute=attribute
+                        )
+                    ),
+                    list(
+                        LoggedAction.objects.for_model(model).with_data(
+                            **{attribute: value}
+                        )
+                    ),
+                )
+        self.assertEqual(len(LoggedAction.objects.for_row(person, person.pk)), 3)
+
+    def test_prefetch(self):
+        """Referenced instances are fetched with one query per model"""
+        project = factories.ProjectFactory.create()
+        self.client.force_login(project.owned_by)
+        url = "/history/projects_project/id/{}/".format(project.pk)
+
+        with CaptureQueriesContext(connection) as initial:
+            self.client.get(url)
+
+        for i in range(5):
+            project.owned_by = factories.UserFactory.create()
+            project.save()
+
+        with CaptureQueriesContext(connection) as changed:
+            response = self.client.get(url)
+        self.assertEqual(len(changed), len(initial))
+        self.assertContains(response, "New value of 'Responsible' was", 5)
+
+    @mock.patch("workbench.tools.history.PAGE_SIZE", 2)
+    def test_pagination(self):
+        """The history modal shows the newest actions and loads older pages"""
+        project = factories.ProjectFactory.create(title="Version 0")
+        for i in range(1, 5):
+            project.title = "Version %s" % i
+            project.save()
+        self.client.force_login(project.owned_by)
+        url = "/history/projects_project/id/{}/".format(project.pk)
+
+        response = self.client.get(url)
+        self.assertContains(response, "Version 4")
+        self.assertContains(response, "Version 3")
+        self.assertNotContains(response, "Version 2")
+        older_url = response.context["older_url"]
+        self.assertContains(response, older_url)
+
+        response = self.client.get(older_url)
+        self.assertNotContains(response, "Version 3")
+        self.assertContains(response, "Version 2")
+        self.assertContains(response, "Version 1")
+        self.assertNotContains(response, "modal-dialog")
+
+        response = self.client.get(response.context["older_url"])
+        self.assertContains(response, "Version 0")
+        self.assertNotContains(response, "data-history-older")
+
+        response = self.client.get(url + "?before=1")
+        self.assertNotContains(response, "No history found")
+        response = self.client.get(url + "?before=abc")
+        self.assertContains(response, "Version 4")
+
     def test_nothing(self):
         """History modal of a PK without any history entries"""
         self.client.force_login(factories.UserFactory.create())
@@ -176,6 +259,12 @@ class HistoryTest(TestCase):
         response = self.client.get("/history/not_exists/id/3/")
         self.assertEqual(response.status_code, 404)
 
+        response = self.client.get("/history/projects_project/id/%s/" % 2**63)
+        self.assertEqual(response.status_code, 404)
+
+        response = self.client.get("/history/projects_project/id/%s/" % (2**63 - 1))
+        self.assertEqual(response.status_code, 200)
+
     def assert_only_visible_with(self, url, text, feature):
         """Helper for verifying that some values are only visisble with FEATURES"""
         with override_settings(FEATURES={feature: True}):
@@ -0,0 +1,213 @@
+import datetime as dt
+import io
+import zipfile
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from workbench import factories, jobs
+from workbench.invoices.models import Invoice
+from workbench.models import Job
+from workbench.tools.validation import in_days
+
+
+class JobsTest(TestCase):
+    def test_invoice_pdf(self):
+        """Invoice PDFs are rendered by the worker and downloaded afterwards"""
+        invoice = factories.InvoiceFactory.create()
+        user = factories.UserFactory.create()
+        self.client.force_login(user)
+
+        response = self.client.post(
+            "/jobs/invoice_pdf/prepare/?invoice=%s" % invoice.pk
+        )
+        self.assertEqual(response.status_code, 202)
+        job = response.json()
+        self.assertEqual(job["status"], "Queued")
+        self.assertIsNone(job["download_url"])
+
+        response = self.client.get(job["url"])
+        self.assertFalse(response.json()["is_done"])
+        self.assertEqual(
+            self.client.get("/jobs/%s/download/" % job["id"]).status_code, 404
+        )
+
+        jobs.work(once=True)
+
+        job = self.client.get(job["url"]).json()
+        self.assertTrue(job["is_done"])
+        self.assertEqual(job["progress"], 100)
+        response = self.client.get(job["download_url"])
+        self.assertEqual(response["content-type"], "application/pdf")
+        self.assertEqual(
+            response["content-disposition"],
+            'attachment; filename="%s.pdf"' % invoice.code,
+        )
+        self.assertTrue(response.content.startswith(b"%PDF"))
+
+        self.client.force_login(factories.UserFactory.create())
+        self.assertEqual(self.client.get(job["url"]).status_code, 404)
+        self.assertEqual(self.client.get(job["download_url"]).status_code, 404)
+
+    def test_prepare(self):
+        """The prepare endpoint validates the job kind and its parameters"""
+        self.client.force_login(factories.UserFactory.create())
+
+        self.assertEqual(self.client.get("/jobs/invoice_pdf/prepare/").status_code, 405)
+        self.assertEqual(self.client.post("/jobs/unknown/prepare/").status_code, 404)
+        self.assertEqual(
+            self.client.post("/jobs/invoice_pdf/prepare/?invoice=x").status_code, 400
+        )
+        self.assertEqual(
+            self.client.post("/jobs/invoice_pdf/prepare/?invoice=0").status_code, 404
+        )
+        self.assertEqual(
+            self.client.post("/jobs/dunning_letter/prepare/").status_code, 400
+        )
+        with self.settings(FEATURES={"controlling": False}):
+            self.assertEqual(
+                self.client.post("/jobs/logged_hours_xlsx/prepare/").status_code, 403
+            )
+        self.assertEqual(Job.objects.count(), 0)
+
+    def test_failure(self):
+        """Failing jobs store the error"""
+        invoice = factories.InvoiceFactory.create()
+        self.client.force_login(invoice.owned_by)
+        url = self.client.post(
+            "/jobs/invoice_pdf/prepare/?invoice=%s" % invoice.pk
+        ).json()["url"]
+
+        with mock.patch.object(
+            jobs.KINDS["invoice_pdf"], "run", side_effect=Exception("Boom")
+        ), self.assertLogs("workbench.jobs", "ERROR"):
+            jobs.work(once=True)
+
+        self.assertTrue(self.client.get(url).json()["is_failed"])
+        self.assertIn("Boom", Job.objects.get().error)
+
+    def test_annual_working_time_and_dunning_letter(self):
+        """Annual working time PDFs, dunning letters and logbook exports"""
+        year = factories.YearFactory.create()
+        for user in factories.UserFactory.create_batch(
+            2, working_time_model=year.working_time_model
+        ):
+            factories.EmploymentFactory.create(user=user)
+        factories.LoggedHoursFactory.create(rendered_by=user)
+        invoice = factories.InvoiceFactory.create(
+            invoiced_on=in_days(-60), due_on=in_days(-45), status=Invoice.SENT
+        )
+        self.client.force_login(user)
+
+        urls = [
+            self.client.post(url).json()["url"]
+            for url in [
+                "/jobs/annual_working_time_pdf/prepare/?year=%s&user=active"
+                % year.year,
+                "/jobs/dunning_letter/prepare/?customer=%s" % invoice.customer_id,
+                "/jobs/logged_hours_xlsx/prepare/?rendered_by=-1",
+            ]
+        ]
+        jobs.work(once=True)
+        awt, dunning_letter, xlsx = [
+            self.client.get(self.client.get(url).json()["download_url"]) for url in urls
+        ]
+
+        self.assertEqual(awt["content-type"], "application/zip")
+        with zipfile.ZipFile(io.BytesIO(awt.content)) as zf:
+            self.assertEqual(len(zf.namelist()), 3)
+        self.assertEqual(dunning_letter["content-type"], "application/pdf")
+        invoice.refresh_from_db()
+        self.assertEqual(invoice.last_reminded_on, dt.date.today())
+        self.assertEqual(
+            xlsx["content-disposition"], 'attachment; filename="hours.xlsx"'
+        )
+
+    def test_batch_pdfs(self):
+        """Invoices and offers are rendered into merged PDFs or ZIP files"""
+        project = factories.ProjectFactory.create()
+        for i in range(3):
+            factories.InvoiceFactory.create(
+                project=project,
+                customer=project.customer,
+                contact=project.contact,
+                invoiced_on=in_days(-i),
+            )
+        factories.InvoiceFactory.create(project=project, status=Invoice.PAID)
+        for i in range(2):
+            factories.OfferFactory.create(project=project)
+        self.client.force_login(project.owned_by)
+
+        urls = [
+            self.client.post(url).json()["url"]
+            for url in [
+                "/jobs/invoices_pdf/prepare/?s=open&project=%s" % project.pk,
+                "/jobs/invoices_pdf/prepare/?s=open&format=zip&month=%s"
+                % in_days(0).strftime("%Y-%m"),
+                "/jobs/project_offers_pdf/prepare/?project=%s&format=zip" % project.pk,
+                "/jobs/project_offers_pdf/prepare/?project=%s" % project.pk,
+            ]
+        ]
+        with self.settings(PDF_PROCESSES=2):
+            jobs.work(once=True)
+        merged, invoices, offers, offers_merged = [
+            self.client.get(self.client.get(url).json()["download_url"]) for url in urls
+        ]
+
+        self.assertEqual(
+            merged["content-disposition"], 'attachment; filename="invoices.pdf"'
+        )
+        self.assertTrue(merged.content.startswith(b"%PDF"))
+        with zipfile.ZipFile(io.BytesIO(invoices.content)) as zf:
+            self.assertEqual(
+                sorted(zf.namelist()),
+                sorted(
+                    "%s.pdf" % invoice.code
+                    for invoice in Invoice.objects.open().filter(
+                        invoiced_on__month=in_days(0).month
+                    )
+                ),
+            )
+            self.assertTrue(
+                all(zf.read(name).startswith(b"%PDF") for name in zf.namelist())
+            )
+        with zipfile.ZipFile(io.BytesIO(offers.content)) as zf:
+            self.assertEqual(len(zf.namelist()), 2)
+        self.assertEqual(offers_merged["content-type"], "application/pdf")
+
+        self.assertEqual(
+            self.client.post("/jobs/invoices_pdf/prepare/?format=docx").status_code,
+            400,
+        )
+        self.assertEqual(
+            self.client.post("/jobs/invoices_pdf/prepare/?month=13").status_code, 400
+        )
+        response = self.client.post("/jobs/invoices_pdf/prepare/?month=2000-01")
+        self.assertContains(response, "No invoices found.", status_code=400)
+        with self.settings(BATCH_MAX_ITEMS=2):
+            response = self.client.post("/jobs/invoices_pdf/prepare/?s=open")
+        self.assertContains(response, "too many", status_code=400)
+        self.assertEqual(
+            self.client.post(
+                "/jobs/project_offers_pdf/prepare/?project=%s"
+                % factories.ProjectFactory.create().pk
+            ).status_code,
+            400,
+        )
+
+    def test_cleanup(self):
+        """Old jobs are removed and jobs of dead workers fail"""
+        user = factories.UserFactory.create()
+        old = timezone.now() - dt.timedelta(days=10)
+        Job.objects.create(created_by=user, kind="a", status=Job.DONE, finished_at=old)
+        Job.objects.create(
+            created_by=user, kind="b", status=Job.RUNNING, started_at=old
+        )
+        Job.objects.create(created_by=user, kind="c")
+
+        jobs.cleanup()
+        self.assertEqual(
+            [(job.kind, job.status) for job in Job.objects.order_by("pk")],
+            [("b", Job.FAILED), ("c", Job.QUEUED)],
+        )
@@ -2,7 +2,10 @@ from django.test import TestCase
 from django.test.utils import override_settings
 
 from workbench import factories
-from workbench.tools.search import process_query
+from workbench.contacts.models import Organization, Person
+from workbench.models import SearchEntry
+from workbench.projects.models import Project
+from workbench.tools.search import process_query, ranked, ranked_search_all
 
 
 class SearchTest(TestCase):
@@ -43,3 +46,67 @@ class SearchTest(TestCase):
         self.assertEqual(process_query("org"), "org:*")
         self.assertEqual(process_query("a b"), "a & b:*")
         self.assertEqual(process_query("(foo bar)"), "foo & bar:*")
+
+    def test_ranked_search(self):
+        """The search index ranks results across models and matches typos"""
+        project = factories.ProjectFactory.create(title="Website relaunch")
+        other = factories.ProjectFactory.create(
+            title="Intranet", description="Website relaunch website"
+        )
+        organization = factories.OrganizationFactory.create(name="Websites Ltd")
+        archived = factories.OrganizationFactory.create(
+            name="Website Ltd", is_archived=True
+        )
+
+        self.assertEqual(
+            list(Project.objects.ranked_search("website")), [project, other]
+        )
+        self.assertEqual(
+            list(Project.objects.ranked_search("wesbite relaunch")), [project]
+        )
+        self.assertEqual(list(Project.objects.ranked_search("relauch")), [project])
+        self.assertEqual(
+            list(Organization.objects.ranked_search("website")),
+            [archived, organization],
+        )
+
+        results = ranked("website", [Organization, Person, Project])
+        self.assertEqual(set(results), {project, other, organization})
+        self.assertEqual(results[-1], other)
+        self.assertTrue(all(result.search_rank > 0 for result in results))
+        self.assertEqual(ranked("website", [Organization], limit=1), [organization])
+        self.assertEqual(ranked("", [Project]), [])
+
+        project.delete()
+        self.assertEqual(ranked("website", [Project]), [other])
+        self.assertEqual(
+            SearchEntry.objects.filter(table_name="projects_project").count(),
+            Project.objects.count(),
+        )
+
+        self.client.force_login(other.owned_by)
+        response = self.client.get("/search/?q=website")
+        self.assertContains(response, other.get_absolute_url())
+
+    def test_ranked_search_all(self):
+        """All sources are searched in one statement keeping their limits"""
+        for i in range(3):
+            factories.ProjectFactory.create(title="Website %s" % i)
+        factories.ProjectFactory.create(title="Website", description="Website")
+        organization = factories.OrganizationFactory.create(name="Website Ltd")
+
+        sources = [
+            Project.objects.select_related("owned_by"),
+            Organization.objects.active(),
+            Person.objects.none(),
+            Person.objects.active(),
+        ]
+        with self.assertNumQueries(3):
+            results = ranked_search_all(sources, "website", limit=2)
+        self.assertEqual(len(results[0]), 2)
+        self.assertEqual(results[0][0].description, "Website")
+        self.assertTrue(results[0][0].search_rank >= results[0][1].search_rank)
+        self.assertEqual(results[1:], [[organization], [], []])
+
+        results = ranked_search_all(sources, "", limit=2)
+        self.assertEqual(results[0], list(sources[0][:2]))
@@ -1,3 +1,4 @@
+import io
 from decimal import Decimal
 
 from django import forms
@@ -8,9 +9,10 @@ from workbench import factories
 from workbench.awt.models import Year  # any tools.Model()
 from workbench.contacts.models import Organization
 from workbench.projects.models import Project
-from workbench.tools import formats
+from workbench.tools import benchmark, formats
 from workbench.tools.forms import Autocomplete
 from workbench.tools.models import ModelWithTotal
+from workbench.tools.pdf import PDFDocument
 from workbench.tools.testing import messages
 from workbench.tools.validation import is_title_specific
 
@@ -107,3 +109,47 @@ class ToolsTest(TestCase):
         ]:
             with self.subTest(value=value, result=result):
                 self.assertEqual(formats.hours_and_minutes(value), result)
+
+    def test_benchmark(self):
+        """Benchmarks run on generated data and report queries and memory"""
+        data = benchmark.generate(users=2, projects=2, years=1)
+        self.assertEqual(data.counts["projects"], 2)
+        self.assertTrue(data.counts["logged_hours"] > 0)
+
+        results = benchmark.run(data, repeat=1)
+        self.assertEqual(
+            [result["name"] for result in results],
+            [
+                "green_hours",
+                "labor_costs_by_cost_center",
+                "project_budget_statistics",
+                "annual_working_time",
+                "planning_report",
+                "grouped_services",
+                "history",
+                "invoice_pdfs",
+                "pdf_document_setup",
+            ],
+        )
+        for result in results[:-1]:
+            with self.subTest(result=result):
+                self.assertTrue(result["queries"] > 0)
+                self.assertTrue(result["peak_memory"] > 0)
+        self.assertEqual(results[-1]["queries"], 0)
+
+        results = benchmark.run(data, repeat=2, names={"history"})
+        self.assertEqual(len(results), 1)
+
+    def test_shared_pdf_style(self):
+        """PDF documents share style sheets but not frames"""
+        first, second, small = [
+            PDFDocument(io.BytesIO(), **kwargs) for kwargs in [{}, {}, {"font_size": 7}]
+        ]
+        for pdf in [first, second, small]:
+            pdf.init_letter()
+
+        self.assertIs(first.style, second.style)
+        self.assertIsNot(first.style, small.style)
+        self.assertEqual(small.style.fontSize, 7)
+        self.assertIsNot(first.rest_frame, second.rest_frame)
+        self.assertIs(first.stationery(), second.stationery())
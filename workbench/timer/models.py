@@ -1,12 +1,15 @@
 import datetime as dt
+import uuid
 from decimal import ROUND_UP, Decimal
 from urllib.parse import urlencode
 
-from django.db import models
+from django.core.cache import caches
+from django.db import models, transaction
+from django.db.models import signals
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.text import capfirst
-from django.utils.translation import gettext, gettext_lazy as _
+from django.utils.translation import get_language, gettext, gettext_lazy as _
 
 from workbench.accounts.models import User
 from workbench.logbook.models import Break, LoggedHours
@@ -16,6 +19,45 @@ from workbench.tools.formats import Z1, local_date_format
 TIMESTAMPS_DETECT_GAP = 300  # seconds
 
 
+def slices_version(user_id):
+    """
+    Returns a token which changes whenever the user or their timestamps,
+    logged hours or breaks are saved or deleted
+    """
+    cache = caches["timer"]
+    key = "slices-version:%s" % user_id
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(key, version):
+            version = cache.get(key) or version
+    return version
+
+
+def invalidate_slices(user_id):
+    caches["timer"].delete("slices-version:%s" % user_id)
+
+
+def slices_changed(user_ids):
+    """
+    Invalidates the cached slices of ``user_ids`` now and again after the
+    transaction commits
+
+    Saving and deleting users, timestamps, logged hours and breaks calls this
+    automatically; bulk updates have to call it themselves.
+    """
+    user_ids = set(user_ids)
+    for user_id in user_ids:
+        invalidate_slices(user_id)
+
+    def invalidate():
+        # Slices computed before the transaction is committed are outdated too
+        for user_id in user_ids:
+            invalidate_slices(user_id)
+
+    transaction.on_commit(invalidate)
+
+
 class Slice(dict):
     @property
     def has_associated_log(self):
@@ -235,6 +277,26 @@ class TimestampQuerySet(models.QuerySet):
 
         return result
 
+    def cached_slices(self, user, *, day=None):
+        """
+        Returns the slices of the day, cached until the data of the user changes
+
+        Database queries are only made when the slices are computed.
+        """
+        day = day or dt.date.today()
+        key = "slices:%s:%s:%s:%s" % (
+            user.id,
+            day.isoformat(),
+            slices_version(user.id),
+            get_language(),
+        )
+        cache = caches["timer"]
+        slices = cache.get(key)
+        if slices is None:
+            slices = self.slices(user, day=day)
+            cache.set(key, slices)
+        return slices
+
 
 class Timestamp(models.Model):
     START = "start"
@@ -287,3 +349,18 @@ class Timestamp(models.Model):
     @property
     def pretty_time(self):
         return local_date_format(self.created_at, fmt="H:i")
+
+
+def _invalidate_slices(sender, instance, **kwargs):
+    slices_changed([getattr(instance, USER_FIELDS[sender])])
+
+
+USER_FIELDS = {
+    User: "id",
+    Timestamp: "user_id",
+    LoggedHours: "rendered_by_id",
+    Break: "user_id",
+}
+for sender in USER_FIELDS:
+    signals.post_save.connect(_invalidate_slices, sender=sender)
+    signals.post_delete.connect(_invalidate_slices, sender=sender)
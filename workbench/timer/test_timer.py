@@ -1,7 +1,8 @@
 import datetime as dt
 from decimal import Decimal
 
-from django.test import TestCase
+from django.core.cache import caches
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.timezone import localtime
@@ -510,3 +511,65 @@ class TimestampsTest(TestCase):
         slices = Timestamp.objects.slices(user)
         self.assertEqual(len(slices), 1)
         self.assertEqual(slices[0].elapsed_hours, None)
+
+    @override_settings(
+        CACHES={
+            "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+            "timer": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": "timer",
+            },
+        }
+    )
+    def test_cached_slices(self):
+        """Slices are cached until the data changes, idle polls get a 304"""
+        caches["timer"].clear()
+        user = factories.UserFactory.create()
+        url = "/list-timestamps/?user={}".format(user.signed_email)
+        user.timestamp_set.create(
+            type=Timestamp.START, created_at=timezone.now() - dt.timedelta(seconds=10)
+        )
+
+        response = self.client.get(url)
+        self.assertEqual(len(response.json()["timestamps"]), 1)
+        etag = response["ETag"]
+
+        with self.assertNumQueries(1):  # application_name in user_middleware
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        with self.assertNumQueries(0):
+            Timestamp.objects.cached_slices(user)
+
+        # Changing the user changes the ETag too
+        user.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        etag = response["ETag"]
+
+        user.timestamp_set.create(type=Timestamp.STOP)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(len(response.json()["timestamps"]), 1)
+
+        hours = factories.LoggedHoursFactory.create(rendered_by=user)
+        self.assertEqual(len(Timestamp.objects.cached_slices(user)), 2)
+
+        # Bulk updates invalidate the slices too
+        etag = self.client.get(url)["ETag"]
+        service = factories.ServiceFactory.create(project=hours.service.project)
+        self.client.force_login(user)
+        response = self.client.post(
+            hours.service.urls["reassign_logbook"],
+            {"service": service.pk},
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest",
+        )
+        self.assertEqual(response.status_code, 202)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(service.title, str(Timestamp.objects.cached_slices(user)))
+
+        hours.delete()
+        self.assertEqual(len(Timestamp.objects.cached_slices(user)), 1)
@@ -1,20 +1,24 @@
 import datetime as dt
+import hashlib
 
 from django import forms
 from django.contrib import messages
+from django.core.cache import caches
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
 from django.utils.decorators import decorator_from_middleware
+from django.utils.http import quote_etag
 from django.utils.timezone import make_aware
-from django.utils.translation import gettext as _
+from django.utils.translation import get_language, gettext as _
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_GET, require_POST
 
 from corsheaders.middleware import CorsMiddleware
 
 from workbench.accounts.models import User
-from workbench.timer.models import Timestamp
+from workbench.timer.models import Timestamp, slices_version
 from workbench.tools.formats import Z1, hours, local_date_format
 from workbench.tools.forms import Form, ModelForm
 from workbench.tools.validation import filter_form
@@ -90,15 +94,52 @@ class SignedEmailUserForm(SignedEmailUserMixin, Form):
     pass
 
 
+def _list_timestamps_etag(user_id):
+    return quote_etag(
+        hashlib.md5(
+            repr(
+                (user_id, dt.date.today(), slices_version(user_id), get_language())
+            ).encode("utf-8")
+        ).hexdigest()
+    )
+
+
 @decorator_from_middleware(CorsMiddleware)
 @require_GET
 def list_timestamps(request):
-    form = SignedEmailUserForm(request.GET, request=request)
-    if not form.is_valid():
-        return JsonResponse({"errors": form.errors.as_json()}, status=400)
-
-    user = form.cleaned_data["user"]
-    slices = Timestamp.objects.slices(user)
+    # Idle polls are answered with 304 Not Modified without looking up the
+    # user or computing slices. Signed emails are only remembered after the
+    # form has verified them, and saving the user changes the ETag.
+    signed_email = request.GET.get("user")
+    user_key = "slices-user:%s" % signed_email
+    remember = signed_email and not request.user.is_authenticated
+    user_id = caches["timer"].get(user_key) if remember else None
+
+    response = None
+    if user_id is not None:
+        etag = _list_timestamps_etag(user_id)
+        response = get_conditional_response(request, etag=etag)
+
+    if response is None:
+        form = SignedEmailUserForm(request.GET, request=request)
+        if not form.is_valid():
+            return JsonResponse({"errors": form.errors.as_json()}, status=400)
+
+        user = form.cleaned_data["user"]
+        if remember:
+            caches["timer"].set(user_key, user.id)
+        etag = _list_timestamps_etag(user.id)
+        response = get_conditional_response(
+            request, etag=etag
+        ) or _list_timestamps_response(user)
+
+    response["ETag"] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def _list_timestamps_response(user):
+    slices = Timestamp.objects.cached_slices(user)
     daily_hours = sum(
         (slice["logged_hours"].hours for slice in slices if slice.get("logged_hours")),
         Z1,
@@ -148,7 +189,7 @@ def timestamps(request, form):
     request.user.take_a_break_warning(request=request)
     today = dt.date.today()
     day = form.cleaned_data["day"] or today
-    slices = Timestamp.objects.slices(request.user, day=day)
+    slices = Timestamp.objects.cached_slices(request.user, day=day)
     hours = sum(
         (slice["logged_hours"].hours for slice in slices if slice.get("logged_hours")),
         Z1,
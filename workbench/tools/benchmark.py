@@ -0,0 +1,275 @@
+"""
+Benchmarks of reporting functions using synthetic data
+
+``generate()`` fills the database with users, projects and several years of
+logged hours, planned work, absences and invoices. ``run()`` then measures
+the wall time, the number of database queries and the peak memory usage of
+the main reporting entry points. Use ``./manage.py benchmark`` to run the
+benchmarks in a throwaway database and to write the results as JSON.
+"""
+
+import datetime as dt
+import io
+import random
+import statistics
+import time
+import tracemalloc
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+from workbench import factories
+from workbench.audit.models import LoggedAction
+from workbench.awt.models import Absence
+from workbench.awt.reporting import annual_working_time
+from workbench.invoices.models import Invoice
+from workbench.logbook.models import LoggedHours
+from workbench.planning.models import PlannedWork
+from workbench.planning.reporting import team_planning
+from workbench.projects.models import Project
+from workbench.reporting.green_hours import green_hours
+from workbench.reporting.labor_costs import labor_costs_by_cost_center
+from workbench.reporting.project_budget_statistics import project_budget_statistics
+from workbench.tools.history import EVERYTHING, changes
+from workbench.tools.pdf import PDFDocument
+from workbench.tools.validation import monday
+
+
+def _workdays(date_from, date_until):
+    day = date_from
+    while day <= date_until:
+        if day.weekday() < 5:
+            yield day
+        day += dt.timedelta(days=1)
+
+
+def generate(*, users=10, projects=50, years=2, seed=0):
+    """
+    Generates a dataset and returns the objects needed by ``run()``
+
+    Every user logs hours on every working day of the last ``years`` years
+    and has a few absences per year. Every project has three services, planned
+    work for the coming weeks, a few invoices and some history.
+    """
+    rng = random.Random(seed)
+    date_until = dt.date.today()
+    date_from = dt.date(date_until.year - years + 1, 1, 1)
+
+    working_time_model = factories.WorkingTimeModelFactory.create()
+    for year in range(date_from.year, date_until.year + 2):
+        factories.YearFactory.create(working_time_model=working_time_model, year=year)
+
+    team = factories.TeamFactory.create()
+    user_list = []
+    for i in range(users):
+        user = factories.UserFactory.create(working_time_model=working_time_model)
+        factories.EmploymentFactory.create(
+            user=user,
+            date_from=date_from,
+            hourly_labor_costs=rng.choice([60, 80, 100]),
+            green_hours_target=rng.choice([50, 70, 90]),
+        )
+        team.members.add(user)
+        user_list.append(user)
+
+    cost_centers = [factories.CostCenterFactory.create() for i in range(3)]
+    project_list = []
+    services = []
+    for i in range(projects):
+        project = factories.ProjectFactory.create(
+            owned_by=rng.choice(user_list), cost_center=rng.choice(cost_centers)
+        )
+        project_list.append(project)
+        services.extend(
+            factories.ServiceFactory.create(
+                project=project,
+                effort_rate=rng.choice([None, 150, 180]),
+                service_hours=rng.randint(0, 200),
+            )
+            for j in range(3)
+        )
+        for j in range(5):
+            project.title = "%s (%s)" % (project.title.split(" (")[0], j)
+            project.save()
+
+    LoggedHours.objects.bulk_create(
+        (
+            LoggedHours(
+                service=rng.choice(services),
+                created_by=user,
+                rendered_by=user,
+                rendered_on=day,
+                hours=Decimal(rng.choice([1, 2, 2.5, 4])),
+                description="Synthetic",
+            )
+            for user in user_list
+            for day in _workdays(date_from, date_until)
+            for k in range(2)
+        ),
+        batch_size=1000,
+    )
+
+    Absence.objects.bulk_create(
+        Absence(
+            user=user,
+            starts_on=dt.date(year, rng.randint(1, 12), rng.randint(1, 28)),
+            days=Decimal(rng.randint(1, 5)),
+            description="Synthetic",
+            reason=Absence.VACATION,
+            is_vacation=True,
+        )
+        for user in user_list
+        for year in range(date_from.year, date_until.year + 1)
+        for k in range(5)
+    )
+
+    weeks = [monday() + dt.timedelta(days=7 * i) for i in range(20)]
+    PlannedWork.objects.bulk_create(
+        PlannedWork(
+            project=project,
+            user=rng.choice(user_list),
+            title="Synthetic",
+            planned_hours=Decimal(rng.randint(4, 80)),
+            weeks=sorted(rng.sample(weeks, rng.randint(1, 5))),
+        )
+        for project in project_list
+        for k in range(2)
+    )
+
+    for project in project_list:
+        for year in range(date_from.year, date_until.year + 1):
+            factories.InvoiceFactory.create(
+                project=project,
+                customer=project.customer,
+                contact=project.contact,
+                owned_by=project.owned_by,
+                invoiced_on=dt.date(year, rng.randint(1, 12), rng.randint(1, 28)),
+                status=Invoice.SENT,
+                subtotal=rng.randint(1, 20) * 1000,
+            )
+
+    return SimpleNamespace(
+        date_range=[date_from, date_until],
+        users=user_list,
+        team=team,
+        projects=project_list,
+        counts={
+            "users": users,
+            "projects": projects,
+            "logged_hours": LoggedHours.objects.count(),
+            "absences": Absence.objects.count(),
+            "planned_work": PlannedWork.objects.count(),
+            "invoices": Invoice.objects.count(),
+            "logged_actions": LoggedAction.objects.count(),
+        },
+    )
+
+
+def _invoice_pdfs(invoices):
+    # One document per invoice, as rendered by the PDF views and batches
+    for invoice in invoices:
+        pdf = PDFDocument(io.BytesIO())
+        pdf.init_letter()
+        pdf.process_invoice(invoice)
+        pdf.generate()
+
+
+#: Number of documents set up by the ``pdf_document_setup`` benchmark
+PDF_DOCUMENTS = 100
+
+
+def _pdf_document_setup():
+    # Style sheets, frames and page templates only, without any content;
+    # divide the wall time by PDF_DOCUMENTS to get the overhead per document
+    for i in range(PDF_DOCUMENTS):
+        pdf = PDFDocument(io.BytesIO())
+        pdf.init_letter()
+
+
+def benchmarks(data):
+    """
+    Returns a dictionary of benchmark names and callables
+    """
+    project = data.projects[0]
+    return {
+        "green_hours": lambda: green_hours(data.date_range),
+        "labor_costs_by_cost_center": lambda: labor_costs_by_cost_center(
+            data.date_range
+        ),
+        "project_budget_statistics": lambda: project_budget_statistics(
+            Project.objects.all()
+        ),
+        "annual_working_time": lambda: annual_working_time(
+            data.date_range[1].year, users=data.users
+        ),
+        "planning_report": lambda: team_planning.uncached(data.team),
+        "grouped_services": lambda: [
+            project.grouped_services
+            for project in Project.objects.filter(
+                pk__in=[project.pk for project in data.projects[:10]]
+            )
+        ],
+        "history": lambda: changes(
+            Project,
+            EVERYTHING,
+            LoggedAction.objects.for_row(Project, project.pk),
+        ),
+        "invoice_pdfs": lambda: _invoice_pdfs(
+            Invoice.objects.select_related("owned_by", "project")[:20]
+        ),
+        "pdf_document_setup": _pdf_document_setup,
+    }
+
+
+def measure(fn):
+    """
+    Returns the wall time, number of queries and peak memory usage of ``fn``
+
+    ``fn`` runs twice: once for the wall time without any instrumentation,
+    and once with queries captured and memory allocations traced. Tracing
+    slows down Python code considerably and would distort the timings.
+    """
+    start = time.perf_counter()
+    fn()
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    try:
+        with CaptureQueriesContext(connections["default"]) as context:
+            fn()
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        "seconds": seconds,
+        "queries": len(context.captured_queries),
+        "peak_memory": peak_memory,
+    }
+
+
+def run(data, *, repeat=3, names=None):
+    """
+    Runs all benchmarks ``repeat`` times and returns a list of results
+
+    Results contain the minimum and median wall time in seconds; the number
+    of queries and the peak memory usage in bytes are taken from the slowest
+    run.
+    """
+    results = []
+    for name, fn in benchmarks(data).items():
+        if names and name not in names:
+            continue
+        runs = [measure(fn) for i in range(repeat)]
+        slowest = max(runs, key=lambda run: run["seconds"])
+        results.append(
+            {
+                "name": name,
+                "seconds_min": min(run["seconds"] for run in runs),
+                "seconds_median": statistics.median(run["seconds"] for run in runs),
+                "queries": slowest["queries"],
+                "peak_memory": slowest["peak_memory"],
+            }
+        )
+    return results
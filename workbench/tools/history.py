@@ -1,6 +1,8 @@
-from collections import namedtuple
+from collections import defaultdict, namedtuple
+from contextlib import suppress
 from decimal import Decimal
 
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.http import Http404
 from django.urls import reverse
@@ -31,6 +33,7 @@ from workbench.logbook.models import Break, LoggedCost, LoggedHours
 from workbench.offers.models import Offer
 from workbench.planning.models import PlannedWork, PlanningRequest
 from workbench.projects.models import Campaign, Project, Service as ProjectService
+from workbench.reporting.caching import cached
 from workbench.reporting.models import CostCenter
 from workbench.tools.formats import local_date_format
 
@@ -92,27 +95,11 @@ class Prettifier:
             values[field.attname] = value
         return default_if_none(value, _("<no value>"))
 
-    def handle_related_model(self, values, field):
-        value = values.get(field.attname)
-        if value is None:
-            return _("<no value>")
-
-        model = field.related_model
-        key = (model, value)
-        if key in self._prettified_instances:
-            values[field.attname] = self._prettified_instances[key][0]
-            return self._prettified_instances[key][1]
-
-        queryset = model._default_manager.all()
-
-        instance = None
-        try:
-            instance = queryset.get(pk=value)
-            pretty = str(instance)
-        except model.DoesNotExist:
+    def _prettify_instance(self, model, value, instance):
+        if instance is None:
             pretty = _("Deleted %s instance") % model._meta.verbose_name
         else:
-            values[field.attname] = instance
+            pretty = str(instance)
 
         if model in HISTORY:
             pretty = format_html(
@@ -121,7 +108,59 @@ class Prettifier:
                 pretty,
             )
 
-        self._prettified_instances[key] = (instance, pretty)
+        self._prettified_instances[(model, value)] = (instance, pretty)
+
+    def prefetch(self, fields, actions):
+        """
+        Fetches all instances referenced by ``fields`` in ``actions`` at once
+
+        Uses one query per related model instead of one query per distinct
+        foreign key value in ``handle_related_model``.
+        """
+        related = defaultdict(set)
+        for action in actions:
+            values = (
+                action.changed_fields if action.action == "U" else action.row_data
+            ) or {}
+            for field in fields:
+                if field.choices or not field.related_model:
+                    continue
+                value = values.get(field.attname)
+                if (
+                    value is not None
+                    and (field.related_model, value) not in self._prettified_instances
+                ):
+                    related[field.related_model].add(value)
+
+        for model, values in related.items():
+            pks = {}
+            for value in values:
+                with suppress(ValidationError):
+                    pks[value] = model._meta.pk.to_python(value)
+            instances = model._default_manager.in_bulk(set(pks.values()))
+            for value in values:
+                self._prettify_instance(
+                    model, value, instances.get(pks.get(value, value))
+                )
+
+    def handle_related_model(self, values, field):
+        value = values.get(field.attname)
+        if value is None:
+            return _("<no value>")
+
+        model = field.related_model
+        key = (model, value)
+        if key not in self._prettified_instances:
+            queryset = model._default_manager.all()
+            try:
+                instance = queryset.get(pk=value)
+            except model.DoesNotExist:
+                instance = None
+            self._prettify_instance(model, value, instance)
+
+        instance, pretty = self._prettified_instances[key]
+        if instance is not None:
+            values[field.attname] = instance
         return pretty
 
     def format(self, values, field):
@@ -145,14 +184,37 @@ class Prettifier:
         return default_if_none(value, _("<no value>"))
 
 
+@cached("accounts_user")
+def user_names():
+    return {u.pk: u.get_full_name() for u in User.objects.all()}
+
+
+#: Number of logged actions shown at once in the history modal
+PAGE_SIZE = 50
+
+
+def page(actions, *, before=None, size=None):
+    """
+    Returns one page of ``actions`` and the cursor of the next older page
+
+    Pages are keyed on ``event_id``; the newest page is returned unless
+    ``before`` is given. The cursor is ``None`` if there are no older actions.
+    """
+    size = size or PAGE_SIZE
+    if before is not None:
+        actions = actions.filter(event_id__lt=before)
+    actions = list(actions.order_by("-event_id")[: size + 1])
+    older = actions[size - 1].event_id if len(actions) > size else None
+    return actions[:size][::-1], older
+
+
 def changes(model, fields, actions):
     changes = []
 
     if not actions:
         return changes
 
-    users = {u.pk: u.get_full_name() for u in User.objects.all()}
-    users[0] = _("<anonymous>")
+    users = {**user_names(), 0: _("<anonymous>")}
     fields = [
         f
         for f in model._meta.get_fields()
@@ -160,6 +222,7 @@ def changes(model, fields, actions):
     ]
 
     prettifier = Prettifier()
+    prettifier.prefetch(fields, actions)
 
     for action in actions:
         if action.action == "I":
@@ -10,13 +10,16 @@ from django.db.models.deletion import Collector
 from django.utils.translation import gettext, gettext_lazy as _
 
 from workbench.tools.formats import Z2, currency
-from workbench.tools.search import search
+from workbench.tools.search import ranked_search, search
 
 
 class SearchQuerySet(models.QuerySet):
     def search(self, terms):
         return search(self, terms)
 
+    def ranked_search(self, terms):
+        return ranked_search(self, terms)
+
 
 class SlowCollector(Collector):
     def can_fast_delete(self, *args, **kwargs):
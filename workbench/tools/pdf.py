@@ -1,9 +1,23 @@
 import datetime as dt
+import glob
+import hashlib
+import io
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
 from copy import deepcopy
 from decimal import Decimal as D
 from itertools import chain
 
 from django.conf import settings
+from django.db import connections
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 from django.utils.text import Truncator, capfirst
 from django.utils.translation import activate, gettext as _
 
@@ -21,7 +35,7 @@ from pdfdocument.document import (
     register_fonts_from_paths,
     sanitize,
 )
-from pdfdocument.utils import pdf_response as _pdf_response
+from pdfdocument.utils import FILENAME_RE, pdf_response as _pdf_response
 
 from workbench.tools.formats import currency, hours, local_date_format
 from workbench.tools.models import ModelWithTotal
@@ -44,6 +58,133 @@ def style(base, **kwargs):
     return style
 
 
+_styles = {}
+_styles_lock = threading.Lock()
+
+
+def _generate_style(font_name, font_size):
+    sheet = Empty()
+    sheet.fontName = font_name
+    sheet.fontSize = font_size
+
+    sheet.normal = style(
+        getSampleStyleSheet()["Normal"],
+        fontName="Rep",
+        fontSize=sheet.fontSize,
+        firstLineIndent=0,
+    )
+    sheet.normalWithExtraLeading = style(
+        sheet.normal,
+        leading=1.75 * sheet.fontSize,
+    )
+    sheet.heading1 = style(
+        sheet.normal,
+        fontName="Rep-Bold",
+        fontSize=1.25 * sheet.fontSize,
+        leading=1.25 * sheet.fontSize,
+    )
+    sheet.heading2 = style(
+        sheet.normal,
+        fontName="Rep-Bold",
+        fontSize=1.15 * sheet.fontSize,
+        leading=1.15 * sheet.fontSize,
+    )
+    sheet.heading3 = style(
+        sheet.normal,
+        fontName="Rep-Bold",
+        fontSize=1.1 * sheet.fontSize,
+        leading=1.2 * sheet.fontSize,
+    )
+
+    sheet.right = style(sheet.normal, alignment=TA_RIGHT)
+
+    sheet.small = style(sheet.normal, fontSize=sheet.fontSize * 0.9)
+    sheet.smaller = style(sheet.normal, fontSize=sheet.fontSize * 0.75)
+    sheet.bold = style(sheet.normal, fontName="Rep-Bold")
+    sheet.paragraph = style(sheet.normal, spaceBefore=1, spaceAfter=1)
+    sheet.table = (
+        ("FONT", (0, 0), (-1, -1), "Rep", sheet.fontSize),
+        ("TOPPADDING", (0, 0), (-1, -1), 0),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 1),
+        ("LEFTPADDING", (0, 0), (-1, -1), 0),
+        ("RIGHTPADDING", (0, 0), (-1, -1), 0),
+        ("FIRSTLINEINDENT", (0, 0), (-1, -1), 0),
+        ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+    )
+
+    sheet.tableHeadLine = sheet.table + (
+        ("ALIGN", (1, 0), (-1, -1), "RIGHT"),
+        ("RIGHTPADDING", (0, 0), (0, -1), 2 * mm),
+        ("LINEABOVE", (0, 0), (-1, 0), 0.2, colors.black),
+        ("LINEBELOW", (0, 0), (-1, 0), 0.2, colors.black),
+        ("FONT", (0, 0), (-1, 0), "Rep-Bold", sheet.fontSize),
+        ("TOPPADDING", (0, 0), (-1, 0), 1),
+        ("BOTTOMPADDING", (0, 0), (-1, 0), 2),
+    )
+
+    sheet.tableHead = sheet.tableHeadLine + (("TOPPADDING", (0, 1), (-1, 1), 1),)
+
+    bounds = Empty()
+    bounds.N = 275 * mm
+    bounds.E = 190 * mm
+    bounds.S = 18 * mm
+    bounds.W = 20 * mm
+    bounds.outsideN = bounds.N + 5 * mm
+    bounds.outsideS = bounds.S - 5 * mm
+    sheet.tableColumns = (bounds.E - bounds.W - 32 * mm, 32 * mm)
+    sheet.tableColumnsLeft = list(reversed(sheet.tableColumns))
+    sheet.tableThreeColumns = (
+        bounds.E - bounds.W - 32 * mm,
+        16 * mm,
+        16 * mm,
+    )
+    return sheet, bounds
+
+
+def shared_style(font_name, font_size):
+    """
+    Returns the style sheet and the page bounds for documents using
+    ``font_name`` and ``font_size``
+
+    Building the style sheet is a measurable part of rendering a single
+    document. Style sheets are built once per process and shared between all
+    documents and threads, so they must not be modified.
+    """
+    key = (font_name, font_size)
+    with _styles_lock:
+        if key not in _styles:
+            _styles[key] = _generate_style(font_name, font_size)
+        return _styles[key]
+
+
+def _stationery(canvas, doc):
+    pdf = doc.PDFDocument
+    canvas.saveState()
+
+    canvas.setFont(pdf.style.fontName + "-Bold", 10)
+    canvas.drawString(pdf.bounds.W, pdf.bounds.outsideN, settings.WORKBENCH.PDF_COMPANY)
+
+    canvas.setFont(pdf.style.fontName, 6)
+    canvas.drawString(pdf.bounds.W, pdf.bounds.outsideS, settings.WORKBENCH.PDF_ADDRESS)
+
+    canvas.setFont(pdf.style.fontName, 6)
+    canvas.drawRightString(
+        pdf.bounds.E,
+        pdf.bounds.outsideS,
+        _("Page %d")
+        % (
+            doc.page - doc.restartDocPageNumbers[doc.restartDocIndex - 1]
+            if doc.restartDocIndex
+            else doc.page
+        ),
+    )
+
+    canvas.restoreState()
+
+    pdf.draw_watermark(canvas)
+
+
 class PDFDocument(_PDFDocument):
     def __init__(self, *args, **kwargs):
         kwargs.setdefault("font_name", "Rep")
@@ -51,86 +192,7 @@ class PDFDocument(_PDFDocument):
         super().__init__(*args, **kwargs)
 
     def generate_style(self, *args, **kwargs):
-        self.style = Empty()
-        self.style.fontName = self.font_name
-        self.style.fontSize = self.font_size
-
-        self.style.normal = style(
-            getSampleStyleSheet()["Normal"],
-            fontName="Rep",
-            fontSize=self.style.fontSize,
-            firstLineIndent=0,
-        )
-        self.style.normalWithExtraLeading = style(
-            self.style.normal,
-            leading=1.75 * self.style.fontSize,
-        )
-        self.style.heading1 = style(
-            self.style.normal,
-            fontName="Rep-Bold",
-            fontSize=1.25 * self.style.fontSize,
-            leading=1.25 * self.style.fontSize,
-        )
-        self.style.heading2 = style(
-            self.style.normal,
-            fontName="Rep-Bold",
-            fontSize=1.15 * self.style.fontSize,
-            leading=1.15 * self.style.fontSize,
-        )
-        self.style.heading3 = style(
-            self.style.normal,
-            fontName="Rep-Bold",
-            fontSize=1.1 * self.style.fontSize,
-            leading=1.2 * self.style.fontSize,
-        )
-
-        self.style.right = style(self.style.normal, alignment=TA_RIGHT)
-
-        self.style.small = style(self.style.normal, fontSize=self.style.fontSize * 0.9)
-        self.style.smaller = style(
-            self.style.normal, fontSize=self.style.fontSize * 0.75
-        )
-        self.style.bold = style(self.style.normal, fontName="Rep-Bold")
-        self.style.paragraph = style(self.style.normal, spaceBefore=1, spaceAfter=1)
-        self.style.table = (
-            ("FONT", (0, 0), (-1, -1), "Rep", self.style.fontSize),
-            ("TOPPADDING", (0, 0), (-1, -1), 0),
-            ("BOTTOMPADDING", (0, 0), (-1, -1), 1),
-            ("LEFTPADDING", (0, 0), (-1, -1), 0),
-            ("RIGHTPADDING", (0, 0), (-1, -1), 0),
-            ("FIRSTLINEINDENT", (0, 0), (-1, -1), 0),
-            ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-            ("VALIGN", (0, 0), (-1, -1), "TOP"),
-        )
-
-        self.style.tableHeadLine = self.style.table + (
-            ("ALIGN", (1, 0), (-1, -1), "RIGHT"),
-            ("RIGHTPADDING", (0, 0), (0, -1), 2 * mm),
-            ("LINEABOVE", (0, 0), (-1, 0), 0.2, colors.black),
-            ("LINEBELOW", (0, 0), (-1, 0), 0.2, colors.black),
-            ("FONT", (0, 0), (-1, 0), "Rep-Bold", self.style.fontSize),
-            ("TOPPADDING", (0, 0), (-1, 0), 1),
-            ("BOTTOMPADDING", (0, 0), (-1, 0), 2),
-        )
-
-        self.style.tableHead = self.style.tableHeadLine + (
-            ("TOPPADDING", (0, 1), (-1, 1), 1),
-        )
-
-        self.bounds = Empty()
-        self.bounds.N = 275 * mm
-        self.bounds.E = 190 * mm
-        self.bounds.S = 18 * mm
-        self.bounds.W = 20 * mm
-        self.bounds.outsideN = self.bounds.N + 5 * mm
-        self.bounds.outsideS = self.bounds.S - 5 * mm
-        self.style.tableColumns = (self.bounds.E - self.bounds.W - 32 * mm, 32 * mm)
-        self.style.tableColumnsLeft = list(reversed(self.style.tableColumns))
-        self.style.tableThreeColumns = (
-            self.bounds.E - self.bounds.W - 32 * mm,
-            16 * mm,
-            16 * mm,
-        )
+        self.style, self.bounds = shared_style(self.font_name, self.font_size)
 
         frame_kwargs = {
             "showBoundary": self.show_boundaries,
@@ -189,38 +251,7 @@ class PDFDocument(_PDFDocument):
         )
 
     def stationery(self):
-        pdf = self
-
-        def _fn(canvas, doc):
-            canvas.saveState()
-
-            canvas.setFont(pdf.style.fontName + "-Bold", 10)
-            canvas.drawString(
-                pdf.bounds.W, pdf.bounds.outsideN, settings.WORKBENCH.PDF_COMPANY
-            )
-
-            canvas.setFont(pdf.style.fontName, 6)
-            canvas.drawString(
-                pdf.bounds.W, pdf.bounds.outsideS, settings.WORKBENCH.PDF_ADDRESS
-            )
-
-            canvas.setFont(pdf.style.fontName, 6)
-            canvas.drawRightString(
-                pdf.bounds.E,
-                pdf.bounds.outsideS,
-                _("Page %d")
-                % (
-                    doc.page - doc.restartDocPageNumbers[doc.restartDocIndex - 1]
-                    if doc.restartDocIndex
-                    else doc.page
-                ),
-            )
-
-            canvas.restoreState()
-
-            pdf.draw_watermark(canvas)
-
-        return _fn
+        return _stationery
 
     def postal_address(self, postal_address):
         self.p(postal_address)
@@ -558,3 +589,242 @@ def pdf_response(*args, **kwargs):
     activate(settings.WORKBENCH.PDF_LANGUAGE)
     kwargs["pdfdocument"] = PDFDocument
     return _pdf_response(*args, **kwargs)
+
+
+#: Bump when the layout of PDFs changes to invalidate all cached PDFs
+CACHE_VERSION = 1
+
+
+def _field_values(instance):
+    return [
+        (field.attname, field.value_from_object(instance))
+        for field in instance._meta.concrete_fields
+    ]
+
+
+def fingerprint(instance):
+    """
+    Returns a hash of everything ``process_invoice`` or ``process_offer``
+    render for ``instance``
+    """
+    data = [
+        CACHE_VERSION,
+        settings.WORKBENCH.PDF_LANGUAGE,
+        sorted(
+            (key, value)
+            for key, value in vars(settings.WORKBENCH).items()
+            if key.startswith("PDF_") or key == "FONTS"
+        ),
+        _field_values(instance),
+        instance.owned_by.get_full_name(),
+        [_field_values(service) for service in instance.services.all()],
+    ]
+    if hasattr(instance, "down_payment_invoices"):
+        data.append(
+            [
+                (str(invoice), _field_values(invoice))
+                for invoice in instance.down_payment_invoices.all()
+            ]
+        )
+    return hashlib.sha256(repr(data).encode("utf-8")).hexdigest()
+
+
+def _render(f, instance, method):
+    pdf = PDFDocument(f)
+    pdf.init_letter()
+    getattr(pdf, method)(instance)
+    pdf.generate()
+
+
+def _render_to_path(path, instance, method):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            _render(f, instance, method)
+        os.replace(tmp, path)
+    except Exception:
+        os.unlink(tmp)
+        raise
+
+    # Remove PDFs rendered from outdated inputs
+    for stale in glob.glob(path.rsplit("-", 1)[0] + "-*.pdf"):
+        if stale != path:
+            os.unlink(stale)
+
+
+def _cache_path(instance, key):
+    return os.path.join(
+        settings.PDF_CACHE_DIR,
+        "%s-%s-%s.pdf" % (instance._meta.label_lower, instance.pk, key),
+    )
+
+
+def render_pdf(instance, method):
+    """
+    Returns the PDF of ``instance`` as bytes, using the cache if enabled
+    """
+    if not settings.PDF_CACHE_DIR:
+        f = io.BytesIO()
+        _render(f, instance, method)
+        return f.getvalue()
+
+    path = _cache_path(instance, fingerprint(instance))
+    if not os.path.exists(path):
+        _render_to_path(path, instance, method)
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def cached_pdf_response(instance, method, *, as_attachment, request=None):
+    """
+    Returns the PDF of ``instance`` rendered by the ``PDFDocument`` method
+    ``method``, e.g. ``"process_invoice"``
+
+    PDFs are stored in ``settings.PDF_CACHE_DIR`` using the ``fingerprint``
+    of the instance, so changes to the instance or its services invalidate
+    the stored PDF automatically. The fingerprint is also used as ETag for
+    conditional requests. An empty ``PDF_CACHE_DIR`` disables the cache.
+    """
+    activate(settings.WORKBENCH.PDF_LANGUAGE)
+    filename = "%s.pdf" % FILENAME_RE.sub("-", instance.code)
+    key = fingerprint(instance)
+    etag = quote_etag(key)
+
+    if not settings.PDF_CACHE_DIR:
+        last_modified = None
+    else:
+        path = _cache_path(instance, key)
+        if not os.path.exists(path):
+            _render_to_path(path, instance, method)
+        last_modified = int(os.path.getmtime(path))
+
+    response = request and get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if not response and settings.PDF_CACHE_DIR:
+        response = FileResponse(
+            open(path, "rb"),
+            as_attachment=as_attachment,
+            filename=filename,
+            content_type="application/pdf",
+        )
+    elif not response:
+        response = HttpResponse(content_type="application/pdf")
+        response["Content-Disposition"] = '%s; filename="%s"' % (
+            "attachment" if as_attachment else "inline",
+            filename,
+        )
+        _render(response, instance, method)
+
+    response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified)
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def _no_queries(execute, sql, params, many, context):
+    raise RuntimeError("PDF workers must not access the database.")
+
+
+def _init_worker():
+    # Forked workers share the database connections of the parent process.
+    # Instances are prefetched completely before they are sent to workers.
+    for connection in connections.all():
+        connection.execute_wrappers.append(_no_queries)
+
+
+def _render_worker(task):
+    instance, method = task
+    activate(settings.WORKBENCH.PDF_LANGUAGE)
+    return render_pdf(instance, method)
+
+
+def _render_parallel(instances, method, *, processes):
+    tasks = [(instance, method) for instance in instances]
+    if processes < 2 or len(tasks) < 2:
+        yield from map(_render_worker, tasks)
+        return
+
+    processes = min(processes, len(tasks))
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=multiprocessing.get_context("fork"),
+        initializer=_init_worker,
+    ) as executor:
+        yield from executor.map(
+            _render_worker, tasks, chunksize=max(1, len(tasks) // (4 * processes))
+        )
+
+
+def batch_pdf_response(
+    instances, method, *, filename, merge, progress=None, processes=None
+):
+    """
+    Renders many invoices or offers using the ``PDFDocument`` method
+    ``method`` and returns a HTTP response containing either one merged PDF
+    or a ZIP file with one PDF per instance
+
+    Merged PDFs are rendered into a single document, so that the style and
+    the stationery are only set up once. ZIP files are rendered in parallel
+    by ``processes`` forked worker processes, defaulting to
+    ``settings.PDF_PROCESSES``, and use the PDF cache. Workers do not access
+    the database; instances have to be passed with all related objects
+    selected or prefetched already. ``progress(done, total)`` is called
+    while rendering.
+    """
+    activate(settings.WORKBENCH.PDF_LANGUAGE)
+    instances = list(instances)
+    total = len(instances)
+
+    if merge:
+        if not instances:
+            raise ValueError("Cannot render an empty PDF.")
+        response = HttpResponse(content_type="application/pdf")
+        response["Content-Disposition"] = 'attachment; filename="%s.pdf"' % filename
+        pdf = PDFDocument(response)
+        for index, instance in enumerate(instances):
+            if progress:
+                progress(index, total)
+            pdf.init_letter()
+            getattr(pdf, method)(instance)
+            pdf.restart()
+        pdf.generate()
+        return response
+
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for index, content in enumerate(
+            _render_parallel(
+                instances,
+                method,
+                processes=settings.PDF_PROCESSES if processes is None else processes,
+            )
+        ):
+            zf.writestr("%s.pdf" % FILENAME_RE.sub("-", instances[index].code), content)
+            if progress:
+                progress(index + 1, total)
+
+    response = HttpResponse(buf.getvalue(), content_type="application/zip")
+    response["Content-Disposition"] = 'attachment; filename="%s.zip"' % filename
+    return response
+
+
+def prune_cache(*, days=90):
+    """
+    Removes cached PDFs which have been rendered more than ``days`` days ago
+    """
+    if not settings.PDF_CACHE_DIR:
+        return
+    cutoff = time.time() - days * 86400
+    for path in glob.glob(os.path.join(settings.PDF_CACHE_DIR, "*.pdf")):
+        if os.path.getmtime(path) < cutoff:
+            os.unlink(path)
+
+
+# Build the style sheets of letters and of annual working time reports when
+# starting up instead of when rendering the first document
+shared_style("Rep", 8.5)
+shared_style("Rep", 7)
@@ -0,0 +1,163 @@
+"""
+Lightweight profiling of database queries per request
+
+``workbench.middleware.query_profiler`` counts the queries and measures the
+time spent in the database during each request. The numbers are aggregated
+per view. Statements executed repeatedly with the same shape (the SQL with
+all literals and placeholders removed) during a single request hint at N+1
+problems. Requests slower than ``settings.SLOW_REQUEST_SECONDS`` are kept in
+a ring buffer and logged to the ``workbench.tools.profiling`` logger.
+
+Statistics are kept in the memory of the current process and are lost when
+the process is restarted.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import Counter, deque
+
+from django.conf import settings
+from django.utils import timezone
+
+
+logger = logging.getLogger(__name__)
+
+#: Executions of the same statement shape per request reported as N+1 pattern
+REPEATED = 5
+
+#: Number of slow requests kept in memory
+SLOW_REQUESTS = 100
+
+_lock = threading.Lock()
+_views = {}
+_slow = deque(maxlen=SLOW_REQUESTS)
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b[0-9]+(?:\.[0-9]+)?\b")
+_LIST_RE = re.compile(r"\?(?:\s*,\s*\?)+")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def shape(sql):
+    """
+    Returns the SQL statement with literals, placeholders and lists of
+    values replaced by ``?``
+    """
+    sql = _STRING_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql.replace("%s", "?"))
+    sql = _LIST_RE.sub("?", sql)
+    return _WHITESPACE_RE.sub(" ", sql).strip()
+
+
+class Profile:
+    """
+    Database execute wrapper collecting the queries of a single request
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.queries += 1
+            self.shapes[shape(sql)] += 1
+
+    def repeated(self):
+        """
+        Returns a list of ``(shape, count)`` tuples of repeated statements
+        """
+        return [
+            (sql, count)
+            for sql, count in self.shapes.most_common()
+            if count >= REPEATED
+        ]
+
+
+def record(view, path, profile, seconds):
+    """
+    Adds the ``profile`` of a request to the statistics of ``view``
+    """
+    repeated = profile.repeated()
+    is_slow = seconds >= settings.SLOW_REQUEST_SECONDS
+    with _lock:
+        row = _views.setdefault(
+            view,
+            {
+                "view": view,
+                "requests": 0,
+                "queries": 0,
+                "max_queries": 0,
+                "db_seconds": 0.0,
+                "seconds": 0.0,
+                "max_seconds": 0.0,
+                "repeated": 0,
+                "slow": 0,
+            },
+        )
+        row["requests"] += 1
+        row["queries"] += profile.queries
+        row["max_queries"] = max(row["max_queries"], profile.queries)
+        row["db_seconds"] += profile.seconds
+        row["seconds"] += seconds
+        row["max_seconds"] = max(row["max_seconds"], seconds)
+        row["repeated"] += bool(repeated)
+        row["slow"] += is_slow
+
+        if is_slow:
+            _slow.append(
+                {
+                    "view": view,
+                    "path": path,
+                    "created_at": timezone.now(),
+                    "queries": profile.queries,
+                    "db_seconds": profile.seconds,
+                    "seconds": seconds,
+                    "repeated": repeated,
+                }
+            )
+
+    if is_slow:
+        logger.warning(
+            "Slow request %s (%s): %.3fs, %s queries, %.3fs in the database%s",
+            path,
+            view,
+            seconds,
+            profile.queries,
+            profile.seconds,
+            "".join("\n%sx %s" % (count, sql) for sql, count in repeated),
+        )
+
+
+def statistics():
+    """
+    Returns the statistics of all views, most time spent in the database first
+    """
+    with _lock:
+        rows = [dict(row) for row in _views.values()]
+    for row in rows:
+        row["avg_queries"] = row["queries"] / row["requests"]
+        row["avg_db_seconds"] = row["db_seconds"] / row["requests"]
+        row["avg_seconds"] = row["seconds"] / row["requests"]
+    return sorted(rows, key=lambda row: row["db_seconds"], reverse=True)
+
+
+def slow_requests():
+    """
+    Returns the most recent slow requests, newest first
+    """
+    with _lock:
+        return list(reversed(_slow))
+
+
+def reset():
+    with _lock:
+        _views.clear()
+        _slow.clear()
@@ -22,9 +22,20 @@ look like this::
                 search.fts("database_table", ["field1", "field"])
             ),
         ]
+
+Tables listed in the global search are additionally mirrored into the
+``workbench_searchentry`` index table using ``index()``. The index stores the
+full text document computed by the ``fts()`` trigger together with a
+normalized title for trigram matching, and allows ranking results across all
+models at once using ``ranked()``.
 """
 
 import re
+from collections import defaultdict
+
+from django.core.exceptions import EmptyResultSet
+
+from workbench.tools.reporting import query
 
 
 def drop_old_shit(table):
@@ -74,6 +85,66 @@ CREATE TRIGGER {table}_fts_trigger BEFORE INSERT OR UPDATE
     )
 
 
+def _title(fields, prefix):
+    return "lower(unaccent(concat_ws(' ', {})))".format(
+        ", ".join("{}{}".format(prefix, field) for field in fields)
+    )
+
+
+def index(table, fields, *, archived=None):
+    """
+    Returns the SQL to mirror ``table`` into the search index
+
+    ``fields`` make up the title used for fuzzy matching, ``archived`` is the
+    name of a boolean column excluding rows from ``ranked()`` results.
+    Existing rows are added to the index as well.
+    """
+    return """\
+CREATE OR REPLACE FUNCTION {table}_search_index() RETURNS trigger AS $$
+begin
+  IF TG_OP = 'DELETE' THEN
+    DELETE FROM workbench_searchentry
+    WHERE table_name=TG_TABLE_NAME AND row_pk=old.id;
+  ELSE
+    INSERT INTO workbench_searchentry
+      (table_name, row_pk, title, is_archived, fts_document)
+    VALUES (TG_TABLE_NAME, new.id, {new_title}, {new_archived}, new.fts_document)
+    ON CONFLICT (table_name, row_pk) DO UPDATE SET
+      title=excluded.title,
+      is_archived=excluded.is_archived,
+      fts_document=excluded.fts_document;
+  END IF;
+  return NULL;
+end
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS {table}_search_index_trigger ON {table};
+CREATE TRIGGER {table}_search_index_trigger AFTER INSERT OR UPDATE OR DELETE
+  ON {table} FOR EACH ROW EXECUTE PROCEDURE {table}_search_index();
+
+INSERT INTO workbench_searchentry
+  (table_name, row_pk, title, is_archived, fts_document)
+SELECT '{table}', id, {title}, {archived}, fts_document FROM {table}
+ON CONFLICT (table_name, row_pk) DO NOTHING;
+""".format(
+        table=table,
+        new_title=_title(fields, "new."),
+        new_archived="new.{}".format(archived) if archived else "FALSE",
+        title=_title(fields, ""),
+        archived=archived or "FALSE",
+    )
+
+
+def drop_index(table):
+    return """\
+DROP TRIGGER IF EXISTS {table}_search_index_trigger ON {table};
+DROP FUNCTION IF EXISTS {table}_search_index();
+DELETE FROM workbench_searchentry WHERE table_name='{table}';
+""".format(
+        table=table
+    )
+
+
 def process_query(s):
     """
     Converts the user's search string into something suitable for passing to
@@ -103,3 +174,124 @@ def search(queryset, terms):
         if terms
         else queryset
     )
+
+
+RANK = (
+    "ts_rank({table}.fts_document, to_tsquery('pg_catalog.german', unaccent(%s)))"
+    " + word_similarity(lower(unaccent(%s)), {table}.title)"
+)
+MATCH = (
+    "({table}.fts_document @@ to_tsquery('pg_catalog.german', unaccent(%s))"
+    " OR lower(unaccent(%s)) <%% {table}.title)"
+)
+
+
+def ranked_search(queryset, terms):
+    """
+    Searches ``queryset`` using the search index, most relevant results first
+
+    Contrary to ``search()`` titles also match approximately, e.g. when
+    containing a typo. The rank is available as ``search_rank``.
+    """
+    if not terms:
+        return queryset
+    params = [process_query(terms), terms]
+    return queryset.extra(
+        select={"search_rank": RANK.format(table="workbench_searchentry")},
+        select_params=params,
+        tables=["workbench_searchentry"],
+        where=[
+            "workbench_searchentry.table_name=%s",
+            "workbench_searchentry.row_pk=%s.id" % queryset.model._meta.db_table,
+            MATCH.format(table="workbench_searchentry"),
+        ],
+        params=[queryset.model._meta.db_table, *params],
+        order_by=["-search_rank"],
+    )
+
+
+RANKED_SQL = """\
+SELECT table_name, row_pk, {rank} AS rank
+FROM workbench_searchentry e
+WHERE table_name=ANY(%s) AND NOT is_archived AND {match}
+ORDER BY rank DESC, table_name, row_pk
+LIMIT %s
+""".format(
+    rank=RANK.format(table="e"), match=MATCH.format(table="e")
+)
+
+
+def ranked(terms, models, *, limit=20):
+    """
+    Returns the ``limit`` most relevant instances of all ``models``
+
+    The index is queried once for all models; rows flagged as archived are
+    skipped. Instances are annotated with their ``search_rank``.
+    """
+    tables = {model._meta.db_table: model for model in models}
+    if not terms or not tables:
+        return []
+    params = [process_query(terms), terms]
+    rows = query(RANKED_SQL, [*params, list(tables), *params, limit])
+
+    pks = defaultdict(list)
+    for table, pk, rank in rows:
+        pks[table].append(pk)
+    instances = {
+        table: tables[table]._default_manager.in_bulk(table_pks)
+        for table, table_pks in pks.items()
+    }
+
+    results = []
+    for table, pk, rank in rows:
+        if instance := instances[table].get(pk):
+            instance.search_rank = rank
+            results.append(instance)
+    return results
+
+
+def ranked_search_all(querysets, terms, *, limit):
+    """
+    Runs ``ranked_search()`` on all ``querysets`` at once
+
+    The primary keys of the ``limit`` most relevant rows of each queryset are
+    determined in a single ``UNION ALL`` statement, so the full text searches
+    do not run one after another. Returns a list of lists of instances in the
+    order of ``querysets``.
+    """
+    if not terms:
+        return [list(queryset[:limit]) for queryset in querysets]
+
+    parts, params = [], []
+    for index, queryset in enumerate(querysets):
+        try:
+            sql, sql_params = (
+                queryset.ranked_search(terms)
+                .values_list("pk", "search_rank")[:limit]
+                .query.sql_with_params()
+            )
+        except EmptyResultSet:
+            continue
+        parts.append(
+            "SELECT %s, s.%s, s.search_rank FROM (%s) s"
+            % (index, queryset.model._meta.pk.column, sql)
+        )
+        params.extend(sql_params)
+
+    rows = query(" UNION ALL ".join(parts), params) if parts else []
+    pks = defaultdict(list)
+    ranks = {}
+    for source, pk, rank in rows:
+        pks[source].append(pk)
+        ranks[source, pk] = rank
+
+    results = []
+    for index, queryset in enumerate(querysets):
+        instances = queryset.in_bulk(pks[index]) if pks[index] else {}
+        results.append([])
+        # UNION ALL does not guarantee the order of rows
+        for pk in sorted(pks[index], key=lambda pk: -ranks[index, pk]):
+            instance = instances[pk]
+            instance.search_rank = ranks[index, pk]
+            results[-1].append(instance)
+    return results
@@ -1,3 +1,6 @@
+import time
+from fnmatch import fnmatch
+
 from django.contrib.messages import get_messages
 
 
@@ -11,3 +14,56 @@ def check_code(test, base_url):
         test.assertEqual(response.status_code, status_code)
 
     return code
+
+
+class LocalRedis:
+    """
+    In-process stand-in for ``redis.Redis``
+
+    Implements the subset of commands used by
+    ``workbench.reporting.caching.RedisCache``. Clients created with the same
+    URL share their data.
+    """
+
+    servers = {}
+
+    def __init__(self, url):
+        self.data = self.servers.setdefault(url, {})
+
+    @classmethod
+    def from_url(cls, url):
+        return cls(url)
+
+    def _get(self, name):
+        value, expires_at = self.data.get(name, (None, None))
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.data[name]
+            return None, None
+        return value, expires_at
+
+    def get(self, name):
+        return self._get(name)[0]
+
+    def set(self, name, value, ex=None, nx=False):
+        if nx and self._get(name)[0] is not None:
+            return None
+        self.data[name] = (value, None if ex is None else time.monotonic() + ex)
+        return True
+
+    def expire(self, name, time):
+        value = self.get(name)
+        return value is not None and self.set(name, value, ex=time)
+
+    def persist(self, name):
+        value = self.get(name)
+        return value is not None and self.set(name, value)
+
+    def delete(self, *names):
+        return sum(1 for name in names if self.data.pop(name, None) is not None)
+
+    def scan_iter(self, match="*"):
+        return [
+            name
+            for name in list(self.data)
+            if fnmatch(name, match) and self.get(name) is not None
+        ]
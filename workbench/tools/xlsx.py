@@ -1,17 +1,66 @@
+import tempfile
 from collections import defaultdict
 from itertools import chain
 
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth
+from django.http import FileResponse
 from django.utils.text import capfirst, slugify
 from django.utils.translation import gettext as _
 
 from xlsxdocument import XLSXDocument
 
+from workbench.accounts.models import User
 from workbench.contacts.models import PostalAddress
+from workbench.projects.models import Service
 from workbench.templatetags.workbench import label
 from workbench.tools.formats import Z1
 
 
 class WorkbenchXLSXDocument(XLSXDocument):
+    """
+    XLSX document writing rows as they are produced
+
+    The workbook is created in openpyxl's write-only mode; querysets are
+    iterated in chunks and the document is written to a temporary file
+    instead of being held in memory, so even large exports run in roughly
+    constant memory.
+    """
+
+    def table_from_queryset(self, queryset, additional=()):
+        opts = queryset.model._meta
+
+        titles = ["__str__"]
+        titles.extend(str(capfirst(field.verbose_name)) for field in opts.fields)
+        titles.extend(a[0] for a in additional)
+
+        def rows():
+            for instance in queryset.iterator(chunk_size=2000):
+                row = ["%s" % instance]
+                for field in opts.fields:
+                    if field.choices:
+                        row.append(getattr(instance, "get_%s_display" % field.name)())
+                    else:
+                        row.append(getattr(instance, field.name))
+                row.extend(a[1](instance) for a in additional)
+                yield row
+
+        self.add_sheet(slugify("%s" % opts.verbose_name_plural))
+        self.table(titles, rows())
+
+    def to_response(self, filename):
+        f = tempfile.TemporaryFile()
+        self.workbook.save(f)
+        f.seek(0)
+        return FileResponse(
+            f,
+            as_attachment=True,
+            filename=filename,
+            content_type=(
+                "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            ),
+        )
+
     def logged_hours(self, queryset):
         queryset = queryset.select_related(
             "created_by",
@@ -35,20 +84,43 @@ class WorkbenchXLSXDocument(XLSXDocument):
             ],
         )
 
-        by_service_and_user = defaultdict(lambda: defaultdict(lambda: Z1))
+        by_service_and_user = defaultdict(dict)
+        by_service_and_month = defaultdict(dict)
+        by_user_and_month = defaultdict(dict)
+        # Compute the pivot tables in the database instead of iterating the
+        # queryset a second time
+        aggregates = queryset.order_by()
+        month = TruncMonth("rendered_on")
+        for row in aggregates.values("service", "rendered_by").annotate(Sum("hours")):
+            by_service_and_user[row["service"]][row["rendered_by"]] = row["hours__sum"]
+        for row in aggregates.values("service", month=month).annotate(Sum("hours")):
+            by_service_and_month[row["service"]][row["month"]] = row["hours__sum"]
+        for row in aggregates.values("rendered_by", month=month).annotate(Sum("hours")):
+            by_user_and_month[row["rendered_by"]][row["month"]] = row["hours__sum"]
+
+        services = Service.objects.select_related("project__owned_by").in_bulk(
+            list(by_service_and_user)
+        )
+        users = User.objects.in_bulk(list(by_user_and_month))
+        by_service_and_user = {
+            services[service]: {users[user]: hours for user, hours in by_users.items()}
+            for service, by_users in by_service_and_user.items()
+        }
+        by_service_and_month = {
+            services[service]: by_months
+            for service, by_months in by_service_and_month.items()
+        }
+        by_user_and_month = {
+            users[user]: by_months for user, by_months in by_user_and_month.items()
+        }
         by_user = defaultdict(lambda: Z1)
-        by_service_and_month = defaultdict(lambda: defaultdict(lambda: Z1))
-        by_user_and_month = defaultdict(lambda: defaultdict(lambda: Z1))
+        for by_users in by_service_and_user.values():
+            for user, hours in by_users.items():
+                by_user[user] += hours
         by_month = defaultdict(lambda: Z1)
-
-        for h in queryset:
-            by_service_and_user[h.service][h.rendered_by] += h.hours
-            by_user[h.rendered_by] += h.hours
-
-            month = h.rendered_on.replace(day=1)
-            by_service_and_month[h.service][month] += h.hours
-            by_user_and_month[h.rendered_by][month] += h.hours
-            by_month[month] += h.hours
+        for by_months in by_user_and_month.values():
+            for month, hours in by_months.items():
+                by_month[month] += hours
 
         self.add_sheet(slugify(_("By service and user")))
         users = sorted(
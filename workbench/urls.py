@@ -32,6 +32,9 @@ urlpatterns = [
     re_path(r"^search/$", views.search, name="search"),
     re_path(r"^history/(\w+)/(\w+)/([0-9]+)/$", views.history, name="history"),
     re_path(r"^report/", include("workbench.reporting.urls")),
+    re_path(r"^jobs/(\w+)/prepare/$", views.job_prepare, name="job_prepare"),
+    re_path(r"^jobs/([0-9]+)/$", views.job_status, name="job_status"),
+    re_path(r"^jobs/([0-9]+)/download/$", views.job_download, name="job_download"),
     re_path(r"", include("workbench.timer.urls")),
     re_path(r"^notes/", include("workbench.notes.urls")),
     # Legacy URL redirects
@@ -2,23 +2,29 @@ import datetime as dt
 
 from django.apps import apps
 from django.contrib import messages
-from django.db import connections
-from django.http import Http404
-from django.shortcuts import render
+from django.core.exceptions import PermissionDenied
+from django.db import connection, connections
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, JsonResponse
+from django.shortcuts import get_object_or_404, render
 from django.urls import reverse
 from django.utils.text import capfirst
 from django.utils.translation import gettext as _
+from django.views.decorators.http import require_POST
 
+from workbench import jobs
 from workbench.accounts.features import FEATURES
 from workbench.audit.models import LoggedAction
 from workbench.contacts.models import Organization, Person
 from workbench.deals.models import Deal
 from workbench.invoices.models import Invoice, RecurringInvoice
 from workbench.logbook.models import LoggedHours
+from workbench.models import Job
 from workbench.offers.models import Offer
 from workbench.planning.models import PlanningRequest
 from workbench.projects.models import Campaign, Project
-from workbench.tools.history import HISTORY, changes
+from workbench.reporting.caching import cached
+from workbench.tools.history import HISTORY, changes, page
+from workbench.tools.search import ranked_search_all
 from workbench.tools.validation import in_days
 
 
@@ -71,6 +77,7 @@ def _all_users_hours():
     )
 
 
+@cached("contacts_person", "accounts_user")
 def _birthdays():
     with connections["default"].cursor() as cursor:
         cursor.execute(
@@ -164,9 +171,11 @@ def search(request):
                     "%s_%s_list"
                     % (queryset.model._meta.app_label, queryset.model._meta.model_name)
                 ),
-                "results": queryset.search(q)[:101],
+                "results": instances,
             }
-            for queryset in sources
+            for queryset, instances in zip(
+                sources, ranked_search_all(sources, q, limit=101)
+            )
         ]
     else:
         messages.error(request, _("Search query missing."))
@@ -184,6 +193,11 @@ def history(request, db_table, attribute, id):
     except KeyError:
         raise Http404
 
+    # The URL pattern only accepts digits but the value may still be too
+    # large for the bigint keys in the audit log
+    if int(id) > connection.ops.integer_field_range("BigIntegerField")[1]:
+        raise Http404
+
     if callable(cfg):
         cfg = cfg(request.user)
     fields = cfg.get("fields", set())
@@ -213,15 +227,54 @@ def history(request, db_table, attribute, id):
             "id": id,
         }
 
-    actions = LoggedAction.objects.for_model(model).with_data(**{attribute: id})
+    try:
+        before = int(request.GET["before"])
+    except (KeyError, ValueError):
+        before = None
+    actions, older = page(
+        LoggedAction.objects.with_archive().for_row(model, id, attribute=attribute),
+        before=before,
+    )
 
     return render(
         request,
-        "history_modal.html",
+        "history_page.html" if before else "history_modal.html",
         {
             "instance": instance,
             "title": title,
             "changes": changes(model, fields, actions),
             "related": related,
+            "is_older_page": bool(before),
+            "older_url": "%s?before=%s" % (request.path, older) if older else None,
         },
     )
+
+
+@require_POST
+def job_prepare(request, kind):
+    if kind not in jobs.KINDS:
+        raise Http404
+    try:
+        parameters = jobs.KINDS[kind].prepare(request)
+    except PermissionDenied:
+        return HttpResponse(status=403)
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+    job = jobs.enqueue(kind, user=request.user, parameters=parameters)
+    return JsonResponse(job.as_dict(), status=202)
+
+
+def job_status(request, pk):
+    job = get_object_or_404(
+        Job.objects.defer("content"), pk=pk, created_by=request.user
+    )
+    return JsonResponse(job.as_dict())
+
+
+def job_download(request, pk):
+    job = get_object_or_404(
+        Job.objects.filter(status=Job.DONE), pk=pk, created_by=request.user
+    )
+    response = HttpResponse(bytes(job.content), content_type=job.content_type)
+    response["Content-Disposition"] = 'attachment; filename="%s"' % job.filename
+    return response